@@ -1,5 +1,7 @@
 import network
 import usocket as socket
+import uselect as select
+import ujson as json
 import time
 from machine import Pin, UART
 
@@ -26,25 +28,128 @@ def flush_uart_buffer():
         uart.read()  # 一次性读取所有积压数据
 
 
+# CH9329 帧头
+FRAME_HEAD = b'\x57\xab'
+
+
+def pop_frames(buf):
+    # 从字节流中取出完整的 CH9329 帧，返回 (帧列表, 剩余数据)
+    frames = []
+    while True:
+        start = buf.find(FRAME_HEAD)
+        if start < 0:
+            # 末尾可能是被截断的半个帧头
+            return frames, buf[-1:] if buf[-1:] == FRAME_HEAD[:1] else b''
+        if len(buf) - start < 5:
+            return frames, buf[start:]
+        total = 6 + buf[start + 4]
+        if len(buf) - start < total:
+            return frames, buf[start:]
+        frames.append(buf[start:start + total])
+        buf = buf[start + total:]
+
+
+# UDP 统计查询/应答的负载前缀
+UDP_STAT_REQUEST = b'STAT'
+
+# UDP 计数器：收到、接受、丢弃（乱序或重复）、乱序、丢失（序号缺口）
+udp_stats = {'received': 0, 'accepted': 0, 'dropped': 0, 'reordered': 0, 'lost': 0}
+udp_state = {'epoch': None, 'last_seq': None}
+
+
+def accept_sequence(epoch, seq):
+    # 只接受比上一个已接受序号更新的数据包，迟到或重复的数据包直接丢弃
+    udp_stats['received'] += 1
+    if epoch != udp_state['epoch'] or udp_state['last_seq'] is None:
+        # 上位机重启后会话号变化，重新开始计数
+        udp_state['epoch'] = epoch
+        udp_state['last_seq'] = seq
+        udp_stats['accepted'] += 1
+        return True
+    diff = (seq - udp_state['last_seq']) & 0xFFFF
+    if diff == 0:
+        udp_stats['dropped'] += 1
+        return False
+    if diff >= 0x8000:
+        udp_stats['dropped'] += 1
+        udp_stats['reordered'] += 1
+        return False
+    udp_stats['lost'] += diff - 1
+    udp_state['last_seq'] = seq
+    udp_stats['accepted'] += 1
+    return True
+
+
+def handle_datagram(u, data, addr):
+    # 数据报格式：会话号(1字节) + 序号(2字节，大端) + 一个 CH9329 帧 或 STAT 查询
+    if len(data) < 3:
+        return
+    payload = data[3:]
+    if payload == UDP_STAT_REQUEST:
+        u.sendto(UDP_STAT_REQUEST + json.dumps(udp_stats).encode(), addr)
+        return
+    if payload[:2] != FRAME_HEAD:
+        return
+    if accept_sequence(data[0], (data[1] << 8) | data[2]):
+        # 转发给CH9329
+        uart.write(payload)
+        flush_uart_buffer()  # 清空未读数据
+
+
 def start_server():
     # 创建套接字并绑定到端口80 TCP
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.bind(('', 80))
     s.listen(5)
+    # 同一端口的 UDP 套接字，用于接收带序号的数据报
+    u = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    u.bind(('', 80))
     print('Listening on socket...')
 
-    while True:
-        print("Listening")
-        conn, addr = s.accept()
-        print('Connected by', addr)
-        request = conn.recv(1024)
-        print('Receive:', request)
+    poller = select.poll()
+    poller.register(s, select.POLLIN)
+    poller.register(u, select.POLLIN)
+
+    # 活动连接：conn -> [未处理数据, 最近活动时间]
+    conns = {}
 
+    def close_conn(conn):
+        poller.unregister(conn)
         conn.close()
+        del conns[conn]
 
-        # 转发给CH9329
-        uart.write(request)
-        flush_uart_buffer()  # 清空未读数据
+    while True:
+        for event in poller.poll(1000):
+            obj = event[0]
+            if obj is s:
+                conn, addr = s.accept()
+                print('Connected by', addr)
+                poller.register(conn, select.POLLIN)
+                conns[conn] = [b'', time.ticks_ms()]
+            elif obj is u:
+                data, addr = u.recvfrom(64)
+                handle_datagram(u, data, addr)
+            elif obj in conns:
+                try:
+                    data = obj.recv(256)
+                except OSError:
+                    data = b''
+                if not data:
+                    close_conn(obj)
+                    continue
+                # 上位机可复用同一连接连续发送多帧，也兼容每条命令新建连接的旧方式
+                state = conns[obj]
+                frames, state[0] = pop_frames(state[0] + data)
+                state[1] = time.ticks_ms()
+                for frame in frames:
+                    # 转发给CH9329
+                    uart.write(frame)
+                flush_uart_buffer()  # 清空未读数据
+
+        # 长时间无数据则断开，避免失效连接占用资源
+        now = time.ticks_ms()
+        for conn in [c for c, state in conns.items() if time.ticks_diff(now, state[1]) > 10000]:
+            close_conn(conn)
 
 
 if __name__ == '__main__':
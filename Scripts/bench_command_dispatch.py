@@ -0,0 +1,112 @@
+"""
+命令发送对推理帧率的影响：同步发送 vs CommandDispatcher 异步发送
+
+用一个接受连接很慢的本地 TCP 服务模拟卡顿/掉线的下位机（监听队列很短，
+每隔 accept_interval 秒才 accept 一次，队列满后新连接会一直等到超时）。
+推理用固定耗时的 sleep 模拟，每帧都切换按键并移动鼠标，比较两种方式下的帧率与帧耗时。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_command_dispatch
+"""
+import socket
+import threading
+import time
+
+import numpy as np
+
+from UpperMachine.pose_estimation.bytes2command import bytes2command, combine_mouse_actions, parse_mouse_actions
+from UpperMachine.pose_estimation.command_dispatcher import CommandDispatcher
+from UpperMachine.pose_estimation.sendcommand import send_command_timeout
+
+
+class SlowBridge:
+    def __init__(self, accept_interval=0.5):
+        self.accept_interval = accept_interval
+        self.frames = 0
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.host, self.port = self.server.getsockname()
+        self.is_running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        while self.is_running:
+            time.sleep(self.accept_interval)
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                break
+            with conn:
+                while conn.recv(256):
+                    self.frames += 1
+
+    def stop(self):
+        self.is_running = False
+        self.server.close()
+
+
+def frame_states(i):
+    # 每帧切换一次按键，并持续左移鼠标
+    keyboard = [0x04] if i % 2 else [0x05]
+    mouse_actions = [-9]
+    return keyboard, mouse_actions
+
+
+def run_sync(bridge, frames, infer_time):
+    durations = []
+    for i in range(frames):
+        start = time.perf_counter()
+        time.sleep(infer_time)
+        keyboard, mouse_actions = frame_states(i)
+        send_command_timeout(bridge.host, bridge.port, bytes2command(keyboard), timeout=1.0)
+        send_command_timeout(bridge.host, bridge.port, combine_mouse_actions(mouse_actions), timeout=1.0, ignore_cache=True)
+        durations.append(time.perf_counter() - start)
+    return np.array(durations), None
+
+
+def run_dispatch(bridge, frames, infer_time):
+    dispatcher = CommandDispatcher(send_command_timeout, send_command_timeout, bridge.host, bridge.port, timeout=1.0)
+    dispatcher.start()
+
+    durations = []
+    depths = []
+    for i in range(frames):
+        start = time.perf_counter()
+        time.sleep(infer_time)
+        keyboard, mouse_actions = frame_states(i)
+        dispatcher.submit_keyboard(keyboard)
+        dispatcher.submit_mouse(*parse_mouse_actions(mouse_actions), force=True)
+        depths.append(dispatcher.depth())
+        durations.append(time.perf_counter() - start)
+
+    dispatcher.stop(timeout=0)
+    stats = dispatcher.get_stats()
+    stats['max_depth'] = max(depths)
+    return np.array(durations), stats
+
+
+def report(name, durations):
+    ms = durations * 1000
+    print(f"{name:>10} {len(durations) / durations.sum():>8.1f} {np.percentile(ms, 50):>10.2f} "
+          f"{np.percentile(ms, 95):>10.2f} {ms.max():>10.2f}")
+
+
+def main(frames=60, infer_time=0.02):
+    print(f"模拟推理 {infer_time * 1000:.0f} ms/帧，共 {frames} 帧；慢速下位机每 0.5 s 接受一次连接")
+    print(f"{'mode':>10} {'fps':>8} {'p50 (ms)':>10} {'p95 (ms)':>10} {'max (ms)':>10}")
+
+    bridge = SlowBridge()
+    durations, _ = run_sync(bridge, frames, infer_time)
+    report('sync', durations)
+    bridge.stop()
+
+    bridge = SlowBridge()
+    durations, stats = run_dispatch(bridge, frames, infer_time)
+    report('dispatch', durations)
+    bridge.stop()
+    print(f"发送队列: {stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+/api/detect_keypoints_batch 一次请求 64 帧：原实现（逐帧解码 + infer）vs decode_images + infer_batch
+
+用模拟估计器（按 1:6:1 sleep 模拟前处理 / 推理 / 解码）与 Source/example.jpg 编码成的 base64 帧，
+只计算请求体解析之后、生成 JSON 之前的部分。没有真正批量推理的后端（rdkx5、fastdeploy）
+走 pipelined_infer_batch；ov 后端的动态 batch 推理需要 openvino，此处不测。
+
+- 校验两者得到的每帧关键点字典一致
+- 报告整批耗时与其中的解码耗时
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_detect_batch
+"""
+import base64
+import time
+
+import cv2
+import numpy as np
+
+from Scripts.fake_pose_pipeline import FakeEstimator
+from UpperMachine.pose_estimation.batch import decode_images, pipelined_infer_batch
+from UpperMachine.utils import convert_numpy_to_list
+
+
+def make_frames(count, width=640, height=480):
+    image = cv2.resize(cv2.imread('Source/example.jpg'), (width, height))
+    _, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    data = 'data:image/jpeg;base64,' + base64.b64encode(jpeg.tobytes()).decode()
+    return [{'index': i, 'imageData': data, 'mirrored': i % 2 == 0} for i in range(count)]
+
+
+def legacy_batch(frames, estimator):
+    # 原 detect_keypoints_batch 的循环
+    results = {}
+    decode_time = 0.0
+    for frame_data in frames:
+        start = time.perf_counter()
+        img_data_str = frame_data['imageData']
+        if ',' in img_data_str:
+            img_data = base64.b64decode(img_data_str.split(',')[1])
+        else:
+            img_data = base64.b64decode(img_data_str)
+        img = cv2.imdecode(np.frombuffer(img_data, np.uint8), cv2.IMREAD_COLOR)
+        if not frame_data.get('mirrored', False):
+            img = cv2.flip(img, 1)
+        decode_time += time.perf_counter() - start
+        poses, _ = estimator.infer(img, is_draw=False)
+        if poses is not None and len(poses) > 0:
+            results[frame_data['index']] = convert_numpy_to_list(estimator.pose2dict(poses))
+        else:
+            results[frame_data['index']] = {}
+    return results, decode_time
+
+
+def batched(frames, estimator):
+    start = time.perf_counter()
+    images = decode_images(frames)
+    decode_time = time.perf_counter() - start
+    poses, found = pipelined_infer_batch(estimator, images)
+    results = {}
+    for row, frame_data in enumerate(frames):
+        results[frame_data['index']] = (convert_numpy_to_list(estimator.pose2dict(poses[row:row + 1]))
+                                        if found[row] else {})
+    return results, decode_time
+
+
+def run(name, fn, frames, infer_time, num_requests):
+    estimator = FakeEstimator(infer_time=infer_time, draw=False, num_requests=num_requests)
+    start = time.perf_counter()
+    results, decode_time = fn(frames, estimator)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>24} {elapsed * 1000:>10.1f} {decode_time * 1000:>11.1f} {len(frames) / elapsed:>8.1f}")
+    return results
+
+
+def main(count=64):
+    frames = make_frames(count)
+    for infer_time, num_requests in ((0.02, 1), (0.02, 2)):
+        print(f"\n{count} 帧，模拟推理 {infer_time * 1000:.0f} ms/帧，num_requests={num_requests}")
+        print(f"{'':>24} {'total (ms)':>10} {'decode (ms)':>11} {'fps':>8}")
+        ref = run('legacy (逐帧)', legacy_batch, frames, infer_time, num_requests)
+        new = run('decode_images + batch', batched, frames, infer_time, num_requests)
+        assert new == ref, "批量检测结果与原实现不一致"
+    print("\n每帧关键点与原实现一致")
+
+
+if __name__ == '__main__':
+    main()
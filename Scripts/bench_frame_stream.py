@@ -0,0 +1,124 @@
+"""
+预览推送方式对比：base64 JSON (原方式) vs Socket.IO 二进制附件 vs MJPEG
+
+用一段录制的视频（--clip，默认用 Source/Images 下的姿势照片拼成的片段）经模拟检测流程绘制关键点后，
+按 camera_thread 的方式逐帧编码，统计每帧实际写到连接上的字节数与推送线程的 CPU 耗时：
+- base64：JPEG → base64 → 与 get_stats() 一起放进 frame_update 的 JSON，编码为 Socket.IO 文本包
+- binary：JPEG 字节作为二进制附件，frame_update 只带检测结果，stats 每秒单独发送一次
+- mjpeg：multipart 分段头 + JPEG 字节，frame_update 只带检测结果
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_frame_stream [--clip video.mp4]
+"""
+import argparse
+import base64
+import glob
+import time
+
+import cv2
+from socketio import packet
+
+from Scripts.fake_hid_bridge import FakeHidBridge
+from Scripts.fake_pose_pipeline import FakeEstimator, create_fake_service
+from UpperMachine.flask.preview import MJPEG_BOUNDARY, FrameStream, PreviewEncoder
+
+# 与预览编码线程相同的编码（镜像 + JPEG），不缩放，三种方式推送同样的画面
+preview_encoder = PreviewEncoder(FrameStream(), max_width=0)
+
+
+def load_clip(path, width=640, height=480, max_frames=300):
+    frames = []
+    if path:
+        cap = cv2.VideoCapture(path)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.resize(frame, (width, height)))
+        cap.release()
+    else:
+        for image_path in sorted(glob.glob('Source/Images/*.jpg')):
+            frames.append(cv2.resize(cv2.imread(image_path), (width, height)))
+    if not frames:
+        raise RuntimeError(f"No frames loaded from {path or 'Source/Images'}")
+    return frames
+
+
+def encoded_size(encoded):
+    """Socket.IO 包编码后的字节数（engine.io 的 1 字节消息类型前缀计入在内）"""
+    if isinstance(encoded, list):
+        return sum(len(part) + 1 for part in encoded)
+    return len(encoded.encode('utf-8')) + 1
+
+
+def emit_packet(event, payload):
+    return packet.Packet(packet.EVENT, data=[event, payload]).encode()
+
+
+def detection_payload(state_name, poses, words_list, service):
+    return {
+        'state': state_name,
+        'poses_count': len(poses) if poses is not None else 0,
+        'instruction': words_list,
+        'fps': round(service.stats['current_fps'], 1),
+        'person_detected': len(poses) > 0 if poses is not None else False
+    }
+
+
+# 以下三个函数对应 camera_thread 每帧的工作，返回该帧写到连接上的字节数
+def push_base64(frame, detection, service):
+    jpeg = preview_encoder.encode(frame)
+    payload = dict(detection, image=base64.b64encode(jpeg).decode('utf-8'), stats=service.get_stats())
+    return encoded_size(emit_packet('frame_update', payload))
+
+
+def push_binary(frame, detection, service):
+    jpeg = preview_encoder.encode(frame)
+    return encoded_size(emit_packet('frame_update', dict(detection, image=jpeg)))
+
+
+def push_mjpeg(frame, detection, service):
+    jpeg = preview_encoder.encode(frame)
+    header = (f'--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n').encode()
+    return len(header) + len(jpeg) + 2 + encoded_size(emit_packet('frame_update', detection))
+
+
+def main(clip=None, repeat=20, fps=30, stats_interval=1.0):
+    frames = load_clip(clip)
+    bridge = FakeHidBridge().start()
+    service = create_fake_service(bridge, estimator=FakeEstimator(infer_time=0))
+    processed = [service.process_frame(frame) for frame in frames]
+    service.close()
+    bridge.stop()
+
+    print(f"片段: {clip or 'Source/Images/*.jpg'}，{len(frames)} 帧 {frames[0].shape[1]}x{frames[0].shape[0]}，JPEG 质量 70")
+    print(f"{'transport':>10} {'bytes/frame':>12} {'vs base64':>10} {'cpu ms/frame':>13} {'vs base64':>10}")
+    # binary / mjpeg 的 stats 事件每 stats_interval 秒一次，按帧率折算到每帧
+    stats_size = encoded_size(emit_packet('stats', service.get_stats()))
+    stats_per_frame = {'base64': 0.0, 'binary': stats_size / (fps * stats_interval),
+                       'mjpeg': stats_size / (fps * stats_interval)}
+
+    results = {}
+    for name, push in (('base64', push_base64), ('binary', push_binary), ('mjpeg', push_mjpeg)):
+        total_bytes = 0
+        for frame, state_name, poses, words_list in processed:
+            total_bytes += push(frame, detection_payload(state_name, poses, words_list, service), service)
+        total_bytes += stats_per_frame[name] * len(processed)
+
+        start = time.process_time()
+        for _ in range(repeat):
+            for frame, state_name, poses, words_list in processed:
+                push(frame, detection_payload(state_name, poses, words_list, service), service)
+        cpu_ms = (time.process_time() - start) / (repeat * len(processed)) * 1000
+        results[name] = (total_bytes / len(processed), cpu_ms)
+
+    base_bytes, base_cpu = results['base64']
+    for name, (size, cpu_ms) in results.items():
+        print(f"{name:>10} {size:>12.0f} {size / base_bytes:>9.0%} {cpu_ms:>13.3f} {cpu_ms / base_cpu:>9.0%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clip', default=None, help='录制的视频文件，默认使用 Source/Images 下的图片')
+    args = parser.parse_args()
+    main(args.clip)
@@ -0,0 +1,170 @@
+"""
+/api/detect_keypoints_batch 上传 100 帧：base64 JSON（原方式）vs multipart/form-data vs 长度前缀二进制流
+
+每种方式在单独的子进程中启动一个只含该接口的 Flask 服务（werkzeug 开发服务器，与 flask_app 相同），
+估计器为 Scripts.fake_pose_pipeline.FakeEstimator，帧为 Source/example.jpg 缩放到 640x480 后的 JPEG。
+子进程先处理一个 2 帧的预热请求，再以此为基准统计 100 帧请求期间的：
+
+- peak RSS 增量（ru_maxrss，包含 cv2 / numpy 的原生内存）
+- tracemalloc 峰值（Python 层分配，包括请求体缓存与 base64 字符串）
+
+父进程报告请求体大小与整个请求的墙钟时间，并校验三种方式返回的关键点一致。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_frame_upload
+"""
+import base64
+import http.client
+import json
+import logging
+import multiprocessing
+import resource
+import time
+import tracemalloc
+
+import cv2
+
+from UpperMachine.flask.upload import FLAG_MIRRORED, FRAME_HEADER
+
+INFER_TIME = 0.005
+
+
+def serve(port_queue):
+    from flask import Flask, jsonify, request
+
+    from Scripts.fake_pose_pipeline import FakeEstimator
+    from UpperMachine.flask.upload import iter_uploaded_frames
+    from UpperMachine.pose_estimation.batch import decode_images, decode_jpeg, pipelined_infer_batch
+    from UpperMachine.utils import convert_numpy_to_list
+    from werkzeug.serving import make_server
+
+    app = Flask(__name__)
+    estimator = FakeEstimator(infer_time=INFER_TIME, draw=False)
+    baseline = {}
+
+    def detect_json():
+        # 与 routes.detect_keypoints_batch 的 JSON 路径相同
+        frames = request.json.get('frames', [])
+        images = decode_images(frames)
+        valid = [i for i, img in enumerate(images) if img is not None]
+        poses, found = pipelined_infer_batch(estimator, [images[i] for i in valid])
+        results = {frame_data['index']: {} for frame_data in frames}
+        for row, i in enumerate(valid):
+            if found[row]:
+                results[frames[i]['index']] = convert_numpy_to_list(estimator.pose2dict(poses[row:row + 1]))
+        return results
+
+    def detect_uploaded():
+        # 与 routes.detect_uploaded_frames 相同
+        indices = []
+
+        def images():
+            for index, mirrored, jpeg in iter_uploaded_frames(request):
+                indices.append(index)
+                yield decode_jpeg(jpeg, mirrored)
+
+        poses, found = pipelined_infer_batch(estimator, images())
+        return {index: convert_numpy_to_list(estimator.pose2dict(poses[row:row + 1])) if found[row] else {}
+                for row, index in enumerate(indices)}
+
+    @app.route('/api/detect_keypoints_batch', methods=['POST'])
+    def detect_keypoints_batch():
+        results = detect_json() if request.is_json else detect_uploaded()
+        _, peak = tracemalloc.get_traced_memory()
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        response = jsonify({'success': True, 'keypoints': results})
+        if not baseline:
+            # 预热请求：之后的请求相对此时统计
+            baseline['rss'] = rss
+        else:
+            response.headers['X-Peak-RSS-KB'] = str(rss - baseline['rss'])
+            response.headers['X-Tracemalloc-Peak-KB'] = str(peak // 1024)
+        tracemalloc.reset_peak()
+        return response
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    tracemalloc.start()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def make_jpegs(count, width=640, height=480):
+    image = cv2.resize(cv2.imread('Source/example.jpg'), (width, height))
+    _, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return [jpeg.tobytes()] * count
+
+
+def json_body(jpegs):
+    frames = [{'index': i, 'mirrored': i % 2 == 0,
+               'imageData': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode()}
+              for i, jpeg in enumerate(jpegs)]
+    return 'application/json', json.dumps({'frames': frames}).encode()
+
+
+def multipart_body(jpegs, boundary='----pose-recorder-frames'):
+    # 与浏览器 FormData 相同：mirrored 字段作用于其后的 frame
+    parts = []
+    for i, jpeg in enumerate(jpegs):
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="mirrored"\r\n\r\n'
+                     f'{int(i % 2 == 0)}\r\n'.encode())
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="frame"; filename="{i}.jpg"\r\n'
+                     f'Content-Type: image/jpeg\r\n\r\n'.encode() + jpeg + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', b''.join(parts)
+
+
+def length_prefixed_body(jpegs):
+    return 'application/octet-stream', b''.join(
+        FRAME_HEADER.pack(i, FLAG_MIRRORED if i % 2 == 0 else 0, len(jpeg)) + jpeg for i, jpeg in enumerate(jpegs))
+
+
+def post(port, content_type, body, chunk_size=256 * 1024):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    conn.putrequest('POST', '/api/detect_keypoints_batch')
+    conn.putheader('Content-Type', content_type)
+    conn.putheader('Content-Length', str(len(body)))
+    conn.endheaders()
+    view = memoryview(body)
+    for start in range(0, len(body), chunk_size):
+        conn.send(view[start:start + chunk_size])
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    headers = dict(response.getheaders())
+    conn.close()
+    return payload, headers
+
+
+def run(mode, make_body, jpegs):
+    ctx = multiprocessing.get_context('spawn')
+    port_queue = ctx.Queue()
+    server = ctx.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    try:
+        port = port_queue.get(timeout=60)
+        post(port, *make_body(jpegs[:2]))
+        content_type, body = make_body(jpegs)
+        start = time.perf_counter()
+        payload, headers = post(port, content_type, body)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.join()
+    assert payload['success'] and len(payload['keypoints']) == len(jpegs), payload
+    print(f"{mode:>16} {len(body) / 1e6:>10.2f} {elapsed * 1000:>10.0f} "
+          f"{int(headers['X-Peak-RSS-KB']) / 1024:>14.1f} {int(headers['X-Tracemalloc-Peak-KB']) / 1024:>16.1f}")
+    return payload['keypoints']
+
+
+def main(count=100):
+    jpegs = make_jpegs(count)
+    print(f"{count} 帧 640x480 JPEG（{len(jpegs[0]) / 1024:.0f} KB/帧），模拟推理 {INFER_TIME * 1000:.0f} ms/帧")
+    print(f"{'':>16} {'body (MB)':>10} {'wall (ms)':>10} {'peak RSS (MB)':>14} {'tracemalloc (MB)':>16}")
+    ref = run('base64 JSON', json_body, jpegs)
+    for mode, make_body in (('multipart', multipart_body), ('length-prefixed', length_prefixed_body)):
+        assert run(mode, make_body, jpegs) == ref, f"{mode} 的检测结果与 JSON 上传不一致"
+    print("\n三种上传方式的每帧关键点一致")
+
+
+if __name__ == '__main__':
+    main()
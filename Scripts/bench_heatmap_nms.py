@@ -0,0 +1,68 @@
+"""
+OpenPose 热力图 NMS：逐通道 pool2d + heatmap_nms (原实现) vs batched_heatmap_nms
+
+human-pose-estimation-0001 (输入 256x456) 的热力图输出为 (1, 19, 32, 57)。
+用若干高斯峰 + 正负噪声构造热力图，另含量化后大量相等值（平台）与边界负值的情形，
+校验两者结果逐位一致（包括 -0.0），并报告每帧耗时。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_heatmap_nms
+"""
+import timeit
+
+import numpy as np
+
+from UpperMachine.pose_estimation.ov.utils import batched_heatmap_nms, heatmap_nms, pool2d
+
+
+def legacy_nms(heatmaps):
+    pooled_heatmaps = np.array(
+        [[pool2d(h, kernel_size=3, stride=1, padding=1, pool_mode="max") for h in heatmaps[0]]]
+    )
+    return heatmap_nms(heatmaps, pooled_heatmaps)
+
+
+def make_heatmaps(shape, rng, peaks=3, quantize=None):
+    _, channels, height, width = shape
+    ys, xs = np.mgrid[0:height, 0:width]
+    heatmaps = rng.normal(0, 0.01, shape).astype(np.float32)
+    for c in range(channels):
+        for _ in range(peaks):
+            y, x = rng.uniform(0, height), rng.uniform(0, width)
+            heatmaps[0, c] += rng.uniform(0.2, 1.0) * np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / 4.0)
+    if quantize:
+        heatmaps = np.round(heatmaps / quantize) * quantize
+    return heatmaps.astype(np.float32)
+
+
+def bitwise_equal(a, b):
+    return a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a.view(np.uint32), b.view(np.uint32))
+
+
+def main(number=500):
+    rng = np.random.default_rng(0)
+    cases = [
+        ('0001 (1,19,32,57)', (1, 19, 32, 57), None),
+        ('0001 量化 1/64', (1, 19, 32, 57), 1 / 64),
+        ('全负值', (1, 19, 32, 57), 'negative'),
+        ('2x 输入 (1,19,64,114)', (1, 19, 64, 114), None),
+    ]
+    for name, shape, quantize in cases:
+        for _ in range(5):
+            if quantize == 'negative':
+                heatmaps = -np.abs(make_heatmaps(shape, rng))
+            else:
+                heatmaps = make_heatmaps(shape, rng, quantize=quantize)
+            assert bitwise_equal(legacy_nms(heatmaps), batched_heatmap_nms(heatmaps)), name
+
+    print(f"{'heatmaps':>22} {'pool2d (ms)':>12} {'batched (ms)':>13} {'speedup':>8}")
+    for name, shape, _ in (cases[0], cases[3]):
+        heatmaps = make_heatmaps(shape, rng)
+        t_legacy = min(timeit.repeat(lambda: legacy_nms(heatmaps), number=number // 5, repeat=3)) / (number // 5) * 1000
+        t_batched = min(timeit.repeat(lambda: batched_heatmap_nms(heatmaps), number=number, repeat=3)) / number * 1000
+        print(f"{name:>22} {t_legacy:>12.3f} {t_batched:>13.3f} {t_legacy / t_batched:>7.1f}x")
+    print("结果与原实现逐位一致（含平台、负值与 -0.0）")
+
+
+if __name__ == '__main__':
+    main()
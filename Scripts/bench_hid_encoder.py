@@ -0,0 +1,123 @@
+"""
+HID 报文编码基准：原先逐字段拼接 bytes 的实现 vs HidPacketEncoder
+
+先用随机输入校验两者输出逐字节一致，再分别测量键盘/鼠标报文的单次编码耗时。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_hid_encoder
+"""
+import random
+import timeit
+
+from UpperMachine.pose_estimation.bytes2command import (
+    HidPacketEncoder, bytes2command, combine_mouse_actions, mouse2command
+)
+
+
+# ---- 原实现（去掉了 print），作为对照 ----
+def legacy_bytes2command(data_list):
+    data_list = [0x00] if len(data_list) == 0 else data_list
+    data_list = [0x00] * (8 - len(data_list)) + data_list
+    header = [0x57, 0xAB]
+    addr, cmd, data_length = 0x00, 0x02, len(data_list)
+    checksum = (sum(header) + addr + cmd + data_length + sum(data_list)) % 256
+    return bytes(header) + bytes([addr, cmd, data_length]) + bytes(data_list) + bytes([checksum])
+
+
+def legacy_mouse_packet(button_value, x_rel, y_rel, wheel):
+    data_packet = [0x01, button_value, x_rel & 0xFF, y_rel & 0xFF, wheel]
+    header = [0x57, 0xAB]
+    addr, cmd, data_length = 0x00, 0x05, 0x05
+    checksum = (sum(header) + addr + cmd + data_length + sum(data_packet)) % 256
+    return bytes(header) + bytes([addr, cmd, data_length]) + bytes(data_packet) + bytes([checksum])
+
+
+def legacy_combine_mouse_actions(mouse_actions, x_ext=0, y_ext=0, step_size=10):
+    button_value, x_rel, y_rel, wheel = 0x00, x_ext, y_ext, 0x00
+    for action in mouse_actions:
+        if action == -1:
+            button_value |= 0x01
+        elif action == -3:
+            button_value |= 0x02
+        elif action == -5:
+            button_value |= 0x04
+        elif action == -7:
+            wheel = 0x01
+        elif action == -8:
+            wheel = 0xFF
+        elif action == -9:
+            x_rel -= step_size
+        elif action == -10:
+            x_rel += step_size
+        elif action == -11:
+            button_value = 0x00
+    return legacy_mouse_packet(button_value, x_rel, y_rel, wheel)
+
+
+def legacy_mouse2command(action, x=0, y=0):
+    button_value, x_rel, y_rel, wheel = 0x00, 0, 0, 0x00
+    if action == -1:
+        button_value = 0x01
+    elif action == -3:
+        button_value = 0x02
+    elif action == -5:
+        button_value = 0x04
+    elif action == -7:
+        wheel = 0x01
+    elif action == -8:
+        wheel = 0xFF
+    elif action == -9:
+        x_rel = -10
+    elif action == -10:
+        x_rel = 10
+    elif action in (-2, -4, -6, -11):
+        pass
+    else:
+        x_rel = max(-127, min(127, x))
+        y_rel = max(-127, min(127, y))
+    return legacy_mouse_packet(button_value, x_rel, y_rel, wheel)
+
+
+def check_equivalence(rounds=20000, seed=0):
+    rng = random.Random(seed)
+    actions = [-1, -2, -3, -4, -5, -6, -7, -8, -9, -10, -11]
+    for _ in range(rounds):
+        keys = [rng.randrange(256) for _ in range(rng.randrange(0, 11))]
+        assert bytes2command(keys) == legacy_bytes2command(keys), keys
+        # 缓存命中后仍一致
+        assert bytes2command(list(keys)) == legacy_bytes2command(keys), keys
+
+        mouse_actions = [rng.choice(actions) for _ in range(rng.randrange(0, 5))]
+        x_ext, y_ext, step = rng.randint(-300, 300), rng.randint(-300, 300), rng.randint(1, 60)
+        assert combine_mouse_actions(mouse_actions, x_ext, y_ext, step) == \
+            legacy_combine_mouse_actions(mouse_actions, x_ext, y_ext, step), mouse_actions
+
+        action = rng.choice(actions + [0])
+        x, y = rng.randint(-300, 300), rng.randint(-300, 300)
+        assert mouse2command(action, x, y) == legacy_mouse2command(action, x, y), (action, x, y)
+    print(f"随机校验 {rounds} 组输入: 输出逐字节一致")
+
+
+def bench(stmt, number=200000):
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e9
+
+
+def main():
+    check_equivalence()
+
+    encoder = HidPacketEncoder()
+    keys = [0x04, 0x1A]
+    rows = [
+        ('keyboard', lambda: legacy_bytes2command(keys), lambda: encoder.keyboard(keys)),
+        ('mouse', lambda: legacy_combine_mouse_actions([-1, -9], step_size=30),
+         lambda: combine_mouse_actions([-1, -9], step_size=30)),
+        ('mouse raw', lambda: legacy_mouse_packet(1, -30, 0, 0), lambda: encoder.mouse(1, -30, 0, 0)),
+    ]
+    print(f"{'packet':>10} {'legacy (ns)':>12} {'encoder (ns)':>13} {'speedup':>8}")
+    for name, legacy, new in rows:
+        t_legacy, t_new = bench(legacy), bench(new)
+        print(f"{name:>10} {t_legacy:>12.0f} {t_new:>13.0f} {t_legacy / t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
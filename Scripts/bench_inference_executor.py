@@ -0,0 +1,166 @@
+"""
+推理执行器：相机线程与 REST 请求并发推理时的正确性，以及 REST 负载下实时帧的延迟
+
+1. 竞争：StatefulEstimator 与 rdkx5 一样在 preprocess 中把本帧的几何参数写在对象上、读回后随输入传递。
+   一个实时线程与三个 REST 线程同时推理，统计后处理拿到别的帧几何参数的次数：
+   直接调用 estimator.infer vs 经由 InferenceExecutor
+2. 延迟：实时线程按 30 FPS 逐帧推理（串行模式），同时 REST 线程不断提交 64 帧的批量检测，
+   报告实时帧延迟的百分位数与 REST 的吞吐量：
+   - 全局锁：直接调用估计器，实时帧与整批检测互斥（最直接的修复方式）
+   - 执行器 FIFO：实时帧与 REST 帧同一优先级
+   - 执行器：实时帧优先
+
+估计器为 Scripts.fake_pose_pipeline.FakeEstimator（按 1:6:1 sleep 模拟前处理 / 推理 / 解码）。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_inference_executor
+"""
+import threading
+import time
+
+import numpy as np
+
+from Scripts.fake_pose_pipeline import FakeEstimator
+from UpperMachine.pose_estimation.batch import pipelined_infer_batch
+from UpperMachine.pose_estimation.executor import InferenceExecutor, PRIORITY_LIVE, PRIORITY_REST
+
+
+class StatefulEstimator(FakeEstimator):
+    """前处理把几何参数（这里是帧的编号）写在对象上，后处理校验它属于同一帧"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tag = None
+        self.mismatches = 0
+
+    def preprocess(self, image):
+        self.tag = int(image[0, 0, 0])
+        pose = super().preprocess(image)
+        return pose, self.tag
+
+    def forward(self, inputs):
+        return super().forward(inputs[0])
+
+    def postprocess(self, image, inputs, outputs, is_draw=False):
+        if inputs[1] != int(image[0, 0, 0]):
+            self.mismatches += 1
+        return super().postprocess(image, inputs[0], outputs, is_draw)
+
+
+def make_images(count, start=0):
+    return [np.full((8, 8, 3), (start + i) % 256, dtype=np.uint8) for i in range(count)]
+
+
+def race(use_executor, frames=60):
+    estimator = StatefulEstimator(infer_time=0.008, draw=False)
+    executor = InferenceExecutor(estimator) if use_executor else None
+    if executor is not None:
+        executor.start()
+
+    def live():
+        for image in make_images(frames):
+            if executor is None:
+                estimator.infer(image)
+            else:
+                executor.infer(image, False, PRIORITY_LIVE).result()
+
+    def rest(offset):
+        for image in make_images(frames // 3, offset):
+            if executor is None:
+                estimator.infer(image)
+            else:
+                executor.submit(image).result()
+
+    threads = [threading.Thread(target=live)] + [threading.Thread(target=rest, args=(64 * (i + 1),))
+                                                 for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if executor is not None:
+        executor.stop()
+    return estimator.mismatches, frames * 2
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1000
+    return np.percentile(values, 50), np.percentile(values, 99), values.max()
+
+
+def latency(mode, num_requests, live_frames=90, batch_frames=64, fps=30):
+    """
+    Returns:
+        tuple: (实时帧延迟列表, REST 吞吐量 fps)
+    """
+    estimator = FakeEstimator(infer_time=0.02, draw=False, num_requests=num_requests)
+    executor = None
+    lock = threading.Lock()
+    if mode != 'lock':
+        executor = InferenceExecutor(estimator)
+        executor.start()
+    live_priority = PRIORITY_REST if mode == 'fifo' else PRIORITY_LIVE
+    stop = threading.Event()
+    rest_done = [0]
+
+    def rest():
+        images = make_images(batch_frames)
+        while not stop.is_set():
+            if executor is None:
+                with lock:
+                    pipelined_infer_batch(estimator, images)
+            else:
+                executor.submit_batch(images).result()
+            rest_done[0] += batch_frames
+
+    rest_thread = None
+    if mode != 'idle':
+        rest_thread = threading.Thread(target=rest)
+        rest_thread.start()
+        time.sleep(0.1)
+
+    samples = []
+    image = make_images(1)[0]
+    interval = 1.0 / fps
+    start = time.perf_counter()
+    next_at = start
+    for _ in range(live_frames):
+        frame_start = time.perf_counter()
+        if executor is None:
+            with lock:
+                estimator.infer(image)
+        else:
+            executor.infer(image, False, live_priority).result()
+        samples.append(time.perf_counter() - frame_start)
+        next_at += interval
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    if rest_thread is not None:
+        rest_thread.join()
+    if executor is not None:
+        executor.stop()
+    return samples, rest_done[0] / elapsed
+
+
+def main():
+    print("1. 一个实时线程 + 三个 REST 线程同时推理（有状态的前处理）")
+    for name, use_executor in (('直接调用 estimator', False), ('InferenceExecutor', True)):
+        mismatches, total = race(use_executor)
+        print(f"{name:>20}: {mismatches:>3} / {total} 帧用了别的帧的几何参数")
+    mismatches, _ = race(True)
+    assert mismatches == 0
+
+    print("\n2. 实时帧 30 FPS，REST 线程不断提交 64 帧批量检测（模拟推理 20 ms/帧）")
+    for num_requests in (1, 2):
+        print(f"\nnum_requests={num_requests}")
+        print(f"{'':>18} {'live p50 (ms)':>13} {'p99 (ms)':>9} {'max (ms)':>9} {'REST fps':>9}")
+        for name, mode in (('无 REST 负载', 'idle'), ('全局锁', 'lock'), ('执行器 FIFO', 'fifo'),
+                           ('执行器 实时优先', 'priority')):
+            samples, rest_fps = latency(mode, num_requests)
+            p50, p99, worst = percentiles(samples)
+            print(f"{name:>18} {p50:>13.1f} {p99:>9.1f} {worst:>9.1f} {rest_fps:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+状态→按键映射基准：原先的列表实现 vs 位掩码 + KeyMapper 查表
+
+使用 Source/ 下最新的姿势配置，对随机姿势组合校验两者得到的按键集合一致，
+并测量每帧“状态→按键→是否需要重发”这一段的耗时。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_key_mapper
+"""
+import random
+import timeit
+
+from UpperMachine.config_store import get_config_snapshot
+from UpperMachine.pose_estimation.state2bytes_vector import KeyMapper, state2mask, words2bytes
+
+
+def legacy_state2words(state, mapper_list):
+    words_list = []
+    for i in range(len(mapper_list)):
+        action_list = mapper_list[i]["action"]
+        keys_list = mapper_list[i]["keys"]
+        if all(item in state for item in action_list):
+            words_list += keys_list
+    return list(set(words_list))
+
+
+def legacy_step(state, last_state, last_kb, mapper_list):
+    keyboard_bytes, mouse_actions = words2bytes(legacy_state2words(state, mapper_list))
+    has_transient_mouse = any(a in [-7, -8, -9, -10] for a in mouse_actions)
+    if last_state == state and not has_transient_mouse:
+        return None
+    return sorted(keyboard_bytes) != sorted(last_kb)
+
+
+def mask_step(state, last_mask, last_kb_mask, mapper):
+    mask = state2mask(state)
+    report = mapper.lookup(mask)
+    if last_mask == mask and not report.has_transient_mouse:
+        return None
+    return report.keyboard_mask != last_kb_mask
+
+
+def main(rounds=20000, seed=0):
+    configs = get_config_snapshot().configs
+    configs = [pose for pose in configs if "keys" in pose]
+    mapper_list = [{"action": [pose["index"]], "keys": pose["keys"]} for pose in configs]
+    mapper = KeyMapper(configs)
+    indices = [pose["index"] for pose in configs]
+    print(f"配置: {get_config_snapshot().path}，{len(configs)} 个姿势")
+
+    rng = random.Random(seed)
+    states = [sorted(rng.sample(indices, rng.randint(0, 4))) for _ in range(rounds)]
+    for state in states:
+        legacy_keyboard, legacy_mouse = words2bytes(legacy_state2words(state, mapper_list))
+        report = mapper.lookup(state2mask(state))
+        assert sorted(report.keyboard_bytes) == sorted(legacy_keyboard), state
+        assert sorted(report.mouse_actions) == sorted(legacy_mouse), state
+    print(f"随机校验 {rounds} 个状态: 按键与鼠标动作一致")
+
+    # 典型情况：姿势保持不变
+    state = states[1]
+    last_kb = words2bytes(legacy_state2words(state, mapper_list))[0]
+    report = mapper.lookup(state2mask(state))
+    number = 100000
+    t_legacy = min(timeit.repeat(lambda: legacy_step(state, state, last_kb, mapper_list), number=number, repeat=3))
+    t_mask = min(timeit.repeat(lambda: mask_step(state, state2mask(state), report.keyboard_mask, mapper), number=number, repeat=3))
+    print(f"状态不变: legacy {t_legacy / number * 1e6:.2f} us, mask {t_mask / number * 1e6:.2f} us, "
+          f"{t_legacy / t_mask:.1f}x")
+
+    t_legacy = min(timeit.repeat(lambda: [legacy_step(s, None, [], mapper_list) for s in states[:1000]], number=20, repeat=3))
+    t_mask = min(timeit.repeat(lambda: [mask_step(s, None, 0, mapper) for s in states[:1000]], number=20, repeat=3))
+    print(f"状态变化: legacy {t_legacy / 20000 * 1e6:.2f} us, mask {t_mask / 20000 * 1e6:.2f} us, "
+          f"{t_legacy / t_mask:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
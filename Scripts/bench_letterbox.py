@@ -0,0 +1,39 @@
+"""
+rdkx5 BGR 前处理基准：原 preprocess_yuv420sp (letterbox + bgr2nv12) vs LetterboxPreprocessor
+
+校验两者输出的 NV12 逐字节一致，并报告 640x480 与 1920x1080 输入下的每帧耗时。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_letterbox
+"""
+import cv2
+import numpy as np
+
+from Scripts.bench_nv12_preprocess import legacy_preprocess, timeit
+from UpperMachine.pose_estimation.nv12 import LetterboxPreprocessor
+
+
+def main(input_w=640, input_h=640):
+    example = cv2.imread('Source/example.jpg')
+    preprocessor = LetterboxPreprocessor(input_w, input_h)
+
+    print(f"模型输入 {input_w}x{input_h}")
+    print(f"{'input':>10} {'legacy (ms)':>12} {'reuse (ms)':>11} {'speedup':>8}")
+    for width, height in ((640, 480), (1920, 1080)):
+        img = cv2.resize(example, (width, height))
+        for _ in range(3):
+            # 连续多帧（缓冲区轮换后）都需一致
+            expected, (scale, x_shift, y_shift) = legacy_preprocess(img, input_w, input_h)
+            actual = preprocessor(img)
+            assert np.array_equal(expected, actual), (width, height)
+            assert preprocessor.geometry()[0] == scale
+            assert preprocessor.geometry()[3:] == (x_shift, y_shift)
+
+        t_legacy = timeit(lambda: legacy_preprocess(img, input_w, input_h))
+        t_reuse = timeit(lambda: preprocessor(img))
+        print(f"{f'{width}x{height}':>10} {t_legacy:>12.2f} {t_reuse:>11.2f} {t_legacy / t_reuse:>7.1f}x")
+    print("输出与原实现逐字节一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+rdkx5 前处理基准：NV12→BGR→letterbox→NV12 (原路径) vs YUV 域直接 letterbox (capture_format: nv12)
+
+用 Source/example.jpg 合成一帧传感器分辨率的 NV12 图像，不需要 hobot 库。
+比较两条路径每帧的耗时，并检查两者的 letterbox 几何一致、画面差异在插值误差范围内。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_nv12_preprocess
+"""
+import time
+
+import cv2
+import numpy as np
+
+from UpperMachine.pose_estimation.nv12 import Nv12Frame, Nv12Letterbox, nv12_to_bgr
+
+
+def bgr_to_nv12(bgr):
+    h, w = bgr.shape[:2]
+    i420 = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420).reshape(-1)
+    area = h * w
+    nv12 = np.empty_like(i420)
+    nv12[:area] = i420[:area]
+    nv12[area:] = i420[area:].reshape(2, area // 4).T.reshape(-1)
+    return nv12
+
+
+# ---- 原路径：Rdkx5Imx219Camera.capture + preprocess_yuv420sp (letterbox) ----
+def legacy_capture(nv12, sensor_w, sensor_h, width, height):
+    img_bgr = cv2.cvtColor(nv12.reshape(sensor_h * 3 // 2, sensor_w), cv2.COLOR_YUV2BGR_NV12)
+    return cv2.resize(img_bgr, (width, height))
+
+
+def legacy_preprocess(img, input_w, input_h):
+    img_h, img_w = img.shape[0:2]
+    scale = min(1.0 * input_h / img_h, 1.0 * input_w / img_w)
+    resized_h, resized_w = int(img_h * scale), int(img_w * scale)
+    resized_img = cv2.resize(img, (resized_w, resized_h), interpolation=cv2.INTER_NEAREST)
+    y_shift = (input_h - resized_h) // 2
+    x_shift = (input_w - resized_w) // 2
+    canvas = np.full((input_h, input_w, 3), 114, dtype=np.uint8)
+    canvas[y_shift:y_shift + resized_h, x_shift:x_shift + resized_w, :] = resized_img
+
+    height, width = canvas.shape[0], canvas.shape[1]
+    area = height * width
+    yuv420p = cv2.cvtColor(canvas, cv2.COLOR_BGR2YUV_I420).reshape((area * 3 // 2,))
+    y = yuv420p[:area]
+    uv_planar = yuv420p[area:].reshape((2, area // 4))
+    uv_packed = uv_planar.transpose((1, 0)).reshape((area // 2,))
+    nv12 = np.zeros_like(yuv420p)
+    nv12[:height * width] = y
+    nv12[height * width:] = uv_packed
+    return nv12, (scale, x_shift, y_shift)
+
+
+def timeit(func, repeat=200):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(sensor_w=1920, sensor_h=1080, width=640, height=480, input_w=640, input_h=640):
+    bgr = cv2.resize(cv2.imread('Source/example.jpg'), (sensor_w, sensor_h))
+    sensor_nv12 = bgr_to_nv12(bgr)
+
+    letterbox = Nv12Letterbox(input_w, input_h)
+
+    def legacy():
+        return legacy_preprocess(legacy_capture(sensor_nv12, sensor_w, sensor_h, width, height), input_w, input_h)
+
+    def direct():
+        return letterbox(Nv12Frame(sensor_nv12, sensor_w, sensor_h, width, height))
+
+    legacy_tensor, (scale, x_shift, y_shift) = legacy()
+    direct_tensor = direct()
+    geometry = letterbox.geometry()
+    assert geometry[0] == scale and geometry[3] == x_shift and geometry[4] == y_shift, (geometry, scale, x_shift, y_shift)
+
+    diff = np.abs(nv12_to_bgr(legacy_tensor, input_w, input_h).astype(np.int16)
+                  - nv12_to_bgr(direct_tensor, input_w, input_h).astype(np.int16))
+    print(f"传感器 {sensor_w}x{sensor_h} -> 预览 {width}x{height} -> 模型 {input_w}x{input_h}")
+    print(f"letterbox: scale={scale:.3f}, x_shift={x_shift}, y_shift={y_shift}（两条路径一致）")
+    print(f"两条路径输出的 BGR 差异: mean={diff.mean():.2f}, p99={np.percentile(diff, 99):.0f}（插值方式不同导致）")
+
+    t_legacy = timeit(legacy)
+    t_direct = timeit(direct)
+    t_preview = timeit(lambda: Nv12Frame(sensor_nv12, sensor_w, sensor_h, width, height).to_bgr())
+    print(f"{'path':>28} {'ms/frame':>10}")
+    print(f"{'bgr (capture + preprocess)':>28} {t_legacy:>10.2f}")
+    print(f"{'nv12 letterbox':>28} {t_direct:>10.2f}")
+    print(f"{'nv12 + lazy preview to_bgr':>28} {t_direct + t_preview:>10.2f}")
+    print(f"加速: {t_legacy / t_direct:.1f}x（不需要预览帧时）")
+
+
+if __name__ == '__main__':
+    main()
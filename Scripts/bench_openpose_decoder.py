@@ -0,0 +1,319 @@
+"""
+OpenPoseDecoder：原实现 vs 批量计算肢体得分 + 索引表分组 vs max_people=1 单人快速路径
+
+human-pose-estimation-0001（输入 256x456）的输出为 heatmaps (1, 19, 32, 57) 与 PAFs (1, 38, 32, 57)。
+没有模型时用 Source/RawInfo 中录制的关键点合成网络输出：每个关节一个高斯峰，
+每条肢体在 PAF 对应通道中沿线段写入单位向量；场景包括单人、多人并排、叠加噪声与虚假峰值。
+也可以用 --npz 传入实际采集的输出（键 heatmaps / pafs）。
+
+- 多人路径的结果（poses、scores）必须与原实现逐位一致
+- 单人快速路径与多人路径中得分最高的一人比较关键点
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_openpose_decoder [--npz outputs.npz]
+"""
+import argparse
+import glob
+import json
+import timeit
+
+import numpy as np
+
+from UpperMachine.pose_estimation.ov.decoder import OpenPoseDecoder
+from UpperMachine.pose_estimation.ov.utils import batched_heatmap_nms
+
+HEATMAP_SHAPE = (32, 57)
+FRAME_SIZE = (640, 480)
+# OpenPose 18 点中各关节对应的 COCO 关节，颈部（1）取两肩中点
+OPENPOSE_FROM_COCO = (0, -1, 6, 8, 10, 5, 7, 9, 12, 14, 16, 11, 13, 15, 2, 1, 4, 3)
+
+
+class LegacyOpenPoseDecoder(OpenPoseDecoder):
+    """原实现的取点、分组与格式转换（逐个关节 / 肢体计算、逐项扫描 pose_entries），作为对照"""
+
+    def extract_points(self, heatmaps, nms_heatmaps):
+        batch_size, channels_num, h, w = heatmaps.shape
+        xs, ys, scores = self.top_k(nms_heatmaps)
+        masks = scores > self.score_threshold
+        all_keypoints = []
+        keypoint_id = 0
+        for k in range(self.num_joints):
+            mask = masks[0, k]
+            x = xs[0, k][mask].ravel()
+            y = ys[0, k][mask].ravel()
+            score = scores[0, k][mask].ravel()
+            n = len(x)
+            if n == 0:
+                all_keypoints.append(np.empty((0, 4), dtype=np.float32))
+                continue
+            x, y = self.refine(heatmaps[0, k], x, y)
+            np.clip(x, 0, w - 1, out=x)
+            np.clip(y, 0, h - 1, out=y)
+            keypoints = np.empty((n, 4), dtype=np.float32)
+            keypoints[:, 0] = x
+            keypoints[:, 1] = y
+            keypoints[:, 2] = score
+            keypoints[:, 3] = np.arange(keypoint_id, keypoint_id + n)
+            keypoint_id += n
+            all_keypoints.append(keypoints)
+        return all_keypoints
+
+    def top_k(self, heatmaps):
+        N, K, _, W = heatmaps.shape
+        heatmaps = heatmaps.reshape(N, K, -1)
+        ind = heatmaps.argpartition(-self.max_points, axis=2)[:, :, -self.max_points:]
+        scores = np.take_along_axis(heatmaps, ind, axis=2)
+        subind = np.argsort(-scores, axis=2)
+        ind = np.take_along_axis(ind, subind, axis=2)
+        scores = np.take_along_axis(scores, subind, axis=2)
+        y, x = np.divmod(ind, W)
+        return x, y, scores
+
+    def update_poses(self, kpt_a_id, kpt_b_id, all_keypoints, connections, pose_entries, pose_entry_size):
+        for connection in connections:
+            pose_a_idx = -1
+            pose_b_idx = -1
+            for j, pose in enumerate(pose_entries):
+                if pose[kpt_a_id] == connection[0]:
+                    pose_a_idx = j
+                if pose[kpt_b_id] == connection[1]:
+                    pose_b_idx = j
+            if pose_a_idx < 0 and pose_b_idx < 0:
+                pose_entry = np.full(pose_entry_size, -1, dtype=np.float32)
+                pose_entry[kpt_a_id] = connection[0]
+                pose_entry[kpt_b_id] = connection[1]
+                pose_entry[-1] = 2
+                pose_entry[-2] = np.sum(all_keypoints[connection[0:2], 2]) + connection[2]
+                pose_entries.append(pose_entry)
+            elif pose_a_idx >= 0 and pose_b_idx >= 0 and pose_a_idx != pose_b_idx:
+                pose_a = pose_entries[pose_a_idx]
+                pose_b = pose_entries[pose_b_idx]
+                if self.is_disjoint(pose_a, pose_b):
+                    pose_a += pose_b
+                    pose_a[:-2] += 1
+                    pose_a[-2] += connection[2]
+                    del pose_entries[pose_b_idx]
+            elif pose_a_idx >= 0 and pose_b_idx >= 0:
+                pose_entries[pose_a_idx][-2] += connection[2]
+            elif pose_a_idx >= 0:
+                pose = pose_entries[pose_a_idx]
+                if pose[kpt_b_id] < 0:
+                    pose[-2] += all_keypoints[connection[1], 2]
+                pose[kpt_b_id] = connection[1]
+                pose[-2] += connection[2]
+                pose[-1] += 1
+            elif pose_b_idx >= 0:
+                pose = pose_entries[pose_b_idx]
+                if pose[kpt_a_id] < 0:
+                    pose[-2] += all_keypoints[connection[0], 2]
+                pose[kpt_a_id] = connection[0]
+                pose[-2] += connection[2]
+                pose[-1] += 1
+        return pose_entries
+
+    @staticmethod
+    def connections_nms(a_idx, b_idx, affinity_scores):
+        order = affinity_scores.argsort()[::-1]
+        affinity_scores = affinity_scores[order]
+        a_idx = a_idx[order]
+        b_idx = b_idx[order]
+        idx = []
+        has_kpt_a = set()
+        has_kpt_b = set()
+        for t, (i, j) in enumerate(zip(a_idx, b_idx)):
+            if i not in has_kpt_a and j not in has_kpt_b:
+                idx.append(t)
+                has_kpt_a.add(i)
+                has_kpt_b.add(j)
+        idx = np.asarray(idx, dtype=np.int32)
+        return a_idx[idx], b_idx[idx], affinity_scores[idx]
+
+    def group_keypoints(self, all_keypoints_by_type, pafs, pose_entry_size=20):
+        all_keypoints = np.concatenate(all_keypoints_by_type, axis=0)
+        pose_entries = []
+        for part_id, paf_channel in enumerate(self.paf_indices):
+            kpt_a_id, kpt_b_id = self.skeleton[part_id]
+            kpts_a = all_keypoints_by_type[kpt_a_id]
+            kpts_b = all_keypoints_by_type[kpt_b_id]
+            n = len(kpts_a)
+            m = len(kpts_b)
+            if n == 0 or m == 0:
+                continue
+            a = kpts_a[:, :2]
+            a = np.broadcast_to(a[None], (m, n, 2))
+            b = kpts_b[:, :2]
+            vec_raw = (b[:, None, :] - a).reshape(-1, 1, 2)
+            steps = (1 / (self.points_per_limb - 1) * vec_raw)
+            points = steps * self.grid + a.reshape(-1, 1, 2)
+            points = points.round().astype(dtype=np.int32)
+            x = points[..., 0].ravel()
+            y = points[..., 1].ravel()
+            part_pafs = pafs[0, :, :, paf_channel:paf_channel + 2]
+            field = part_pafs[y, x].reshape(-1, self.points_per_limb, 2)
+            vec_norm = np.linalg.norm(vec_raw, ord=2, axis=-1, keepdims=True)
+            vec = vec_raw / (vec_norm + 1e-6)
+            affinity_scores = (field * vec).sum(-1).reshape(-1, self.points_per_limb)
+            valid_affinity_scores = affinity_scores > self.min_paf_alignment_score
+            valid_num = valid_affinity_scores.sum(1)
+            affinity_scores = (affinity_scores * valid_affinity_scores).sum(1) / (valid_num + 1e-6)
+            success_ratio = valid_num / self.points_per_limb
+            valid_limbs = np.where(np.logical_and(affinity_scores > 0, success_ratio > 0.8))[0]
+            if len(valid_limbs) == 0:
+                continue
+            b_idx, a_idx = np.divmod(valid_limbs, n)
+            affinity_scores = affinity_scores[valid_limbs]
+            a_idx, b_idx, affinity_scores = self.connections_nms(a_idx, b_idx, affinity_scores)
+            connections = list(zip(kpts_a[a_idx, 3].astype(np.int32),
+                                   kpts_b[b_idx, 3].astype(np.int32),
+                                   affinity_scores))
+            if len(connections) == 0:
+                continue
+            pose_entries = self.update_poses(kpt_a_id, kpt_b_id, all_keypoints,
+                                             connections, pose_entries, pose_entry_size)
+        pose_entries = np.asarray(pose_entries, dtype=np.float32).reshape(-1, pose_entry_size)
+        pose_entries = pose_entries[pose_entries[:, -1] >= 3]
+        return pose_entries, all_keypoints
+
+    @staticmethod
+    def convert_to_coco_format(pose_entries, all_keypoints):
+        num_joints = 17
+        coco_keypoints = []
+        scores = []
+        for pose in pose_entries:
+            if len(pose) == 0:
+                continue
+            keypoints = np.zeros(num_joints * 3)
+            reorder_map = [0, -1, 6, 8, 10, 5, 7, 9, 12, 14, 16, 11, 13, 15, 2, 1, 4, 3]
+            person_score = pose[-2]
+            for keypoint_id, target_id in zip(pose[:-2], reorder_map):
+                if target_id < 0:
+                    continue
+                cx, cy, score = 0, 0, 0
+                if keypoint_id != -1:
+                    cx, cy, score = all_keypoints[int(keypoint_id), 0:3]
+                keypoints[target_id * 3 + 0] = cx
+                keypoints[target_id * 3 + 1] = cy
+                keypoints[target_id * 3 + 2] = score
+            coco_keypoints.append(keypoints)
+            scores.append(person_score * max(0, (pose[-1] - 1)))
+        return np.asarray(coco_keypoints), np.asarray(scores)
+
+
+def load_people():
+    """Source/RawInfo 中录制的每一人的关键点，转换为热力图坐标下的 OpenPose 18 点 (18, 2)"""
+    people = []
+    scale = np.array([HEATMAP_SHAPE[1] / FRAME_SIZE[0], HEATMAP_SHAPE[0] / FRAME_SIZE[1]])
+    for path in sorted(glob.glob('Source/RawInfo/*.json')):
+        with open(path, encoding='utf-8') as f:
+            for coco in json.load(f).get('model_raw_results', []):
+                coco = np.asarray(coco, dtype=np.float64)[:, :2] * scale
+                points = np.array([coco[j] if j >= 0 else (coco[5] + coco[6]) / 2 for j in OPENPOSE_FROM_COCO])
+                people.append(points)
+    return people
+
+
+def render(people, rng, noise=0.0, spurious=0):
+    """把若干人的 OpenPose 18 点画成网络输出 (heatmaps, pafs)"""
+    height, width = HEATMAP_SHAPE
+    ys, xs = np.mgrid[0:height, 0:width]
+    heatmaps = np.zeros((1, 19, height, width), dtype=np.float32)
+    pafs = np.zeros((1, 38, height, width), dtype=np.float32)
+    for points in people:
+        for j, (x, y) in enumerate(points):
+            peak = rng.uniform(0.5, 0.95) * np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / 2.0)
+            heatmaps[0, j] = np.maximum(heatmaps[0, j], peak)
+        for (a, b), c in zip(OpenPoseDecoder.BODY_PARTS_KPT_IDS, OpenPoseDecoder.BODY_PARTS_PAF_IDS):
+            vec = points[b] - points[a]
+            length = np.linalg.norm(vec)
+            if length < 1e-3:
+                continue
+            unit = vec / length
+            # 到线段的距离不超过 1 的格点
+            t = ((xs - points[a][0]) * unit[0] + (ys - points[a][1]) * unit[1])
+            d = np.abs((xs - points[a][0]) * unit[1] - (ys - points[a][1]) * unit[0])
+            mask = (t >= -1) & (t <= length + 1) & (d <= 1)
+            pafs[0, c][mask] = unit[0]
+            pafs[0, c + 1][mask] = unit[1]
+    for _ in range(spurious):
+        j = rng.integers(0, 18)
+        x, y = rng.uniform(0, width), rng.uniform(0, height)
+        heatmaps[0, j] += rng.uniform(0.15, 0.4) * np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / 2.0)
+    if noise:
+        heatmaps += rng.normal(0, noise, heatmaps.shape).astype(np.float32)
+        pafs += rng.normal(0, noise, pafs.shape).astype(np.float32)
+    heatmaps[0, 18] = 1.0 - heatmaps[0, :18].max(axis=0)
+    return heatmaps, pafs
+
+
+def place(points, index, count):
+    """把一个人缩小后放到画面中 count 等分的第 index 格"""
+    width = HEATMAP_SHAPE[1]
+    center = points.mean(axis=0)
+    scaled = (points - center) * (1.0 if count == 1 else 0.8) + center
+    scaled[:, 0] += (index + 0.5) * width / count - center[0]
+    return scaled
+
+
+def make_scenes(people, rng, count=30):
+    scenes = []
+    for i in range(count):
+        num = (1, 1, 2, 3)[i % 4]
+        chosen = [people[k] for k in rng.choice(len(people), num)]
+        placed = [place(points, k, num) for k, points in enumerate(chosen)]
+        noise = (0.0, 0.02, 0.05)[i % 3]
+        scenes.append((num, noise, render(placed, rng, noise=noise, spurious=i % 5)))
+    return scenes
+
+
+def decode(decoder, heatmaps, pafs):
+    return decoder(heatmaps, batched_heatmap_nms(heatmaps), pafs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--npz', help='实际采集的网络输出（键 heatmaps / pafs）')
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scenes = make_scenes(load_people(), rng)
+    if args.npz:
+        data = np.load(args.npz)
+        scenes.append((None, None, (data['heatmaps'].astype(np.float32), data['pafs'].astype(np.float32))))
+
+    legacy = LegacyOpenPoseDecoder()
+    batched = OpenPoseDecoder()
+    single = OpenPoseDecoder(max_people=1)
+
+    matched = total = 0
+    for num, _, (heatmaps, pafs) in scenes:
+        ref_poses, ref_scores = decode(legacy, heatmaps, pafs)
+        poses, scores = decode(batched, heatmaps, pafs)
+        assert poses.dtype == ref_poses.dtype and scores.dtype == ref_scores.dtype
+        assert np.array_equal(poses, ref_poses) and np.array_equal(scores, ref_scores), "多人路径结果与原实现不一致"
+        if num == 1 and len(ref_poses):
+            fast_poses, _ = decode(single, heatmaps, pafs)
+            best = ref_poses[np.argmax(ref_scores)]
+            # 只比较可信的关节：得分低的多为噪声点，被多人路径连进了骨架，单人路径不一定取到同一个
+            confident = best[:, 2] >= 0.3
+            total += confident.sum()
+            if len(fast_poses):
+                matched += (np.abs(fast_poses[0, confident, :2] - best[confident, :2]).max(axis=1) < 1e-3).sum()
+    detected = sum(len(decode(legacy, *scene)[0]) for _, _, scene in scenes)
+    print(f"{len(scenes)} 个场景（共检测到 {detected} 人），多人路径 poses / scores 与原实现逐位一致")
+    print(f"单人快速路径 vs 多人路径得分最高者：得分 >= 0.3 的关节 {matched}/{total} 个位置相同")
+
+    print(f"\n{'scene':>10} {'legacy (ms)':>12} {'batched (ms)':>13} {'max_people=1 (ms)':>18}")
+    for label, num, noise in (('1 人', 1, 0.0), ('2 人', 2, 0.0), ('3 人', 3, 0.0), ('2 人 + 噪声', 2, 0.05)):
+        # 噪声 0.05 时每个关节有数十个超过阈值的候选点，多人路径的耗时主要在候选肢体的 PAF 得分
+        heatmaps, pafs = next(scene for n, sigma, scene in scenes if n == num and sigma == noise)
+        nms = batched_heatmap_nms(heatmaps)
+        times = []
+        for decoder in (legacy, batched, single):
+            t = min(timeit.repeat(lambda: decoder(heatmaps, nms, pafs), number=args.number, repeat=3))
+            times.append(t / args.number * 1000)
+        print(f"{label:>10} {times[0]:>12.3f} {times[1]:>13.3f} {times[2]:>18.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+ov 后端的编译缓存：冷启动 vs 热启动，以及每帧输出缩放的计算
+
+1. 启动时间：每种情况在单独的子进程中计时 导入 openvino + create_model()（读取并编译模型）+ 第一帧推理
+   - 不缓存：cache_dir=None（原方式，每次启动都编译）
+   - 冷启动：空的缓存目录，编译并写入缓存
+   - 热启动：同一缓存目录，直接导入编译结果
+2. 每帧解码时的输出缩放：原实现每帧读取 compiled_model.output(0).partial_shape vs get_output_scale()
+
+需要 openvino 与模型文件（python Scripts/download_model.py），默认使用 flask_config.yml 中 ov 的配置。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_ov_model_cache [--model-path xxx.xml] [--device CPU]
+"""
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import yaml
+
+
+def start_once(result_queue, model_path, device, performance_hint, cache_dir):
+    start = time.perf_counter()
+    try:
+        from UpperMachine.pose_estimation.ov.utils import create_model, model_infer
+        model_infor = create_model(model_path, device, performance_hint, 1, cache_dir)
+        loaded = time.perf_counter()
+        model_infer(np.zeros((1, 3, model_infor["height"], model_infor["width"]), dtype=np.uint8), model_infor)
+    except Exception as e:
+        result_queue.put(e)
+        return
+    result_queue.put((loaded - start, time.perf_counter() - start))
+
+
+def measure_start(model_path, device, performance_hint, cache_dir):
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    process = ctx.Process(target=start_once, args=(result_queue, model_path, device, performance_hint, cache_dir))
+    process.start()
+    result = result_queue.get(timeout=600)
+    process.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def legacy_output_scale(img, compiled_model):
+    # 原 process_results 中每帧执行的计算
+    output_shape = list(compiled_model.output(index=0).partial_shape)
+    return img.shape[1] / output_shape[3].get_length(), img.shape[0] / output_shape[2].get_length()
+
+
+def main():
+    with open('Source/flask_config.yml', 'r') as f:
+        ov_config = yaml.safe_load(f)['models']['ov']
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-path', default=ov_config['model_path'])
+    parser.add_argument('--device', default=ov_config['device'])
+    parser.add_argument('--performance-hint', default=ov_config.get('performance_hint'))
+    args = parser.parse_args()
+    if importlib.util.find_spec('openvino') is None:
+        print("未安装 openvino（pip install openvino）")
+        return
+    if not os.path.exists(args.model_path):
+        print(f"模型文件不存在: {args.model_path}（python Scripts/download_model.py）")
+        return
+
+    print(f"模型: {args.model_path}（{args.device}，PERFORMANCE_HINT={args.performance_hint}）")
+    print(f"{'':>10} {'create_model (s)':>17} {'first frame (s)':>16}")
+    cache_root = tempfile.mkdtemp(prefix='ov_cache_')
+    try:
+        for name, cache_dir in (('不缓存', None), ('冷启动', cache_root), ('热启动', cache_root)):
+            loaded, first_frame = measure_start(args.model_path, args.device, args.performance_hint, cache_dir)
+            print(f"{name:>10} {loaded:>17.2f} {first_frame:>16.2f}")
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+    from UpperMachine.pose_estimation.ov.utils import create_model, get_output_scale
+    model_infor = create_model(args.model_path, args.device, args.performance_hint, 1, None)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert get_output_scale(frame, model_infor) == legacy_output_scale(frame, model_infor["compiled_model"])
+    number = 100000
+    legacy = timeit.timeit(lambda: legacy_output_scale(frame, model_infor["compiled_model"]), number=number)
+    cached = timeit.timeit(lambda: get_output_scale(frame, model_infor), number=number)
+    print(f"\n每帧输出缩放: partial_shape {legacy / number * 1e6:.2f} us vs 缓存 {cached / number * 1e6:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+骨架绘制位置对比：服务端在推理线程中绘制 (overlay: server) vs 发送关键点由前端绘制 (overlay: client)
+
+用录制姿势中的关键点，在 640x480 画面上测量每帧推理线程中与绘制相关的耗时：
+- ov/fastdeploy 的 draw_poses（np.copy + 画点/文字/连线 + addWeighted 混合）
+- rdkx5 的 draw_results（整幅画面 copy + 画点/文字）
+- client：keypoints_payload 生成归一化关键点，以及其 JSON 大小
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_overlay
+"""
+import json
+import timeit
+
+import cv2
+
+from Scripts.fake_pose_pipeline import FakeEstimator
+from UpperMachine.flask.preview import keypoints_payload
+from UpperMachine.pose_estimation.fastdeploy.utils import draw_poses
+
+
+def rdkx5_draw_results(image, poses, kpt_conf_thres=0.5):
+    # 与 rdkx5 Estimator.draw_results 相同的绘制（不依赖 hobot 库）
+    img = image.copy()
+    for pose in poses:
+        xs, ys = pose[:, 0], pose[:, 1]
+        x1, y1, x2, y2 = int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(img, "Person: 0.90", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        for j in range(17):
+            x, y, conf = pose[j]
+            if conf > kpt_conf_thres:
+                cv2.circle(img, (int(x), int(y)), 5, (0, 0, 255), -1)
+                cv2.putText(img, str(j), (int(x), int(y)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
+    return img
+
+
+def bench(func, number=500):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main(width=640, height=480):
+    frame = cv2.resize(cv2.imread('Source/example.jpg'), (width, height))
+    poses = FakeEstimator(infer_time=0).poses[0][None]
+
+    t_ov = bench(lambda: draw_poses(frame.copy(), poses, point_score_threshold=0.1))
+    t_copy = bench(lambda: frame.copy())
+    t_rdk = bench(lambda: rdkx5_draw_results(frame, poses))
+    t_client = bench(lambda: keypoints_payload(poses, frame.shape))
+    payload = json.dumps({'keypoints': keypoints_payload(poses, frame.shape), 'frame_size': [width, height]})
+
+    print(f"画面 {width}x{height}，1 人")
+    print(f"{'overlay':>28} {'ms/frame':>9}")
+    print(f"{'server: ov/fastdeploy draw':>28} {t_ov - t_copy:>9.3f}")
+    print(f"{'server: rdkx5 draw_results':>28} {t_rdk:>9.3f}")
+    print(f"{'client: keypoints_payload':>28} {t_client:>9.3f}")
+    print(f"client 模式每帧额外发送的关键点 JSON: {len(payload)} 字节")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+串行 / 异步捕获 / 流水线三种处理模式的吞吐与延迟对比
+
+用模拟相机与按 1:6:1 sleep 的模拟估计器（前处理 / 推理 / 解码）跑完整的检测流程，命令发往 FakeHidBridge：
+- serial：同一线程中依次采集、前处理、推理、解码、匹配、发送
+- async：独立线程采集（FrameRing），其余同 serial
+- pipeline：采集、前处理、推理各占一个线程，调用方线程只做解码、匹配与提交命令
+- pipeline xN：同上，推理线程最多同时提交 N 帧（forward_async，模拟 AsyncInferQueue / BPU 线程池）
+
+sleep 不占用 GIL，对应推理在 BPU / OpenVINO 中执行的情形。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_pipeline
+"""
+import time
+
+from Scripts.fake_hid_bridge import FakeHidBridge
+from Scripts.fake_pose_pipeline import FakeCamera, FakeEstimator, create_fake_service
+from UpperMachine.metrics import pipeline_metrics
+
+MODES = {
+    'serial': ({'use_async': False, 'pipeline_enabled': False}, 1),
+    'async': ({'use_async': True, 'pipeline_enabled': False}, 1),
+    'pipeline': ({'use_async': False, 'pipeline_enabled': True}, 1),
+    'pipeline x2': ({'use_async': False, 'pipeline_enabled': True}, 2),
+    'pipeline x3': ({'use_async': False, 'pipeline_enabled': True}, 3),
+}
+
+
+def run(mode, infer_time, capture_time, frames):
+    overrides, num_requests = MODES[mode]
+    bridge = FakeHidBridge().start()
+    service = create_fake_service(bridge, camera=FakeCamera(640, 480, capture_time=capture_time),
+                                  estimator=FakeEstimator(infer_time=infer_time, num_requests=num_requests),
+                                  fps_limit=100, **overrides)
+    service.start()
+    # 预热，使相机线程与流水线进入稳态
+    for _ in range(10):
+        service.capture_and_process()
+    pipeline_metrics.reset()
+
+    seqs = []
+    start = time.perf_counter()
+    done = 0
+    while done < frames:
+        processed_frame, _, _, _ = service.capture_and_process()
+        if processed_frame is None:
+            continue
+        done += 1
+        if service._borrowed_slot is not None:
+            seqs.append(service._borrowed_slot.seq)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.05)  # 等发送线程发完最后的命令
+
+    stats = service.get_stats()
+    service.stop()
+    service.close()
+    bridge.stop()
+
+    assert all(b > a for a, b in zip(seqs, seqs[1:])), "处理的帧序号不是严格递增"
+    summary = pipeline_metrics.summary()
+    g2h = summary.get('glass_to_hid', {'p50_ms': float('nan'), 'p95_ms': float('nan')})
+    age = summary.get('frame_age', {}).get('p50_ms', 0.0)
+    dropped = stats.get('frame_ring', {}).get('dropped', 0)
+    print(f"{mode:>11} {frames / elapsed:>7.1f} {summary['total']['p50_ms']:>10.2f} {g2h['p50_ms']:>10.2f} "
+          f"{g2h['p95_ms']:>10.2f} {age:>9.2f} {dropped:>8}")
+
+
+def main(frames=200):
+    for infer_time, capture_time in ((0.02, 0.005), (0.04, 0.005)):
+        print(f"\n模拟推理 {infer_time * 1000:.0f} ms/帧（前处理/推理/解码 1:6:1），相机采集 {capture_time * 1000:.0f} ms，"
+              f"{frames} 帧")
+        print(f"{'mode':>11} {'fps':>7} {'total p50':>10} {'g2h p50':>10} {'g2h p95':>10} {'age p50':>9} {'dropped':>8}")
+        for mode in MODES:
+            run(mode, infer_time, capture_time, frames)
+
+
+if __name__ == '__main__':
+    main()
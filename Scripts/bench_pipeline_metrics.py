@@ -0,0 +1,102 @@
+"""
+检测流程耗时统计：用模拟相机/估计器跑完整流程，输出 /api/metrics 的内容并测量统计本身的开销
+
+- 串行模式下逐帧 capture_and_process，并像 camera_thread 一样编码 JPEG，命令发往本地 FakeHidBridge
+- 检查各阶段（metrics.STAGES 与 total）与 glass_to_hid 都有数据
+- 比较 metrics_enabled 开/关时单次 record() 与每帧 process_frame 的耗时
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_pipeline_metrics
+"""
+import json
+import time
+import timeit
+
+import cv2
+import numpy as np
+
+from Scripts.fake_hid_bridge import FakeHidBridge
+from Scripts.fake_pose_pipeline import FakeCamera, FakeEstimator, create_fake_service
+from UpperMachine.metrics import STAGES as PIPELINE_STAGES, PipelineMetrics, pipeline_metrics
+
+STAGES = PIPELINE_STAGES + ('total',)
+
+
+def run_frames(service, frames):
+    for _ in range(frames):
+        processed_frame, _, _, _ = service.capture_and_process()
+        # 与 routes.camera_thread 相同的编码步骤
+        encode_start = time.perf_counter()
+        ret, buffer = cv2.imencode('.jpg', cv2.flip(processed_frame, 1), [cv2.IMWRITE_JPEG_QUALITY, 70])
+        service.timings.record('encode', time.perf_counter() - encode_start)
+    service.dispatcher.flush(timeout=2.0)
+
+
+def print_metrics(metrics):
+    print(f"{'stage':>12} {'count':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    rows = dict(metrics['stages'], glass_to_hid=metrics['glass_to_hid'])
+    for stage, s in rows.items():
+        print(f"{stage:>12} {s['count']:>6} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}")
+
+
+def measure_record_overhead(number=200000):
+    enabled, disabled = PipelineMetrics(True), PipelineMetrics(False)
+    t_on = min(timeit.repeat(lambda: enabled.record('inference', 0.0123), number=number, repeat=3))
+    t_off = min(timeit.repeat(lambda: disabled.record('inference', 0.0123), number=number, repeat=3))
+    return t_on / number * 1e9, t_off / number * 1e9
+
+
+def measure_frame_overhead(bridge, frames=300):
+    # 估计器不 sleep、不绘制，只剩流程本身的开销
+    results = {}
+    for enabled in (False, True, False, True):
+        service = create_fake_service(bridge, estimator=FakeEstimator(infer_time=0, draw=False),
+                                      camera=FakeCamera(), metrics_enabled=enabled)
+        frame = service.camera.capture()
+        durations = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            service.process_frame(frame)
+            durations.append(time.perf_counter() - start)
+        service.dispatcher.flush(timeout=2.0)
+        service.close()
+        results.setdefault(enabled, []).append(np.median(durations) * 1e6)
+    pipeline_metrics.enabled = True
+    return min(results[True]), min(results[False])
+
+
+def main(frames=200, infer_time=0.02):
+    bridge = FakeHidBridge().start()
+
+    service = create_fake_service(bridge, estimator=FakeEstimator(infer_time=infer_time),
+                                  camera=FakeCamera(capture_time=0.005))
+    service.timings.reset()
+    run_frames(service, frames)
+    metrics = service.get_metrics()
+    service.close()
+
+    print(f"模拟采集 5 ms + 推理 {infer_time * 1000:.0f} ms/帧，共 {frames} 帧，下位机收到 {bridge.stats['frames']} 帧")
+    print_metrics(metrics)
+    for stage in STAGES:
+        assert metrics['stages'].get(stage, {}).get('count', 0) > 0, stage
+    glass = metrics['glass_to_hid']
+    assert glass['count'] > 0
+    assert glass['p50_ms'] >= infer_time * 1000, glass
+    print("各阶段与 glass_to_hid 均有数据")
+
+    prometheus = service.timings.to_prometheus()
+    print("\nPrometheus 格式（节选）:")
+    print("\n".join(line for line in prometheus.splitlines() if 'glass_to_hid' in line or line.startswith('#')))
+
+    print("\nJSON 格式（glass_to_hid）:")
+    print(json.dumps(metrics['glass_to_hid']))
+
+    t_on, t_off = measure_record_overhead()
+    print(f"\nrecord(): 开启 {t_on:.0f} ns，关闭 {t_off:.0f} ns")
+    f_on, f_off = measure_frame_overhead(bridge)
+    print(f"process_frame (估计器耗时为 0): 开启 {f_on:.1f} us，关闭 {f_off:.1f} us")
+    bridge.stop()
+
+
+if __name__ == '__main__':
+    main()
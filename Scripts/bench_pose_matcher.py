@@ -0,0 +1,101 @@
+"""
+姿势模板匹配微基准：逐模板 Python 循环 vs 预编译的 PoseMatcher
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_pose_matcher
+"""
+import json
+import random
+import time
+
+import numpy as np
+
+from UpperMachine.utils import get_latest_config_path
+from UpperMachine.pose_estimation.posedict2state_vector import calculate_cosine_similarity
+from UpperMachine.pose_estimation.pose_matcher import PoseMatcher, fov_scale_x
+
+
+def match_loop(keypoints, config_list, current_camera="72camera"):
+    """原 posedict2state 中的逐模板循环（仅模板匹配部分）"""
+    states = []
+    for pose_template in config_list:
+        if pose_template.get("inner_flag", False):
+            continue
+        if not pose_template.get("enable", True):
+            continue
+        base_coordinates = keypoints[pose_template["basekeypoints"]]
+        scale_x = fov_scale_x(current_camera, pose_template.get("camera_type", "72camera"))
+        v_template = []
+        v_keypoints = []
+        for key in pose_template["list_corekeypoints"]:
+            v_template.extend(pose_template["value_dict"][key])
+            core_coordinates = keypoints[key] - base_coordinates
+            if scale_x != 1.0:
+                core_coordinates[0] *= scale_x
+            v_keypoints.extend(core_coordinates.tolist())
+        similarity = calculate_cosine_similarity(v_template, v_keypoints)
+        if similarity >= pose_template.get("similarity_threshold", 0.95):
+            states.append({'index': pose_template["index"], 'name': pose_template["name"]})
+    return states
+
+
+def make_templates(base_configs, count, rng):
+    """以现有配置为种子，随机扰动生成指定数量的模板"""
+    seeds = [p for p in base_configs if not p.get("inner_flag", False)]
+    templates = []
+    for i in range(count):
+        seed = seeds[i % len(seeds)]
+        template = dict(seed)
+        template["index"] = 100 + i
+        template["name"] = f"{seed['name']}_{i}"
+        template["value_dict"] = {k: [v[0] + rng.uniform(-5, 5), v[1] + rng.uniform(-5, 5)]
+                                  for k, v in seed["value_dict"].items()}
+        template["similarity_threshold"] = rng.uniform(0.85, 0.99)
+        template["camera_type"] = rng.choice(["72camera", "120width_camera"])
+        templates.append(template)
+    return templates
+
+
+def make_frames(base_configs, count, rng):
+    """以录制时的原始关键点为种子，生成若干帧关键点字典"""
+    seeds = [p["raw_value_dict"] for p in base_configs if "raw_value_dict" in p]
+    frames = []
+    for i in range(count):
+        seed = seeds[i % len(seeds)]
+        frames.append({k: np.array([v[0] + rng.uniform(-8, 8), v[1] + rng.uniform(-8, 8)], dtype=np.float32)
+                       for k, v in seed.items()})
+    return frames
+
+
+def bench(fn, frames, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            fn(frame)
+    return (time.perf_counter() - start) / (repeat * len(frames)) * 1000
+
+
+def main():
+    rng = random.Random(0)
+    with open(get_latest_config_path(), 'r', encoding='utf-8') as f:
+        base_configs = json.load(f)
+    frames = make_frames(base_configs, 50, rng)
+
+    print(f"{'templates':>10} {'loop (ms)':>12} {'matcher (ms)':>14} {'speedup':>8}")
+    for count in (20, 200, 2000):
+        templates = make_templates(base_configs, count, rng)
+        matcher = PoseMatcher(templates)
+
+        # 结果一致性校验
+        for camera in ("72camera", "120width_camera"):
+            for frame in frames:
+                assert match_loop(frame, templates, camera) == matcher.match(frame, camera)
+
+        repeat = max(1, 200 // count)
+        loop_ms = bench(lambda kp: match_loop(kp, templates, "120width_camera"), frames, repeat)
+        matcher_ms = bench(lambda kp: matcher.match(kp, "120width_camera"), frames, repeat)
+        print(f"{count:>10} {loop_ms:>12.3f} {matcher_ms:>14.3f} {loop_ms / matcher_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
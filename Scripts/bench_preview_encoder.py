@@ -0,0 +1,77 @@
+"""
+预览编码对推理循环的影响：每帧在推理线程中编码 (原方式) vs PreviewEncoder 独立线程
+
+用模拟相机 (1280x720) 与模拟估计器跑串行检测循环，比较推理循环的帧率与每帧耗时：
+- inline：每帧镜像 + 全分辨率 JPEG 编码后才处理下一帧
+- encoder (无客户端)：没有订阅者，完全不编码
+- encoder (1 个客户端)：预览限制为 max_fps / max_width，由编码线程完成，旧帧被丢弃
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_preview_encoder
+"""
+import time
+
+import cv2
+import numpy as np
+
+from Scripts.fake_hid_bridge import FakeHidBridge
+from Scripts.fake_pose_pipeline import FakeCamera, FakeEstimator, create_fake_service
+from UpperMachine.flask.preview import FrameStream, PreviewEncoder
+
+
+def inline_encode(frame, quality=70):
+    """原 camera_thread 中每帧的编码：全分辨率镜像后编码为 JPEG"""
+    ret, buffer = cv2.imencode('.jpg', cv2.flip(frame, 1), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ret else None
+
+
+def run_loop(service, frames, handle):
+    durations = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        processed_frame, state_name, poses, words_list = service.capture_and_process()
+        handle(processed_frame, {'state': state_name, 'instruction': words_list})
+        durations.append(time.perf_counter() - start)
+    return np.array(durations)
+
+
+def report(name, durations, extra=''):
+    ms = durations * 1000
+    print(f"{name:>22} {len(durations) / durations.sum():>7.1f} {np.percentile(ms, 50):>9.2f} "
+          f"{np.percentile(ms, 95):>9.2f}  {extra}")
+
+
+def main(frames=150, infer_time=0.01, width=1280, height=720):
+    bridge = FakeHidBridge().start()
+    service = create_fake_service(bridge, estimator=FakeEstimator(infer_time=infer_time),
+                                  camera=FakeCamera(width, height), send_commands_enabled=False)
+
+    print(f"相机 {width}x{height}，模拟推理 {infer_time * 1000:.0f} ms/帧，共 {frames} 帧")
+    print(f"{'mode':>22} {'fps':>7} {'p50 (ms)':>9} {'p95 (ms)':>9}  preview")
+
+    sizes = []
+    durations = run_loop(service, frames, lambda frame, meta: sizes.append(len(inline_encode(frame))))
+    report('inline', durations, f"{len(sizes)} 帧, {np.mean(sizes) / 1024:.0f} KB/帧")
+
+    for clients, max_fps, max_width in ((0, 15, 640), (1, 15, 640), (1, 30, 0)):
+        stream = FrameStream()
+        sizes = []
+        encoder = PreviewEncoder(stream, lambda jpeg, meta: sizes.append(len(jpeg)), max_fps=max_fps, max_width=max_width)
+        encoder.start()
+        for _ in range(clients):
+            encoder.add_client()
+        durations = run_loop(service, frames, encoder.submit)
+        encoder.stop()
+        stats = encoder.get_stats()
+        name = f"encoder {clients} client {max_fps}fps/{max_width or 'full'}"
+        extra = f"{stats['encoded']} 帧, dropped {stats['dropped']}, skipped {stats['skipped']}"
+        if sizes:
+            extra += f", {np.mean(sizes) / 1024:.0f} KB/帧"
+        report(name, durations, extra)
+
+    service.close()
+    bridge.stop()
+
+
+if __name__ == '__main__':
+    main()
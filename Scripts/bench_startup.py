@@ -0,0 +1,141 @@
+"""
+Flask 启动时间：构造时加载模型与打开摄像头（原方式）vs 延迟加载（lazy=True，后台加载）
+
+每种方式在单独的子进程中启动一个 Flask 服务（werkzeug 开发服务器，与 flask_app 相同），包含：
+
+- /api/get_poses：与 routes.get_poses 相同，不依赖模型
+- /api/detect_pose：与 routes.detect_pose 相同，先 wait_ready() 再经推理执行器检测一帧
+
+模型加载用替换 load_estimator 的方式模拟（sleep 后返回 Scripts.fake_pose_pipeline.FakeEstimator），
+摄像头为 open() 时 sleep 的 FakeCamera。父进程从启动子进程开始计时，报告：
+
+- 第一个 HTTP 响应：/api/get_poses 首次返回 200 的时间
+- 第一帧推理：/api/detect_pose 首次返回检测结果的时间（第一个 HTTP 响应之后立即请求）
+
+三种方式：
+- eager：lazy=False，构造时加载（模型与摄像头已在 load() 中并行；原实现中两者串行）
+- lazy + preload_model：服务先启动，模型与摄像头在后台加载
+- lazy，preload_model=false：第一次检测请求时才开始加载
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_startup
+"""
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+import yaml
+
+MODEL_LOAD_TIME = 2.0
+CAMERA_OPEN_TIME = 1.0
+
+
+def serve(port_queue, lazy, preload_model):
+    import cv2
+    import numpy as np
+    from flask import Flask, jsonify, request
+    from werkzeug.serving import make_server
+
+    from Scripts.fake_pose_pipeline import FakeCamera, FakeEstimator
+    from UpperMachine.config_store import config_store
+    from UpperMachine.pose_estimation import PoseDetectionService as service_module
+
+    class SlowOpenCamera(FakeCamera):
+        def open(self):
+            time.sleep(CAMERA_OPEN_TIME)
+            super().open()
+
+    def load_estimator(backend, config):
+        time.sleep(MODEL_LOAD_TIME)
+        return FakeEstimator(infer_time=0.02, draw=False)
+
+    service_module.load_estimator = load_estimator
+
+    with open('Source/flask_config.yml', 'r') as f:
+        config = yaml.safe_load(f)
+    config.update({'preload_model': preload_model, 'log_level': 'WARNING', 'detection_enabled': False})
+    fd, path = tempfile.mkstemp(suffix='.yml')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            yaml.safe_dump(config, f, allow_unicode=True)
+        pose_service = service_module.PoseDetectionService(path, camera=SlowOpenCamera(), lazy=lazy)
+    finally:
+        os.remove(path)
+
+    app = Flask(__name__)
+    # 与 routes.register_routes 相同
+    if pose_service.preload_model:
+        pose_service.start_loading()
+
+    @app.route('/api/get_poses')
+    def get_poses():
+        return jsonify(config_store.get_snapshot().configs)
+
+    @app.route('/api/detect_pose', methods=['POST'])
+    def detect_pose():
+        if not pose_service.wait_ready(60):
+            return jsonify({'status': 'error', 'message': str(pose_service.load_error)}), 503
+        img = cv2.imdecode(np.frombuffer(request.get_data(), np.uint8), cv2.IMREAD_COLOR)
+        poses, _ = pose_service.executor.submit(img, is_draw=False).result()
+        return jsonify({'status': 'success', 'poses': poses.tolist() if poses is not None else []})
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def request_json(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        conn.request(method, path, body=body, headers={'Content-Type': 'image/jpeg'} if body else {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def run(mode, lazy, preload_model, jpeg):
+    ctx = multiprocessing.get_context('spawn')
+    port_queue = ctx.Queue()
+    start = time.perf_counter()
+    server = ctx.Process(target=serve, args=(port_queue, lazy, preload_model), daemon=True)
+    server.start()
+    try:
+        port = port_queue.get(timeout=60)
+        while True:
+            try:
+                status, _ = request_json(port, 'GET', '/api/get_poses')
+            except ConnectionError:
+                status = None
+            if status == 200:
+                break
+            time.sleep(0.005)
+        first_response = time.perf_counter() - start
+        status, payload = request_json(port, 'POST', '/api/detect_pose', jpeg)
+        first_frame = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.join()
+    assert status == 200 and payload['status'] == 'success', payload
+    print(f"{mode:>28} {first_response:>16.2f} {first_frame:>14.2f}")
+
+
+def main():
+    import cv2
+
+    _, jpeg = cv2.imencode('.jpg', cv2.imread('Source/example.jpg'))
+    jpeg = jpeg.tobytes()
+    print(f"模拟模型加载 {MODEL_LOAD_TIME:.1f} s，摄像头打开 {CAMERA_OPEN_TIME:.1f} s（含子进程启动与导入）")
+    print(f"{'':>28} {'first HTTP (s)':>16} {'first frame (s)':>14}")
+    run('eager', False, True, jpeg)
+    run('lazy + preload_model', True, True, jpeg)
+    run('lazy, preload_model=false', True, False, jpeg)
+
+
+if __name__ == '__main__':
+    main()
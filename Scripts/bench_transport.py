@@ -0,0 +1,57 @@
+"""
+HID 命令发送链路基准：每条命令新建连接 (tcp) vs 长连接 (tcp_session)
+
+在本机启动模拟 HID 桥，分别测量单条命令的发送延迟和连续发送的吞吐量，
+并校验模拟桥收到的帧数与发送数一致。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_transport
+"""
+import time
+
+import numpy as np
+
+from Scripts.fake_hid_bridge import FakeHidBridge
+from UpperMachine.pose_estimation.bytes2command import combine_mouse_actions
+from UpperMachine.pose_estimation.sendcommand import get_send_function, close_sessions
+
+
+def run(transport, bridge, count):
+    send = get_send_function(transport)
+    command = combine_mouse_actions([-9], step_size=10)
+    received_before = bridge.stats['frames']
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        send(bridge.host, bridge.port, command, timeout=1.0, ignore_cache=True)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    bridge.wait_frames(received_before + count, timeout=2.0)
+
+    latencies = np.array(latencies) * 1000
+    received = bridge.stats['frames'] - received_before
+    return {
+        'p50_ms': np.percentile(latencies, 50),
+        'p95_ms': np.percentile(latencies, 95),
+        'throughput': count / elapsed,
+        'received': received
+    }
+
+
+def main(count=2000):
+    bridge = FakeHidBridge().start()
+    print(f"模拟 HID 桥: {bridge.host}:{bridge.port}, 每种方式发送 {count} 条命令")
+    print(f"{'transport':>12} {'p50 (ms)':>10} {'p95 (ms)':>10} {'cmd/s':>10} {'received':>10}")
+    for transport in ('tcp', 'tcp_session'):
+        result = run(transport, bridge, count)
+        print(f"{transport:>12} {result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+              f"{result['throughput']:>10.0f} {result['received']:>10}")
+    print(f"桥端累计连接数: {bridge.stats['connections']}")
+    close_sessions()
+    bridge.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+rdkx5 YOLO-Pose 后处理：原实现（三个检测头分别计算 + 结果逐个转为 Python 列表）vs YoloPosePostprocessor
+
+yolo11*_pose_bayese_640x640_nv12 的输出为 s/m/l 三个检测头（80x80、40x40、20x20）各自的
+cls (1, H, W, 1)、bbox (1, H, W, 64)、kpt (1, H, W, 51)。不需要 BPU：按 1~5 个人合成输出张量，
+每人在若干相邻 anchor（可跨检测头）上给出超过阈值的分数，其余 anchor 为低分背景，另含无人的帧。
+
+- 校验两者的检测框、得分与 (N, 17, 3) 关键点一致
+- 报告每帧耗时（原实现包括 HumanPoseEstimator.postprocess 中把结果重建为列表的部分）
+
+用法（在仓库根目录执行）:
+    python -m Scripts.bench_yolo_pose_postprocess
+"""
+import timeit
+
+import cv2
+import numpy as np
+from scipy.special import softmax
+
+from UpperMachine.pose_estimation.rdkx5.postprocess import YoloPosePostprocessor
+
+INPUT_SIZE = 640
+STRIDES = (8, 16, 32)
+# 640x480 画面 letterbox 到 640x640 的几何参数 (x_scale, y_scale, x_shift, y_shift)
+GEOMETRY = (1.0, 1.0, 0.0, 80.0)
+
+
+class LegacyPostProcess:
+    """原 Ultralytics_YOLO_Pose_Bayese_YUV420SP.postProcess 与 HumanPoseEstimator.postprocess 中的列表重建"""
+
+    def __init__(self, score_thres=0.25, nms_thres=0.7, reg=16, nkpt=17, classes_num=1):
+        self.REG = reg
+        self.CLASSES_NUM = classes_num
+        self.SCORE_THRESHOLD = score_thres
+        self.NMS_THRESHOLD = nms_thres
+        self.CONF_THRES_RAW = -np.log(1/self.SCORE_THRESHOLD - 1)
+        self.nkpt = nkpt
+        self.weights_static = np.array([i for i in range(reg)]).astype(np.float32)[np.newaxis, np.newaxis, :]
+        self.grids = []
+        for stride in STRIDES:
+            grid_H, grid_W = INPUT_SIZE // stride, INPUT_SIZE // stride
+            self.grids.append(np.stack([np.tile(np.linspace(0.5, grid_H-0.5, grid_H), reps=grid_H),
+                              np.repeat(np.arange(0.5, grid_W+0.5, 1), grid_W)], axis=0).transpose(1, 0))
+
+    def __call__(self, outputs, geometry):
+        results = self.postProcess(outputs, geometry)
+        poses = []
+        for cls, score, x1, y1, x2, y2, kpts in results:
+            pose = []
+            for j in range(17):
+                x, y, conf = kpts[j]
+                pose.append([float(x), float(y), float(conf)])
+            poses.append(pose)
+        return np.array(poses), results
+
+    def postProcess(self, outputs, geometry):
+        x_scale, y_scale, x_shift, y_shift = geometry
+        heads = []
+        for i, stride in enumerate(STRIDES):
+            cls = outputs[3 * i].reshape(-1, self.CLASSES_NUM)
+            bbox = outputs[3 * i + 1].reshape(-1, 64)
+            kpt = outputs[3 * i + 2].reshape(-1, 51)
+            valid = cls.max(axis=1) >= self.CONF_THRES_RAW
+            heads.append((cls[valid], bbox[valid], kpt[valid], self.grids[i][valid], stride))
+        if all(len(cls) == 0 for cls, *_ in heads):
+            return []
+
+        bboxes, scores, classes, kpts_xy, kpts_conf = [], [], [], [], []
+        for cls, bbox, kpt, grid, stride in heads:
+            cls = 1 / (1 + np.exp(-cls))
+            bbox = bbox.astype(np.float32) if len(bbox) > 0 else np.empty((0, 64))
+            ltrb = np.sum(softmax(bbox.reshape(-1, 4, self.REG), axis=2) * self.weights_static, axis=2) \
+                if len(bbox) > 0 else np.empty((0, 4))
+            x1y1 = grid - ltrb[:, :2] if len(ltrb) > 0 else np.empty((0, 2))
+            x2y2 = grid + ltrb[:, 2:] if len(ltrb) > 0 else np.empty((0, 2))
+            bboxes.append(np.hstack([x1y1, x2y2]) * stride if len(x1y1) > 0 else np.empty((0, 4)))
+            kpt = kpt.astype(np.float32) if len(kpt) > 0 else np.empty((0, 51))
+            kpt = kpt.reshape(-1, self.nkpt, 3) if len(kpt) > 0 else np.empty((0, self.nkpt, 3))
+            kpts_xy.append((kpt[:, :, :2] * 2 + grid[:, np.newaxis, :] - 0.5) * stride
+                           if len(kpt) > 0 else np.empty((0, self.nkpt, 2)))
+            kpts_conf.append(1 / (1 + np.exp(-kpt[:, :, 2:])) if len(kpt) > 0 else np.empty((0, self.nkpt, 1)))
+            scores.append(cls.max(axis=1))
+            classes.append(cls.argmax(axis=1))
+
+        bboxes = np.concatenate(bboxes, axis=0)
+        scores = np.concatenate(scores, axis=0)
+        classes = np.concatenate(classes, axis=0)
+        kpts_xy = np.concatenate(kpts_xy, axis=0)
+        kpts_conf = np.concatenate(kpts_conf, axis=0)
+
+        indices = cv2.dnn.NMSBoxes(bboxes, scores, self.SCORE_THRESHOLD, self.NMS_THRESHOLD)
+
+        bboxes = bboxes[indices]
+        bboxes[:, [0, 2]] = (bboxes[:, [0, 2]] - x_shift) / x_scale
+        bboxes[:, [1, 3]] = (bboxes[:, [1, 3]] - y_shift) / y_scale
+        bboxes = bboxes.astype(np.int32)
+        kpts_xy = kpts_xy[indices]
+        kpts_xy[:, :, 0] = (kpts_xy[:, :, 0] - x_shift) / x_scale
+        kpts_xy[:, :, 1] = (kpts_xy[:, :, 1] - y_shift) / y_scale
+        kpts_conf = kpts_conf[indices]
+
+        results = []
+        for i in range(len(bboxes)):
+            x1, y1, x2, y2 = bboxes[i]
+            cls = classes[indices[i]]
+            score = scores[indices[i]]
+            kpts = np.hstack([kpts_xy[i], kpts_conf[i]])
+            results.append((cls, score, x1, y1, x2, y2, kpts))
+        return results
+
+
+def make_outputs(rng, people):
+    """合成 9 个输出张量：背景 anchor 的分数远低于阈值，每人在一个检测头的 3x3 邻域内超过阈值"""
+    outputs = []
+    for stride in STRIDES:
+        size = INPUT_SIZE // stride
+        outputs.append(rng.normal(-8.0, 1.0, (1, size, size, 1)).astype(np.float32))
+        outputs.append(rng.normal(0.0, 2.0, (1, size, size, 64)).astype(np.float32))
+        outputs.append(rng.normal(0.0, 1.0, (1, size, size, 51)).astype(np.float32))
+    for _ in range(people):
+        head = rng.integers(0, len(STRIDES))
+        size = INPUT_SIZE // STRIDES[head]
+        y, x = rng.integers(1, size - 1, 2)
+        outputs[3 * head][0, y - 1:y + 2, x - 1:x + 2, 0] = rng.uniform(-1.0, 3.0, (3, 3))
+    return outputs
+
+
+def main(number=300):
+    rng = np.random.default_rng(0)
+    legacy = LegacyPostProcess()
+    postprocessor = YoloPosePostprocessor(INPUT_SIZE, INPUT_SIZE, STRIDES)
+
+    detections = 0
+    for people in (0, 1, 1, 2, 3, 5) * 5:
+        outputs = make_outputs(rng, people)
+        ref_poses, results = legacy(outputs, GEOMETRY)
+        poses, boxes, scores = postprocessor(outputs, GEOMETRY)
+        assert poses.shape == (len(results), 17, 3) and poses.dtype == np.float32
+        detections += len(results)
+        if not results:
+            continue
+        ref_boxes = np.array([result[2:6] for result in results])
+        ref_scores = np.array([result[1] for result in results])
+        assert np.allclose(poses, ref_poses, rtol=0, atol=1e-3), np.abs(poses - ref_poses).max()
+        # 原实现的网格为 float64，取整前的误差可能使坐标相差 1
+        assert np.abs(boxes - ref_boxes).max() <= 1
+        assert np.allclose(scores, ref_scores, rtol=1e-6)
+    print(f"30 帧合成输出（共 {detections} 个检测）：检测框、得分与关键点与原实现一致")
+
+    print(f"\n{'people':>6} {'legacy (ms)':>12} {'vectorized (ms)':>16} {'speedup':>8}")
+    for people in (0, 1, 5):
+        outputs = make_outputs(rng, people)
+        t_legacy = min(timeit.repeat(lambda: legacy(outputs, GEOMETRY), number=number, repeat=3)) / number * 1000
+        t_new = min(timeit.repeat(lambda: postprocessor(outputs, GEOMETRY), number=number, repeat=3)) / number * 1000
+        print(f"{people:>6} {t_legacy:>12.3f} {t_new:>16.3f} {t_legacy / t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+本地模拟的 HID 桥（替代 ESP32/Pico 下位机），用于在没有硬件时调试和测试发送链路
+
+- TCP：与 LowerMachine/Esp32C3.py 相同的流式接收逻辑，兼容长连接与每条命令新建连接两种方式
+- UDP：同一端口接收带序号的数据报，丢弃乱序/重复包，并应答 STAT 统计查询
+- delay：每收到一帧后额外等待的时间，用于模拟缓慢的下位机
+
+用法（在仓库根目录执行）:
+    python -m Scripts.fake_hid_bridge --port 8080
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+
+from UpperMachine.pose_estimation.sendcommand import (
+    pop_frames, SequenceFilter, FRAME_HEAD, UDP_HEADER, UDP_STAT_REQUEST
+)
+
+
+class FakeHidBridge:
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0, verbose=False):
+        self.delay = delay
+        self.verbose = verbose
+        self.frames = []
+        self.stats = {
+            'connections': 0,
+            'frames': 0,
+            'bytes': 0
+        }
+        self.lock = threading.Lock()
+        self.frame_event = threading.Condition(self.lock)
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(128)
+        self.host, self.port = self.server.getsockname()
+
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind((self.host, self.port))
+        self.sequence_filter = SequenceFilter()
+        self.accepted_seqs = []
+        self.is_running = False
+
+    def start(self):
+        self.is_running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._udp_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.is_running = False
+        for sock in (self.server, self.udp):
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def wait_frames(self, count, timeout=5.0):
+        """等待累计收到 count 帧"""
+        deadline = time.time() + timeout
+        with self.frame_event:
+            while self.stats['frames'] < count:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.frame_event.wait(remaining)
+        return True
+
+    def _accept_loop(self):
+        while self.is_running:
+            try:
+                conn, addr = self.server.accept()
+            except OSError:
+                break
+            with self.lock:
+                self.stats['connections'] += 1
+            threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+
+    def _handle_client(self, conn):
+        buf = b''
+        with conn:
+            while self.is_running:
+                try:
+                    data = conn.recv(256)
+                except OSError:
+                    break
+                if not data:
+                    break
+                frames, buf = pop_frames(buf + data)
+                for frame in frames:
+                    self._on_frame(frame)
+
+    def _udp_loop(self):
+        while self.is_running:
+            try:
+                data, addr = self.udp.recvfrom(512)
+            except OSError:
+                break
+            if len(data) < UDP_HEADER.size:
+                continue
+            epoch, seq = UDP_HEADER.unpack_from(data)
+            payload = data[UDP_HEADER.size:]
+            if payload == UDP_STAT_REQUEST:
+                with self.lock:
+                    reply = json.dumps(self.sequence_filter.stats).encode()
+                self.udp.sendto(UDP_STAT_REQUEST + reply, addr)
+                continue
+            if not payload.startswith(FRAME_HEAD):
+                continue
+            with self.lock:
+                accepted = self.sequence_filter.accept(epoch, seq)
+                if accepted:
+                    self.accepted_seqs.append(seq)
+            if accepted:
+                self._on_frame(payload)
+
+    def _on_frame(self, frame):
+        if self.delay > 0:
+            time.sleep(self.delay)
+        with self.frame_event:
+            self.frames.append(frame)
+            self.stats['frames'] += 1
+            self.stats['bytes'] += len(frame)
+            self.frame_event.notify_all()
+        if self.verbose:
+            print(f"[BRIDGE] {frame.hex(' ').upper()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 HID 桥")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--delay', type=float, default=0.0, help="每帧处理延迟（秒）")
+    args = parser.parse_args()
+
+    bridge = FakeHidBridge(args.host, args.port, delay=args.delay, verbose=True).start()
+    print(f"模拟 HID 桥已启动: {bridge.host}:{bridge.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        bridge.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+模拟的相机与姿态估计器，用于在没有摄像头、模型和板端库时运行完整的检测流程
+
+- FakeCamera：返回 Source/example.jpg 缩放后的帧，可设置每帧采集耗时
+- FakeEstimator：按固定耗时 sleep 模拟前处理/推理/解码（与真实估计器一样支持分段调用），
+  并轮流输出姿势配置中录制的关键点，使 posedict2state 能匹配到姿势、产生按键命令
+- create_fake_service：用上述两者和一个临时配置文件创建 PoseDetectionService，命令发往 FakeHidBridge
+
+用法（在仓库根目录执行）:
+    from Scripts.fake_pose_pipeline import create_fake_service
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import yaml
+
+from UpperMachine.config_store import get_config_snapshot
+from UpperMachine.metrics import pipeline_metrics
+from UpperMachine.pose_estimation.cameras import Camera
+from UpperMachine.pose_estimation.fastdeploy.utils import body_mapper, draw_poses
+
+# 与 PoseDetectionService.process_frame 中的左右互换一致，预先换回，使互换后得到录制时的关键点
+SWAP_PAIRS = [
+    ('left_eye', 'right_eye'), ('left_ear', 'right_ear'),
+    ('left_shoulder', 'right_shoulder'), ('left_elbow', 'right_elbow'),
+    ('left_wrist', 'right_wrist'), ('left_hip', 'right_hip'),
+    ('left_knee', 'right_knee'), ('left_ankle', 'right_ankle')
+]
+
+
+class FakeCamera(Camera):
+    def __init__(self, width=640, height=480, capture_time=0.0):
+        super().__init__(width, height)
+        self.capture_time = capture_time
+        self.frame = cv2.resize(cv2.imread('Source/example.jpg'), (width, height))
+        self.frames = 0
+
+    def open(self):
+        self.is_opened = True
+
+    def capture(self):
+        if self.capture_time:
+            time.sleep(self.capture_time)
+        self.frames += 1
+        return self.frame.copy()
+
+    def close(self):
+        self.is_opened = False
+
+
+class FakeEstimator:
+    """
+    Args:
+        infer_time (float): 每帧的模拟耗时（秒），按 1:6:1 分给 preprocess / inference / decode
+        draw (bool): is_draw=True 时是否真的绘制关键点
+        num_requests (int): forward_async 可同时执行的帧数（模拟多个推理请求 / 多个设备流，耗时互不影响）
+    """
+
+    def __init__(self, infer_time=0.02, draw=True, num_requests=1):
+        self.infer_time = infer_time
+        self.draw = draw
+        self.max_in_flight = num_requests
+        self._executor = ThreadPoolExecutor(max_workers=num_requests) if num_requests > 1 else None
+        configs = [pose for pose in get_config_snapshot().configs if pose.get('keys') and 'raw_value_dict' in pose]
+        self.poses = [self._to_pose(pose['raw_value_dict']) for pose in configs]
+        self.names = [pose['name'] for pose in configs]
+        self.calls = 0
+
+    @staticmethod
+    def _to_pose(raw_value_dict):
+        pose = np.zeros((17, 3), dtype=np.float32)
+        for key, index in body_mapper.items():
+            pose[index, :2] = raw_value_dict[key]
+            pose[index, 2] = 1.0
+        for left, right in SWAP_PAIRS:
+            pose[[body_mapper[left], body_mapper[right]]] = pose[[body_mapper[right], body_mapper[left]]]
+        return pose
+
+    def _stage(self, name, seconds):
+        start = time.perf_counter()
+        if seconds > 0:
+            time.sleep(seconds)
+        pipeline_metrics.record(name, time.perf_counter() - start)
+
+    def infer(self, image, is_draw=False):
+        inputs = self.preprocess(image)
+        return self.postprocess(image, inputs, self.forward(inputs), is_draw)
+
+    # 与真实估计器相同的分段接口，流水线模式下分别在不同线程中调用
+    def preprocess(self, image):
+        # 每 10 帧切换一个姿势
+        pose = self.poses[(self.calls // 10) % len(self.poses)]
+        self.calls += 1
+        self._stage('preprocess', self.infer_time / 8)
+        return pose
+
+    def forward(self, inputs):
+        self._stage('inference', self.infer_time * 6 / 8)
+        return inputs
+
+    def forward_async(self, inputs):
+        if self._executor is None:
+            future = Future()
+            future.set_result(self.forward(inputs))
+            return future
+        return self._executor.submit(pipeline_metrics.bind(self.forward), inputs)
+
+    def postprocess(self, image, inputs, outputs, is_draw=False):
+        self._stage('decode', self.infer_time / 8)
+        poses = outputs[np.newaxis]
+        draw_img = draw_poses(image, poses, point_score_threshold=0.1) if is_draw and self.draw else image
+        return poses, draw_img
+
+    def pose2dict(self, poses):
+        if len(poses) == 0:
+            return {}
+        return {key: poses[0, body_mapper[key], :2] for key in body_mapper.keys()}
+
+
+def create_fake_service(bridge, camera=None, estimator=None, config_path='Source/flask_config.yml', **overrides):
+    """
+    创建使用模拟相机/估计器、把命令发往 bridge 的 PoseDetectionService
+
+    Args:
+        bridge (FakeHidBridge): 已启动的模拟下位机
+        overrides: 覆盖配置文件中的顶层配置项，如 metrics_enabled=False
+
+    Returns:
+        PoseDetectionService
+    """
+    from UpperMachine.pose_estimation.PoseDetectionService import PoseDetectionService
+
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    config.update({
+        'send_commands_enabled': True,
+        'detection_enabled': True,
+        'target_ip': bridge.host,
+        'target_port': bridge.port,
+        'command_transport': 'tcp_session',
+        'mouse_transport': 'tcp_session',
+        'use_async': False,
+        'log_level': 'WARNING',
+    })
+    config.update(overrides)
+
+    fd, path = tempfile.mkstemp(suffix='.yml')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            yaml.safe_dump(config, f, allow_unicode=True)
+        return PoseDetectionService(path,
+                                    estimator=estimator if estimator is not None else FakeEstimator(),
+                                    camera=camera if camera is not None else FakeCamera())
+    finally:
+        os.remove(path)
@@ -0,0 +1,173 @@
+"""
+帧环形缓冲区压力测试：在相机线程与推理线程速度不匹配时检查 FrameRing 的不变量
+
+- 每个场景一个生产者线程（模拟相机），一个或多个消费者线程（模拟推理）
+- 生产者把帧序号写满整个缓冲区；消费者借出后、"处理"完后各检查一次内容，
+  确认借出期间槽位没有被改写，且每个消费者拿到的序号严格递增
+- 结束后检查 published == consumed + dropped + ready
+- 最后用 PoseDetectionService 的异步模式跑一遍，并与原来每帧拷贝的方式对比取帧开销
+
+用法（在仓库根目录执行）:
+    python -m Scripts.frame_ring_harness
+"""
+import threading
+import time
+
+import numpy as np
+
+from Scripts.fake_hid_bridge import FakeHidBridge
+from Scripts.fake_pose_pipeline import FakeCamera, FakeEstimator, create_fake_service
+from UpperMachine.metrics import pipeline_metrics
+from UpperMachine.pose_estimation.frame_ring import FrameRing
+
+
+class StampCamera(FakeCamera):
+    """每帧画面的所有像素都等于帧序号（mod 256），支持写入复用的缓冲区"""
+
+    def __init__(self, width=1280, height=720, capture_time=0.0):
+        super().__init__(width, height, capture_time)
+        self.reused = 0
+
+    def capture_into(self, out=None):
+        if self.capture_time:
+            time.sleep(self.capture_time)
+        self.frames += 1
+        if out is None:
+            out = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        else:
+            self.reused += 1
+        out.fill(self.frames % 256)
+        return out
+
+    def capture(self):
+        return self.capture_into()
+
+
+def run_scenario(name, produce_time, consume_time, consumers=1, num_slots=3, duration=1.0):
+    ring = FrameRing(num_slots, stale_after=0.05)
+    running = True
+    errors = []
+    seqs = [[] for _ in range(consumers)]
+
+    def produce():
+        stamp = 0
+        while running:
+            slot = ring.acquire()
+            if slot is None:
+                time.sleep(0.001)
+                continue
+            captured_at = time.perf_counter()
+            if slot.buffer is None:
+                slot.buffer = np.empty(4096, dtype=np.int64)
+            stamp += 1
+            # 分两半写入，中间留出被并发读取的机会
+            slot.buffer[:2048] = stamp
+            time.sleep(produce_time)
+            slot.buffer[2048:] = stamp
+            ring.publish(slot, slot.buffer, captured_at)
+
+    def consume(index):
+        while running:
+            slot = ring.borrow(timeout=0.2)
+            if slot is None:
+                continue
+            if seqs[index] and slot.seq <= seqs[index][-1]:
+                errors.append(f"consumer {index}: seq {slot.seq} 不大于上一帧 {seqs[index][-1]}")
+            seqs[index].append(slot.seq)
+            if not (slot.frame == slot.seq).all():
+                errors.append(f"consumer {index}: 借出时帧 {slot.seq} 的内容不完整")
+            time.sleep(consume_time)
+            if not (slot.frame == slot.seq).all():
+                errors.append(f"consumer {index}: 帧 {slot.seq} 在借出期间被改写")
+            ring.release(slot)
+
+    threads = [threading.Thread(target=produce)]
+    threads += [threading.Thread(target=consume, args=(i,)) for i in range(consumers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    running = False
+    ring.close()
+    for thread in threads:
+        thread.join()
+
+    stats = ring.get_stats()
+    assert not errors, errors[:5]
+    assert stats['borrowed'] == 0
+    assert stats['published'] == stats['last_seq']
+    assert stats['consumed'] == sum(len(s) for s in seqs)
+    assert stats['published'] == stats['consumed'] + stats['dropped'] + stats['ready'], stats
+    assert len(set(seq for s in seqs for seq in s)) == stats['consumed'], "同一帧被借出了多次"
+    print(f"{name:>34} {stats['published']:>9} {stats['consumed']:>8} {stats['dropped']:>7} "
+          f"{stats['stale']:>5} {stats['overruns']:>8}")
+
+
+def run_service(frames=200, infer_time=0.01, capture_time=0.002):
+    pipeline_metrics.reset()
+    bridge = FakeHidBridge().start()
+    camera = StampCamera(1280, 720, capture_time=capture_time)
+    service = create_fake_service(bridge, camera=camera, estimator=FakeEstimator(infer_time=infer_time),
+                                  send_commands_enabled=False, use_async=True)
+    service.start()
+    seen = []
+    for _ in range(frames):
+        processed_frame, _, _, _ = service.capture_and_process()
+        if processed_frame is None:
+            continue
+        slot = service._borrowed_slot
+        # 返回的画面就是借出槽位中的帧（client 模式未绘制），处理期间不应被相机改写
+        if processed_frame is slot.frame:
+            assert (processed_frame == slot.seq % 256).all(), "推理期间槽位被改写"
+        seen.append(slot.seq)
+    service.stop()
+    stats = service.get_stats()['frame_ring']
+    service.close()
+    bridge.stop()
+
+    assert all(b > a for a, b in zip(seen, seen[1:])), "处理的帧序号不是严格递增"
+    assert stats['published'] >= stats['consumed'] + stats['dropped']
+    age = pipeline_metrics.summary()['frame_age']
+    print(f"service 异步模式 {len(seen)} 帧: published {stats['published']}, dropped {stats['dropped']}, "
+          f"stale {stats['stale']}, 相机复用缓冲区 {camera.reused}/{camera.frames} 次, "
+          f"frame_age p50 {age['p50_ms']:.2f} ms / p99 {age['p99_ms']:.2f} ms")
+
+
+def bench_handoff(width=1280, height=720, number=2000):
+    # 原方式：最新帧池 + 推理线程 frame.copy()；新方式：borrow/release，不拷贝
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    cond = threading.Condition()
+    start = time.perf_counter()
+    for _ in range(number):
+        with cond:
+            frame_buffer = (frame, time.perf_counter())
+            cond.notify_all()
+        with cond:
+            image, _ = frame_buffer
+            image = image.copy()
+    t_copy = (time.perf_counter() - start) / number * 1e6
+
+    ring = FrameRing(3)
+    start = time.perf_counter()
+    for _ in range(number):
+        slot = ring.acquire()
+        ring.publish(slot, frame, time.perf_counter())
+        slot = ring.borrow()
+        ring.release(slot)
+    t_ring = (time.perf_counter() - start) / number * 1e6
+    print(f"取帧开销 {width}x{height}: 最新帧池 + copy {t_copy:.1f} us/帧, FrameRing {t_ring:.1f} us/帧")
+
+
+def main():
+    print(f"{'scenario':>34} {'published':>9} {'consumed':>8} {'dropped':>7} {'stale':>5} {'overruns':>8}")
+    run_scenario('fast camera / slow inference', 0.001, 0.01)
+    run_scenario('slow camera / fast inference', 0.01, 0.001)
+    run_scenario('matched (5 ms / 5 ms)', 0.005, 0.005)
+    run_scenario('2 consumers, 3 slots', 0.001, 0.01, consumers=2)
+    run_scenario('2 consumers, 4 slots', 0.001, 0.01, consumers=2, num_slots=4)
+    run_service()
+    bench_handoff()
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+UDP 发送链路回环测试：在发送端与模拟 HID 桥之间插入一个会随机丢包、乱序的中继，
+检查接收端只接受递增的序号，且各计数器之间的关系成立。
+
+用法（在仓库根目录执行）:
+    python -m Scripts.udp_loopback_harness --loss 0.1 --reorder 0.1
+"""
+import argparse
+import random
+import socket
+import threading
+import time
+
+from Scripts.fake_hid_bridge import FakeHidBridge
+from UpperMachine.pose_estimation.bytes2command import combine_mouse_actions
+from UpperMachine.pose_estimation.sendcommand import UdpDatagramTransport
+
+
+class LossyRelay:
+    """
+    UDP 中继：按概率丢弃数据报，或将数据报扣留到下一个数据报之后再转发（制造乱序）
+    """
+
+    def __init__(self, target, loss=0.1, reorder=0.1, seed=0):
+        self.target = target
+        self.loss = loss
+        self.reorder = reorder
+        self.rng = random.Random(seed)
+        self.stats = {'forwarded': 0, 'lost': 0, 'delayed': 0}
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.client_addr = None
+        self.held = None
+        self.is_running = False
+
+    def start(self):
+        self.is_running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.is_running = False
+
+    def _forward(self, data):
+        self.sock.sendto(data, self.target)
+        self.stats['forwarded'] += 1
+
+    def _loop(self):
+        while self.is_running:
+            try:
+                data, addr = self.sock.recvfrom(512)
+            except socket.timeout:
+                # 空闲时放出扣留的数据报
+                if self.held is not None:
+                    self._forward(self.held)
+                    self.held = None
+                continue
+            except OSError:
+                break
+
+            if addr == self.target:
+                # 接收端的应答原样回传给发送端
+                if self.client_addr is not None:
+                    self.sock.sendto(data, self.client_addr)
+                continue
+
+            self.client_addr = addr
+            if data[3:].startswith(b'STAT'):
+                # 统计查询不计入转发数，也不做丢包/乱序
+                self.sock.sendto(data, self.target)
+                continue
+            if self.rng.random() < self.loss:
+                self.stats['lost'] += 1
+                continue
+            if self.held is None and self.rng.random() < self.reorder:
+                self.held = data
+                self.stats['delayed'] += 1
+                continue
+            self._forward(data)
+            if self.held is not None:
+                self._forward(self.held)
+                self.held = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP 丢包/乱序回环测试")
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--loss', type=float, default=0.1)
+    parser.add_argument('--reorder', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    bridge = FakeHidBridge().start()
+    relay = LossyRelay((bridge.host, bridge.port), args.loss, args.reorder, args.seed).start()
+    transport = UdpDatagramTransport('127.0.0.1', relay.port)
+
+    command = combine_mouse_actions([-10], step_size=10)
+    for i in range(args.count):
+        transport.send(command)
+        if i % 100 == 0:
+            time.sleep(0.001)
+    time.sleep(0.5)
+
+    transport.request_remote_stats()
+    deadline = time.time() + 2
+    while transport.poll_remote_stats() is None and time.time() < deadline:
+        time.sleep(0.05)
+
+    relay.stop()
+    bridge.stop()
+
+    local = transport.get_stats()
+    remote = local['remote']
+    print(f"中继: {relay.stats}")
+    print(f"发送端: sent={local['sent']}, errors={local['errors']}")
+    print(f"接收端: {remote}")
+
+    # 校验
+    seqs = bridge.accepted_seqs
+    assert remote is not None, "未收到接收端统计"
+    assert local['sent'] == args.count
+    assert all(b > a for a, b in zip(seqs, seqs[1:])), "接受的序号不是严格递增"
+    assert remote['accepted'] == len(seqs) == bridge.stats['frames']
+    assert remote['received'] == relay.stats['forwarded']
+    assert remote['received'] == remote['accepted'] + remote['dropped']
+    assert remote['reordered'] <= relay.stats['delayed']
+    # 首个与最后一个已接受序号之间的每个序号，要么被接受，要么计为丢失
+    assert remote['accepted'] + remote['lost'] == seqs[-1] - seqs[0] + 1
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
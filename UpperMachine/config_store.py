@@ -0,0 +1,163 @@
+"""
+姿势配置存储：维护 Source/ 下配置版本的内存索引，并向各模块分发同一份共享的配置快照（调用方不得修改）
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+
+import yaml
+
+from UpperMachine.utils import list_config_versions
+
+
+# 获取热重载配置
+def _load_hot_reload_setting(config_path="Source/flask_config.yml"):
+    try:
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f)
+            return config.get('hot_reload', False)
+    except:
+        return False
+
+
+class ConfigSnapshot:
+    """
+    一次解析得到的配置快照，在所有使用方之间共享。
+
+    configs 为元组，但其中的每个姿势配置仍是普通 dict（直接交给 jsonify / json.dump），
+    调用方不得修改其内容：修改会影响所有线程，且不会使已构建的派生结构失效。
+    需要编辑时使用 to_list() 得到的深拷贝。
+
+    匹配器、按键映射等派生结构通过 derived() 挂在快照上，
+    同一版本的配置只解析、编译一次，由所有使用方共享。
+    """
+
+    def __init__(self, path, version, mtime, configs):
+        self.path = path
+        self.version = version
+        self.mtime = mtime
+        self.configs = tuple(configs)
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def to_list(self):
+        """返回可修改的深拷贝，用于编辑后另存为新版本"""
+        return copy.deepcopy(list(self.configs))
+
+    def derived(self, key, factory):
+        """
+        获取基于本快照的派生结构，首次访问时调用 factory(configs) 构建
+
+        Args:
+            key (str): 派生结构名称
+            factory (callable): 构建函数，参数为 configs
+
+        Returns:
+            factory 的返回值
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = factory(self.configs)
+                    self._derived[key] = value
+        return value
+
+
+class ConfigStore:
+    """
+    配置版本索引与快照缓存。
+
+    - 每帧调用 get_snapshot() 的开销为 O(1)：在 check_interval 内直接返回缓存的快照，
+      超过间隔后只 stat 一次目录（热重载开启时再 stat 当前配置文件）
+    - 仅当目录 mtime 变化（新增/删除了配置文件）时才重新列目录、重建版本索引
+    - 通过 Flask 接口修改配置后调用 invalidate()，下一次访问立即刷新
+    """
+
+    def __init__(self, base_dir="Source", hot_reload=None, check_interval=0.5):
+        self.base_dir = base_dir
+        self.hot_reload = _load_hot_reload_setting() if hot_reload is None else hot_reload
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._versions = []  # [(data_num, path), ...]，按 data_num 降序
+        self._dir_mtime = None
+        self._last_check = 0.0
+        self._force_reload = False
+        self._snapshot = None
+
+    def invalidate(self):
+        """标记索引失效，下一次 get_snapshot() 时重新扫描目录并加载"""
+        with self._lock:
+            self._dir_mtime = None
+            self._last_check = 0.0
+            self._force_reload = True
+
+    def versions(self):
+        """返回配置版本索引 [(data_num, path), ...]，按 data_num 降序"""
+        self.get_snapshot()
+        return list(self._versions)
+
+    def latest_path(self):
+        """返回当前最新的配置文件路径"""
+        return self.get_snapshot().path
+
+    def get_snapshot(self):
+        """返回最新的配置快照"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and now - self._last_check < self.check_interval:
+                return self._snapshot
+            self._last_check = now
+            self._refresh()
+            return self._snapshot
+
+    def _refresh(self):
+        try:
+            dir_mtime = os.stat(self.base_dir).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+
+        if dir_mtime is None or dir_mtime != self._dir_mtime:
+            self._versions = list_config_versions(self.base_dir)
+            self._dir_mtime = dir_mtime
+
+        if self._versions:
+            version, path = self._versions[0]
+        else:
+            version, path = 0, os.path.join(self.base_dir, "configs.yml")
+
+        snapshot = self._snapshot
+        force_reload = self._force_reload
+        self._force_reload = False
+        if snapshot is not None and snapshot.path == path and not (self.hot_reload or force_reload):
+            return
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if snapshot is not None and snapshot.path == path and snapshot.mtime == mtime and not force_reload:
+                return
+            with open(path, 'r', encoding='utf-8') as f:
+                configs = json.load(f)
+            self._snapshot = ConfigSnapshot(path, version, mtime, configs)
+        except Exception as e:
+            print(f"Error loading config: {e}")
+            if self._snapshot is None:
+                self._snapshot = ConfigSnapshot(path, version, None, [])
+
+
+# 全局共享的配置存储
+config_store = ConfigStore()
+
+
+def get_config_snapshot():
+    """获取全局配置存储中的最新快照"""
+    return config_store.get_snapshot()
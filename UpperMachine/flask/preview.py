@@ -0,0 +1,300 @@
+"""
+预览画面的编码与推送
+
+- base64：JPEG 经 base64 编码后放在 frame_update 的 JSON 中（原方式，体积 +33%）
+- binary：JPEG 原始字节作为 Socket.IO 二进制附件发送
+- mjpeg：frame_update 只带检测结果，画面通过 /api/stream.mjpg（multipart/x-mixed-replace）获取
+
+binary / mjpeg 模式下统计信息不再随每帧发送，而是按 stats_interval 单独发送 stats 事件。
+
+编码在 PreviewEncoder 的独立线程中进行，推理线程只提交画面，从不等待 cv2.imencode。
+
+overlay 为 client 时服务端不绘制骨架，frame_update 携带归一化的关键点，由前端叠加绘制。
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from UpperMachine.metrics import pipeline_metrics
+from UpperMachine.pose_estimation.nv12 import Nv12Frame
+
+STREAM_TRANSPORTS = ('base64', 'binary', 'mjpeg')
+
+# COCO 17 点骨架连线，与 draw_poses 的 default_skeleton 相同，随 stream_config 发给前端
+SKELETON = ((15, 13), (13, 11), (16, 14), (14, 12), (11, 12), (5, 11), (6, 12), (5, 6), (5, 7),
+            (6, 8), (7, 9), (8, 10), (1, 2), (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6))
+
+MJPEG_BOUNDARY = 'frame'
+
+
+def keypoints_payload(poses, frame_shape, mirror=True, decimals=4):
+    """
+    把关键点转换为前端叠加绘制用的紧凑格式
+
+    Args:
+        poses (np.ndarray): (N, 17, 3) 关键点 (x, y, score)，坐标为 frame_shape 对应的像素坐标
+        frame_shape (tuple): 画面形状 (H, W, ...)
+        mirror (bool): 是否水平镜像（与预览画面的镜像一致）
+        decimals (int): 保留的小数位数
+
+    Returns:
+        list: 每人一个扁平列表 [x0, y0, s0, x1, y1, s1, ...]，x/y 归一化到 0~1
+    """
+    if poses is None or len(poses) == 0:
+        return []
+    points = np.array(poses, dtype=np.float64)[..., :3]
+    height, width = frame_shape[0], frame_shape[1]
+    points[..., 0] /= width
+    points[..., 1] /= height
+    if mirror:
+        points[..., 0] = 1.0 - points[..., 0]
+    return np.round(points, decimals).reshape(len(points), -1).tolist()
+
+
+class FrameStream:
+    """
+    最新一帧 JPEG 的发布点
+
+    推送线程每帧 publish 一次，MJPEG 等订阅者按序号等待新帧；
+    只保留最新一帧，慢的订阅者直接跳过中间帧，不会拖慢推送线程。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.jpeg = None
+        self.seq = 0
+        self.subscribers = 0
+
+    def publish(self, jpeg):
+        """
+        Args:
+            jpeg (bytes): JPEG 数据
+        """
+        with self._cond:
+            self.jpeg = jpeg
+            self.seq += 1
+            self._cond.notify_all()
+
+    def wait(self, last_seq, timeout=1.0):
+        """
+        等待序号大于 last_seq 的新帧
+
+        Returns:
+            tuple: (seq, jpeg)，超时返回当前最新帧（可能与上次相同）
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.jpeg
+
+    def mjpeg(self, keepalive=2.0):
+        """
+        multipart/x-mixed-replace 响应体的生成器
+
+        长时间没有新帧（例如检测已停止）时按 keepalive 间隔重发最新一帧，
+        以便及时发现已断开的客户端并结束生成器。
+        """
+        with self._cond:
+            self.subscribers += 1
+        try:
+            seq = 0
+            while True:
+                seq, jpeg = self.wait(seq, timeout=keepalive)
+                if jpeg is None:
+                    continue
+                yield (b'--' + MJPEG_BOUNDARY.encode() + b'\r\n'
+                       b'Content-Type: image/jpeg\r\n'
+                       b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n')
+                yield jpeg
+                yield b'\r\n'
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+
+class PreviewEncoder:
+    """
+    预览编码线程：与推理帧率、分辨率解耦
+
+    - 只有至少一个订阅者（Socket.IO 客户端或 MJPEG 连接）时才编码，否则 submit 直接返回
+    - 编码频率不超过 max_fps，宽度不超过 max_width（等比缩放），与 fps_limit 无关
+    - 编码线程忙或未到下一帧的时间时直接丢弃提交的帧（计入 dropped），推理线程不会被拖慢
+    - 被接受的帧先拷贝到编码线程自己的缓冲区，调用方随后可以复用该帧的内存（如帧环形缓冲区的槽位）
+    - 拷贝、缩放与镜像都写入预先分配的缓冲区，尺寸不变时每帧只分配 JPEG 输出
+
+    Args:
+        frame_stream (FrameStream): 编码结果的发布点
+        on_frame (callable): on_frame(jpeg, meta)，每编码一帧在编码线程中调用一次
+    """
+
+    def __init__(self, frame_stream, on_frame=None, quality=70, max_fps=15, max_width=640, flip=True):
+        self.frame_stream = frame_stream
+        self.on_frame = on_frame
+        self.quality = quality
+        self.max_fps = max_fps
+        self.max_width = max_width
+        self.flip = flip
+
+        self.clients = 0
+        self._cond = threading.Condition()
+        self._pending = None  # (frame, meta)
+        self._busy = False
+        self._next_due = 0.0
+        self._thread = None
+        self.is_running = False
+
+        self._snapshot = None
+        self._shape = None
+        self._resized = None
+        self._flipped = None
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+        self.stats = {
+            'submitted': 0,
+            'encoded': 0,
+            'dropped': 0,
+            'skipped': 0,
+            'last_bytes': 0
+        }
+
+    def start(self):
+        with self._cond:
+            if self.is_running:
+                return
+            self.is_running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self.is_running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def add_client(self):
+        with self._cond:
+            self.clients += 1
+
+    def remove_client(self):
+        with self._cond:
+            self.clients = max(0, self.clients - 1)
+
+    @property
+    def active(self):
+        """是否有人在看预览"""
+        return self.clients > 0 or self.frame_stream.subscribers > 0
+
+    def submit(self, frame, meta=None):
+        """
+        提交一帧待编码的画面（不阻塞，返回后调用方即可复用 frame 的内存）
+
+        Args:
+            frame (np.ndarray | Nv12Frame): BGR 图像或相机的 NV12 帧
+            meta (dict): 随画面一起交给 on_frame 的检测结果
+
+        Returns:
+            bool: 是否被接受（没有订阅者、编码线程忙或未到下一帧的时间时返回 False）
+        """
+        if not self.active:
+            self.stats['skipped'] += 1
+            return False
+        now = time.perf_counter()
+        with self._cond:
+            if self._pending is not None or self._busy or now < self._next_due:
+                self.stats['dropped'] += 1
+                return False
+            self._pending = (self._copy(frame), meta)
+            if self.max_fps:
+                self._next_due = now + 1.0 / self.max_fps
+            self.stats['submitted'] += 1
+            self._cond.notify()
+        return True
+
+    def get_stats(self):
+        stats = self.stats.copy()
+        stats['clients'] = self.clients
+        stats['mjpeg_clients'] = self.frame_stream.subscribers
+        return stats
+
+    def _copy(self, frame):
+        """把帧拷贝到预分配的快照缓冲区（编码线程空闲时才会调用，单个缓冲区即可）"""
+        data = frame.data if isinstance(frame, Nv12Frame) else frame
+        if self._snapshot is None or self._snapshot.shape != data.shape or self._snapshot.dtype != data.dtype:
+            self._snapshot = np.empty_like(data)
+        np.copyto(self._snapshot, data)
+        if isinstance(frame, Nv12Frame):
+            return Nv12Frame(self._snapshot, frame.width, frame.height, frame.display_width, frame.display_height)
+        return self._snapshot
+
+    def _prepare(self, frame):
+        """按输入尺寸准备缩放/镜像缓冲区，尺寸不变时直接复用"""
+        shape = frame.shape
+        if shape == self._shape:
+            return
+        height, width = shape[:2]
+        if self.max_width and width > self.max_width:
+            out_w = self.max_width
+            out_h = max(1, round(height * self.max_width / width))
+            self._resized = np.empty((out_h, out_w) + shape[2:], dtype=frame.dtype)
+        else:
+            out_w, out_h = width, height
+            self._resized = None
+        self._flipped = np.empty((out_h, out_w) + shape[2:], dtype=frame.dtype)
+        self._shape = shape
+
+    def encode(self, frame):
+        """
+        缩放、镜像并编码为 JPEG
+
+        Returns:
+            bytes | None
+        """
+        if isinstance(frame, Nv12Frame):
+            # 前端绘制骨架时推理线程不再转换 BGR，转换在编码线程中完成
+            frame = frame.to_bgr()
+        self._prepare(frame)
+        if self._resized is not None:
+            cv2.resize(frame, (self._resized.shape[1], self._resized.shape[0]), dst=self._resized,
+                       interpolation=cv2.INTER_AREA)
+            frame = self._resized
+        if self.flip:
+            cv2.flip(frame, 1, dst=self._flipped)
+            frame = self._flipped
+        ret, buffer = cv2.imencode('.jpg', frame, self._params)
+        return buffer.tobytes() if ret else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.is_running and self._pending is None:
+                    self._cond.wait()
+                if not self.is_running:
+                    break
+                frame, meta = self._pending
+                self._pending = None
+                self._busy = True
+
+            start = time.perf_counter()
+            try:
+                jpeg = self.encode(frame)
+            except Exception as e:
+                print(f"[PREVIEW] 编码失败: {e}")
+                jpeg = None
+
+            if jpeg is not None:
+                pipeline_metrics.record('encode', time.perf_counter() - start)
+                self.stats['encoded'] += 1
+                self.stats['last_bytes'] = len(jpeg)
+                self.frame_stream.publish(jpeg)
+                if self.on_frame is not None:
+                    try:
+                        self.on_frame(jpeg, meta)
+                    except Exception as e:
+                        print(f"[PREVIEW] 推送失败: {e}")
+
+            with self._cond:
+                self._busy = False
@@ -1,4 +1,4 @@
-from flask import render_template, jsonify, request, send_from_directory
+from flask import render_template, jsonify, request, send_from_directory, Response
 from flask_socketio import emit
 import cv2
 import base64
@@ -6,21 +6,157 @@ import json
 import threading
 import time
 import traceback
+import logging
 from queue import Queue
 import numpy as np
 import os
 
-from UpperMachine.utils import get_latest_config_path
+from UpperMachine.config_store import config_store
 from UpperMachine.pose_estimation.PoseDetectionService import PoseDetectionService
+from UpperMachine.pose_estimation.batch import decode_images, decode_jpeg
 from UpperMachine.pose_estimation.sendcommand import send_command_timeout as send_command
 from UpperMachine.pose_estimation.bytes2command import bytes2command, mouse2command
 from UpperMachine.pose_estimation.state2bytes_vector import words2bytes
 from UpperMachine.utils import convert_numpy_to_list
-
-# 创建服务实例
-pose_service = PoseDetectionService()
+from UpperMachine.flask.upload import UPLOAD_MIMETYPES, UploadError, iter_uploaded_frames
+from UpperMachine.flask.preview import (
+    STREAM_TRANSPORTS, SKELETON, MJPEG_BOUNDARY, FrameStream, PreviewEncoder, keypoints_payload
+)
+
+# 创建服务实例：模型与摄像头在 register_routes 之后于后台加载，不阻塞 Web 服务启动
+pose_service = PoseDetectionService(lazy=True)
+
+logger = logging.getLogger("FLASK")
+
+# REST 检测接口等待模型加载的最长时间（秒）
+READY_TIMEOUT = 60
+
+# 最新一帧预览 JPEG，供 /api/stream.mjpg 读取
+frame_stream = FrameStream()
+
+
+def get_stream_config():
+    """预览推送方式与骨架绘制位置，前端据此决定如何显示画面"""
+    transport = pose_service.preview_config.get('transport', 'base64')
+    if transport not in STREAM_TRANSPORTS:
+        logger.warning("未知的预览推送方式 %s，使用 base64", transport)
+        transport = 'base64'
+    overlay = 'server' if pose_service.draw_on_server else 'client'
+    return {
+        'transport': transport,
+        'mjpeg_url': '/api/stream.mjpg',
+        'overlay': overlay,
+        'skeleton': SKELETON,
+        # 与服务端绘制时使用的关键点置信度阈值一致
+        'keypoint_threshold': getattr(pose_service.estimator, 'kpt_conf_thres', 0.1)
+    }
 
 def register_routes(app, socketio):
+    preview_config = pose_service.preview_config
+    stream_config = get_stream_config()
+    preview_state = {'last_stats_time': 0.0}
+
+    def emit_preview(jpeg, meta):
+        """预览编码线程每编码一帧调用一次：按推送方式发送 frame_update，并低频发送 stats"""
+        transport = stream_config['transport']
+        payload = dict(meta)
+        if transport == 'base64':
+            payload['image'] = base64.b64encode(jpeg).decode('utf-8')
+            payload['stats'] = pose_service.get_stats()
+        elif transport == 'binary':
+            payload['image'] = jpeg
+        socketio.emit('frame_update', payload)
+
+        # 统计信息单独低频发送
+        now = time.monotonic()
+        if transport != 'base64' and now - preview_state['last_stats_time'] >= preview_config.get('stats_interval', 1.0):
+            socketio.emit('stats', pose_service.get_stats())
+            preview_state['last_stats_time'] = now
+
+    # 预览编码线程：只在有客户端时编码，帧率与尺寸与推理无关
+    preview_encoder = PreviewEncoder(
+        frame_stream, emit_preview,
+        quality=preview_config.get('jpeg_quality', 70),
+        max_fps=preview_config.get('max_fps', 15),
+        max_width=preview_config.get('max_width', 640)
+    )
+    preview_encoder.start()
+
+    def on_load_progress(progress):
+        """模型与摄像头的加载进度转发给前端；加载完成后按实际的估计器更新 stream_config"""
+        if progress['ready']:
+            stream_config.update(get_stream_config())
+            socketio.emit('stream_config', stream_config)
+        socketio.emit('startup_progress', progress)
+
+    pose_service.on_load_progress = on_load_progress
+    if pose_service.preload_model:
+        pose_service.start_loading()
+
+    # 加载完成前收到的开始检测请求，加载完成后再启动（期间收到停止请求则取消）
+    # waiter: 等待加载完成的线程（同一时刻只有一个）；camera_thread: 当前的推送线程
+    startup_state = {'start_pending': False, 'waiter': None, 'camera_thread': None}
+    start_lock = threading.Lock()
+
+    def start_when_ready():
+        if not pose_service.wait_ready():
+            startup_state['start_pending'] = False
+            # 检测未能启动，恢复开关状态，前端的开始按钮才能再次使用
+            pose_service.detection_enabled = False
+            socketio.emit('config_updated', {'detection_enabled': False})
+            socketio.emit('error', {'message': f'模型加载失败: {pose_service.load_error}'})
+        elif startup_state['start_pending']:
+            error = start_detection()
+            if error:
+                socketio.emit('error', {'message': error})
+
+    def start_detection():
+        """
+        打开摄像头并启动检测线程；模型与摄像头尚未加载完成时在后台等待加载后再启动
+
+        Returns:
+            str | None: 错误信息
+        """
+        with start_lock:
+            if not pose_service.ready.is_set():
+                startup_state['start_pending'] = True
+                waiter = startup_state['waiter']
+                if waiter is None or not waiter.is_alive():
+                    waiter = threading.Thread(target=start_when_ready, daemon=True)
+                    startup_state['waiter'] = waiter
+                    waiter.start()
+                return None
+
+            startup_state['start_pending'] = False
+            if pose_service.is_running:
+                return None
+            if not pose_service.camera.is_opened:
+                try:
+                    pose_service.camera.open()
+                except Exception as e:
+                    return f'无法打开摄像头: {e}'
+            # 上一个推送线程在 is_running 为 False 后最多再处理一帧，等它退出，避免两个线程同时取帧
+            previous = startup_state['camera_thread']
+            if previous is not None and previous.is_alive():
+                previous.join(timeout=2.0)
+            # 清除上次发送状态以确保首次状态会被发送
+            pose_service.reset_sent_state()
+            if pose_service.start():
+                thread = threading.Thread(target=camera_thread, daemon=True)
+                startup_state['camera_thread'] = thread
+                thread.start()
+            return None
+
+    def wait_service():
+        """REST 检测接口在模型加载完成前等待；超时或加载失败时返回 503 响应，否则返回 None"""
+        if pose_service.wait_ready(READY_TIMEOUT):
+            return None
+        if pose_service.load_error is not None:
+            message = f'模型加载失败: {pose_service.load_error}'
+        else:
+            message = '模型与摄像头仍在加载中，请稍后再试'
+        return jsonify({'success': False, 'status': 'error', 'message': message}), 503
+
     # 提供Source目录下的静态文件访问
     @app.route('/Source/<path:filename>')
     def serve_source_files(filename):
@@ -63,7 +199,7 @@ def register_routes(app, socketio):
                     pose_service.send_stop_command()
                 # 当从关闭 -> 开启时，清除上次状态以确保首次状态会被发送
                 if not prev and new_val:
-                    pose_service.last_sent_state = None
+                    pose_service.reset_sent_state()
                 pose_service.send_commands_enabled = new_val
             
             if 'fps_limit' in data:
@@ -80,19 +216,18 @@ def register_routes(app, socketio):
                 new_val = bool(data['detection_enabled'])
                 # 从开启 -> 关闭：停止检测并发送全0停止命令，避免设备持续输出
                 if prev and not new_val:
+                    startup_state['start_pending'] = False
                     pose_service.stop()
-                # 从关闭 -> 开启：尝试打开摄像头并启动处理线程
+                # 从关闭 -> 开启：尝试打开摄像头并启动处理线程（模型未加载完成时加载后自动启动）
                 if not prev and new_val:
-                    if not pose_service.camera.is_opened:
-                        try:
-                            pose_service.camera.open()
-                        except Exception as e:
-                            return jsonify({'status': 'error', 'message': f'无法打开摄像头: {e}'}), 500
-                    # 清除上次发送状态以确保首次状态会被发送
-                    pose_service.last_sent_state = None
-                    pose_service.start()
-                    threading.Thread(target=camera_thread, daemon=True).start()
-                pose_service.detection_enabled = new_val
+                    # 先置位：模型加载失败时由等待线程恢复为 False
+                    pose_service.detection_enabled = True
+                    error = start_detection()
+                    if error:
+                        pose_service.detection_enabled = False
+                        return jsonify({'status': 'error', 'message': error}), 500
+                else:
+                    pose_service.detection_enabled = new_val
             
             return jsonify({'status': 'success'})
         
@@ -108,7 +243,39 @@ def register_routes(app, socketio):
     @app.route('/api/stats')
     def stats():
         """统计信息API"""
-        return jsonify(pose_service.get_stats())
+        stats = pose_service.get_stats(include_timings=True)
+        stats['preview'] = preview_encoder.get_stats()
+        return jsonify(stats)
+
+    @app.route('/api/metrics')
+    def metrics():
+        """
+        各阶段耗时的 p50/p95/p99 与 glass-to-HID 延迟
+
+        默认返回 JSON；?format=prometheus 或 Accept: text/plain 时返回 Prometheus 文本格式。
+        ?reset=1 在返回后清空统计，便于对比调整前后的数据。
+        """
+        fmt = request.args.get('format')
+        if fmt is None:
+            accept = request.headers.get('Accept', '')
+            fmt = 'prometheus' if 'text/plain' in accept and 'application/json' not in accept else 'json'
+
+        if fmt == 'prometheus':
+            response = Response(pose_service.timings.to_prometheus(),
+                                mimetype='text/plain', content_type='text/plain; version=0.0.4; charset=utf-8')
+        else:
+            response = jsonify(pose_service.get_metrics())
+
+        if request.args.get('reset') in ('1', 'true'):
+            pose_service.timings.reset()
+        return response
+
+    @app.route('/api/stream.mjpg')
+    def stream_mjpeg():
+        """MJPEG 预览流（multipart/x-mixed-replace），可直接用作 <img> 的 src"""
+        return Response(frame_stream.mjpeg(),
+                        mimetype=f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}',
+                        headers={'Cache-Control': 'no-cache'})
 
     @app.route('/api/latest_keypoints')
     def latest_keypoints():
@@ -125,33 +292,37 @@ def register_routes(app, socketio):
     def handle_connect():
         """客户端连接"""
         print('客户端已连接')
+        preview_encoder.add_client()
         emit('status', {'message': '连接成功'})
+        emit('stream_config', stream_config)
+        emit('startup_progress', pose_service.load_progress)
 
     @socketio.on('disconnect')
     def handle_disconnect():
         """客户端断开连接"""
         print('客户端已断开连接')
+        preview_encoder.remove_client()
 
     @socketio.on('start_camera')
     def handle_start_camera():
         """启动摄像头"""
         if not pose_service.is_running:
-            if not pose_service.camera.is_opened:
-                try:
-                    pose_service.camera.open()
-                except Exception as e:
-                    socketio.emit('error', {'message': f'无法打开摄像头: {e}'})
-                    return
-            # 启动异步捕获和推理服务
-            pose_service.start()
-            # 启动Flask推送线程（推理是在此线程内触发的）
-            threading.Thread(target=camera_thread, daemon=True).start()
-            emit('status', {'message': '摄像头及推理服务已启动'})
+            # 启动异步捕获和推理服务，以及Flask推送线程（推理是在此线程内触发的）
+            error = start_detection()
+            if error:
+                socketio.emit('error', {'message': error})
+                return
+            if pose_service.ready.is_set():
+                emit('status', {'message': '摄像头及推理服务已启动'})
+            else:
+                emit('status', {'message': '模型与摄像头正在加载，完成后自动启动'})
 
     @socketio.on('stop_camera')
     def handle_stop_camera():
         """停止摄像头"""
-        pose_service.is_running = False
+        startup_state['start_pending'] = False
+        # 同时停止捕获线程与流水线线程（只设 is_running 时它们会继续运行）；不发送停止命令
+        pose_service.stop(send_stop=False)
         # 不关闭摄像头，保持打开状态以便重启
         emit('status', {'message': '摄像头已停止'})
 
@@ -170,7 +341,7 @@ def register_routes(app, socketio):
                     pose_service.send_stop_command()
                 # 从关闭 -> 开启时清除上次状态
                 if not prev and new_val:
-                    pose_service.last_sent_state = None
+                    pose_service.reset_sent_state()
                 pose_service.send_commands_enabled = new_val
             
             if 'fps_limit' in data:
@@ -186,18 +357,17 @@ def register_routes(app, socketio):
                 prev = getattr(pose_service, 'detection_enabled', False)
                 new_val = bool(data['detection_enabled'])
                 if prev and not new_val:
+                    startup_state['start_pending'] = False
                     pose_service.stop()
                 if not prev and new_val:
-                    if not pose_service.camera.is_opened:
-                        try:
-                            pose_service.camera.open()
-                        except Exception as e:
-                            emit('error', {'message': f'无法打开摄像头: {e}'})
-                            return
-                    pose_service.last_sent_state = None
-                    pose_service.start()
-                    threading.Thread(target=camera_thread, daemon=True).start()
-                pose_service.detection_enabled = new_val
+                    pose_service.detection_enabled = True
+                    error = start_detection()
+                    if error:
+                        pose_service.detection_enabled = False
+                        emit('error', {'message': error})
+                        return
+                else:
+                    pose_service.detection_enabled = new_val
             
             emit('config_updated', {
                 'confidence_threshold': pose_service.confidence_threshold,
@@ -212,8 +382,9 @@ def register_routes(app, socketio):
             emit('error', {'message': f'配置更新失败: {e}'})
 
     def camera_thread():
-        """视频流推送线程 (Consumer)"""
+        """推理线程：取帧、检测，并把结果交给预览编码线程（不等待编码）"""
         print("[FLASK] 视频推送线程启动")
+        socketio.emit('stream_config', stream_config)
         
         while pose_service.is_running:
             # 模型作为消费者，主动获取并处理最新帧
@@ -221,25 +392,20 @@ def register_routes(app, socketio):
             processed_frame, state_name, poses, words_list = pose_service.capture_and_process()
             
             if processed_frame is not None:
-                try:
-                    # 编码为JPEG (镜像翻转可选)
-                    display_frame = cv2.flip(processed_frame, 1)
-                    ret, buffer = cv2.imencode('.jpg', display_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                    if ret:
-                        frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                        
-                        # 发送数据
-                        socketio.emit('frame_update', {
-                            'image': frame_base64,
-                            'state': state_name,
-                            'poses_count': len(poses) if poses is not None else 0,
-                            'instruction': words_list,
-                            'stats': pose_service.get_stats(),
-                            'fps': round(pose_service.stats['current_fps'], 1),
-                            'person_detected': len(poses) > 0 if poses is not None else False
-                        })
-                except Exception as e:
-                    print(f"[FLASK] 推送循环异常: {e}")
+                meta = {
+                    'state': state_name,
+                    'poses_count': len(poses) if poses is not None else 0,
+                    'instruction': words_list,
+                    'fps': round(pose_service.stats['current_fps'], 1),
+                    'person_detected': len(poses) > 0 if poses is not None else False
+                }
+                if not pose_service.draw_on_server:
+                    # 前端叠加绘制：关键点已按预览画面镜像并归一化
+                    frame_shape = processed_frame.shape
+                    meta['keypoints'] = keypoints_payload(poses, frame_shape)
+                    meta['frame_size'] = [frame_shape[1], frame_shape[0]]
+                # 没有客户端时直接跳过；编码跟不上时只保留最新一帧
+                preview_encoder.submit(processed_frame, meta)
             else:
                 time.sleep(0.01)
 
@@ -340,14 +506,18 @@ def register_routes(app, socketio):
         file = request.files['image']
         if file.filename == '':
             return jsonify({'status': 'error', 'message': 'No image selected'})
-        
+
+        not_ready = wait_service()
+        if not_ready is not None:
+            return not_ready
+
         try:
             # 读取图像
             img_array = np.frombuffer(file.read(), np.uint8)
             img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
             
             # 检测姿态
-            poses, processed_img = pose_service.estimator.infer(img, True)
+            poses, processed_img = pose_service.executor.submit(img, is_draw=True).result()
             
             # 编码为base64
             _, buffer = cv2.imencode('.jpg', processed_img)
@@ -357,71 +527,78 @@ def register_routes(app, socketio):
         except Exception as e:
             return jsonify({'status': 'error', 'message': str(e)})
 
+    def detect_uploaded_frames():
+        """
+        detect_keypoints_batch 的二进制上传路径（multipart/form-data 或 application/octet-stream，见 upload.py）
+
+        边接收边解码，帧按到达顺序送入推理执行器。原始 JPEG 同时只持有一帧，
+        解码后的图像随执行器的一块增长：ov（forward_batch）为 batch_chunk 帧，其余估计器为 max_in_flight + 1 帧
+        """
+        estimator = pose_service.estimator
+        # 帧在执行器的 REST 线程中读取与解码，不能再通过 request 代理访问
+        upload = request._get_current_object()
+        indices = []
+
+        def images():
+            for index, mirrored, jpeg in iter_uploaded_frames(upload):
+                indices.append(index)
+                img = decode_jpeg(jpeg, mirrored)
+                if img is None:
+                    logger.warning("第 %d 帧图像解码失败 (索引: %s)", len(indices), index)
+                yield img
+
+        poses, found = pose_service.executor.submit_batch(images()).result()
+        results = {}
+        for row, index in enumerate(indices):
+            results[index] = convert_numpy_to_list(estimator.pose2dict(poses[row:row + 1])) if found[row] else {}
+        logger.info("批量检测完成，共处理 %d 帧", len(results))
+        return jsonify({'success': True, 'keypoints': results})
+
     @app.route('/api/detect_keypoints_batch', methods=['POST'])
     def detect_keypoints_batch():
         """批量检测关键点"""
+        not_ready = wait_service()
+        if not_ready is not None:
+            return not_ready
         try:
-            print("=== 开始批量检测关键点 ===")
+            if request.mimetype in UPLOAD_MIMETYPES:
+                return detect_uploaded_frames()
+
             data = request.json
             frames = data.get('frames', [])
-            print(f"接收到 {len(frames)} 帧数据")
-
-            results = {}
-            for i, frame_data in enumerate(frames):
-                print(f"处理第 {i+1} 帧，索引: {frame_data.get('index', 'unknown')}")
-                try:
-                    # 解码base64图像
-                    img_data_str = frame_data['imageData']
-                    print(f"图像数据长度: {len(img_data_str)}")
-                    if ',' in img_data_str:
-                        img_data = base64.b64decode(img_data_str.split(',')[1])
-                    else:
-                        img_data = base64.b64decode(img_data_str)
-                    print(f"解码后数据长度: {len(img_data)}")
-
-                    nparr = np.frombuffer(img_data, np.uint8)
-                    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    print(f"图像解码成功，尺寸: {img.shape if img is not None else 'None'}")
-
-                    if img is None:
-                        print("图像解码失败")
-                        results[frame_data['index']] = {}
-                        continue
-
-                    # 确保送入检测的图像为“镜像方向”
-                    # 规则：前端如未镜像帧内容（frame_data.mirrored 为 False 或缺失），后端在此进行水平翻转
-                    mirrored_flag = frame_data.get('mirrored', False)
-                    if not mirrored_flag:
-                        img = cv2.flip(img, 1)  # 1: 水平翻转
-
-                    # 检测关键点
-                    print("开始检测关键点...")
-                    poses, _ = pose_service.estimator.infer(img, is_draw=False)
-                    print(f"检测结果: poses = {poses}")
-
-                    if poses is not None and len(poses) > 0:
-                        print(f"检测到 {len(poses)} 个姿势")
-                        # 转换为字典格式
-                        keypoints_dict = pose_service.estimator.pose2dict(poses)
-                        print(f"关键点字典: {keypoints_dict}")
-
-                        # 将numpy数组转换为Python列表，确保JSON序列化
-                        keypoints_dict = convert_numpy_to_list(keypoints_dict)
-                        print(f"转换后关键点字典: {keypoints_dict}")
-                        results[frame_data['index']] = keypoints_dict
-                    else:
-                        print("未检测到姿势")
-                        results[frame_data['index']] = {}
-
-                except Exception as frame_error:
-                    print(f"处理第 {i+1} 帧时出错: {str(frame_error)}")
-                    results[frame_data['index']] = {}
-
-            print(f"批量检测完成，共处理 {len(results)} 帧")
-            print(f"返回结果: {results}")
+            logger.info("开始批量检测关键点，共 %d 帧", len(frames))
+            debug = logger.isEnabledFor(logging.DEBUG)
+
+            # 并行解码，再由估计器一次处理所有成功解码的帧
+            images = decode_images(frames)
+            valid = []
+            for i, img in enumerate(images):
+                if img is None:
+                    logger.warning("第 %d 帧图像解码失败 (索引: %s)", i + 1, frames[i].get('index', 'unknown'))
+                else:
+                    valid.append(i)
+
+            estimator = pose_service.estimator
+            poses, found = pose_service.executor.submit_batch([images[i] for i in valid]).result()
+
+            results = {frame_data['index']: {} for frame_data in frames}
+            for row, i in enumerate(valid):
+                if found[row]:
+                    # 转换为字典格式，并将numpy数组转换为Python列表，确保JSON序列化
+                    keypoints_dict = convert_numpy_to_list(estimator.pose2dict(poses[row:row + 1]))
+                    results[frames[i]['index']] = keypoints_dict
+                    if debug:
+                        logger.debug("第 %d 帧检测到姿势: %s", i + 1, keypoints_dict)
+                elif debug:
+                    logger.debug("第 %d 帧未检测到姿势", i + 1)
+
+            logger.info("批量检测完成，共处理 %d 帧", len(results))
             return jsonify({'success': True, 'keypoints': results})
+        except UploadError as e:
+            logger.warning("批量检测请求格式错误: %s", e)
+            return jsonify({'success': False, 'message': str(e)}), 400
         except Exception as e:
-            print(f"批量检测关键点出错: {str(e)}")
+            logger.error("批量检测关键点出错: %s", e)
             traceback.print_exc()
             return jsonify({'success': False, 'message': str(e)})
 
@@ -450,8 +627,7 @@ def register_routes(app, socketio):
             data['pose_img'] = pose_img
             
             # 读取现有配置
-            with open(get_latest_config_path(), 'r', encoding='utf-8') as f:
-                configs = json.load(f)
+            configs = config_store.get_snapshot().to_list()
             
             # 检查是否已存在相同索引的姿势
             existing_index = None
@@ -485,6 +661,7 @@ def register_routes(app, socketio):
             # 保存配置
             with open('Source/configs.json', 'w', encoding='utf-8') as f:
                 json.dump(configs, f, indent=4, ensure_ascii=False)
+            config_store.invalidate()
             
             return jsonify({'success': True, 'message': f'姿势保存成功，已备份到 {backup_path}'})
         except Exception as e:
@@ -501,8 +678,7 @@ def register_routes(app, socketio):
             target_index = data['index']
 
             # 读取现有配置
-            with open(get_latest_config_path(), 'r', encoding='utf-8') as f:
-                configs = json.load(f)
+            configs = config_store.get_snapshot().to_list()
 
             # 查找并删除
             new_configs = [p for p in configs if p.get('index') != target_index]
@@ -525,6 +701,7 @@ def register_routes(app, socketio):
             # 同时更新 configs.json 以防万一
             with open('Source/configs.json', 'w', encoding='utf-8') as f:
                 json.dump(new_configs, f, indent=4, ensure_ascii=False)
+            config_store.invalidate()
 
             return jsonify({'success': True, 'message': f'删除成功，已由于生成新配置 {new_config_path}'})
         except Exception as e:
@@ -534,9 +711,7 @@ def register_routes(app, socketio):
     def get_poses():
         """获取所有姿势"""
         try:
-            with open(get_latest_config_path(), 'r', encoding='utf-8') as f:
-                configs = json.load(f)
-            return jsonify(configs)
+            return jsonify(config_store.get_snapshot().configs)
         except Exception as e:
             return jsonify([])
 
@@ -544,8 +719,7 @@ def register_routes(app, socketio):
     def get_pose(pose_index):
         """获取特定姿势"""
         try:
-            with open(get_latest_config_path(), 'r', encoding='utf-8') as f:
-                configs = json.load(f)
+            configs = config_store.get_snapshot().configs
             
             for pose in configs:
                 if pose['index'] == pose_index:
@@ -560,8 +734,7 @@ def register_routes(app, socketio):
         """删除姿势"""
         try:
             # 读取现有配置
-            with open(get_latest_config_path(), 'r', encoding='utf-8') as f:
-                configs = json.load(f)
+            configs = config_store.get_snapshot().configs
             
             # 找到并删除姿势
             new_configs = [pose for pose in configs if pose['index'] != pose_index]
@@ -576,21 +749,49 @@ def register_routes(app, socketio):
             
             # 保存备份
             with open(backup_path, 'w', encoding='utf-8') as f:
-                json.dump(configs, f, indent=4, ensure_ascii=False)
+                json.dump(list(configs), f, indent=4, ensure_ascii=False)
             
             # 保存更新后的配置
             with open('Source/configs.json', 'w', encoding='utf-8') as f:
                 json.dump(new_configs, f, indent=4, ensure_ascii=False)
+            config_store.invalidate()
             
             return jsonify({'success': True, 'message': f'姿势删除成功，已备份到 {backup_path}'})
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)})
 
 
+    def render_uploaded_frame():
+        """
+        render_keypoints 的二进制上传路径：请求体为一帧 JPEG（image/jpeg，或只含一帧的 multipart / octet-stream），
+        直接返回绘制后的 JPEG，是否检测到人放在 X-Has-Poses 响应头中
+        """
+        frame = next(iter_uploaded_frames(request), None)
+        if frame is None:
+            return jsonify({'success': False, 'message': '缺少图像数据'}), 400
+        _, mirrored, jpeg = frame
+        img = decode_jpeg(jpeg, mirrored)
+        if img is None:
+            return jsonify({'success': False, 'message': '图像解码失败'}), 400
+
+        poses, processed_frame = pose_service.executor.submit(img, is_draw=True).result()
+        if processed_frame is None:
+            return jsonify({'success': False, 'message': '关键点渲染失败'}), 500
+        _, buffer = cv2.imencode('.jpg', processed_frame)
+        has_poses = poses is not None and len(poses) > 0
+        return Response(buffer.tobytes(), mimetype='image/jpeg',
+                        headers={'X-Has-Poses': '1' if has_poses else '0'})
+
     @app.route('/api/render_keypoints', methods=['POST'])
     def render_keypoints():
         """渲染带有关键点的图像"""
+        not_ready = wait_service()
+        if not_ready is not None:
+            return not_ready
         try:
+            if request.mimetype in UPLOAD_MIMETYPES:
+                return render_uploaded_frame()
+
             data = request.json
             frame_data = data.get('frame', {})
             
@@ -615,8 +816,8 @@ def register_routes(app, socketio):
             if not mirrored_flag:
                 img = cv2.flip(img, 1)
 
-            # 使用estimator进行检测并绘制关键点
-            poses, processed_frame = pose_service.estimator.infer(img, is_draw=True)
+            # 经推理执行器检测并绘制关键点
+            poses, processed_frame = pose_service.executor.submit(img, is_draw=True).result()
             
             if processed_frame is not None:
                 # 将处理后的图像编码为base64
@@ -632,6 +833,8 @@ def register_routes(app, socketio):
             else:
                 return jsonify({'success': False, 'message': '关键点渲染失败'})
                 
+        except UploadError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         except Exception as e:
             print(f"渲染关键点出错: {str(e)}")
             traceback.print_exc()
@@ -663,14 +866,11 @@ def register_routes(app, socketio):
         """获取姿态配置列表"""
         try:
             
-            config_path = get_latest_config_path()
-            if not os.path.exists(config_path):
+            snapshot = config_store.get_snapshot()
+            if not os.path.exists(snapshot.path):
                 return jsonify([])
             
-            with open(config_path, 'r', encoding='utf-8') as f:
-                configs = json.load(f)
-            
-            return jsonify(configs)
+            return jsonify(snapshot.configs)
         except Exception as e:
             print(f"获取姿态配置失败: {str(e)}")
             return jsonify({'error': str(e)}), 500
@@ -686,12 +886,12 @@ def register_routes(app, socketio):
             if not pose_name:
                 return jsonify({'status': 'error', 'message': '缺少姿态名称'}), 400
             
-            config_path = get_latest_config_path()
+            snapshot = config_store.get_snapshot()
+            config_path = snapshot.path
             if not os.path.exists(config_path):
                 return jsonify({'status': 'error', 'message': '配置文件不存在'}), 404
             
-            with open(config_path, 'r', encoding='utf-8') as f:
-                configs = json.load(f)
+            configs = snapshot.to_list()
             
             # 找到对应的姿态配置并更新按键
             updated = False
@@ -716,6 +916,7 @@ def register_routes(app, socketio):
             # 同时更新主配置文件
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(configs, f, indent=4, ensure_ascii=False)
+            config_store.invalidate()
             
             return jsonify({'status': 'success', 'message': f'按键配置已更新，已备份到 {backup_path}'})
         except Exception as e:
@@ -0,0 +1,159 @@
+"""
+录制帧的二进制上传（/api/detect_keypoints_batch、/api/render_keypoints 的非 JSON 请求体）
+
+JSON 请求体中的 base64 data URL 需要整体读入并解析后才能逐帧 b64decode，峰值内存随帧数线性增长。
+这里直接从 request.stream 分块读取，每收齐一帧 JPEG 就交给调用方解码，同时只持有一帧的原始数据：
+
+- multipart/form-data：每个名为 frame 的文件字段是一帧 JPEG，文件名（不含扩展名）为帧索引，
+  非数字时按出现顺序编号；文本字段 mirrored 作用于其后的帧
+- application/octet-stream：连续的 [FRAME_HEADER][JPEG] 记录，头部为小端 (index: u32, flags: u8, length: u32)，
+  flags 的 bit0 表示 mirrored
+- image/jpeg：整个请求体是一帧（仅 render_keypoints 使用）
+
+三种格式都可用查询参数 ?mirrored=1 指定默认的 mirrored。
+"""
+
+import struct
+
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+FRAME_HEADER = struct.Struct('<IBI')
+FLAG_MIRRORED = 0x01
+
+# 单帧上限，防止损坏的长度字段让服务端分配过大的缓冲区
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+UPLOAD_MIMETYPES = ('multipart/form-data', 'application/octet-stream', 'image/jpeg')
+
+
+class UploadError(ValueError):
+    """请求体格式错误"""
+
+
+def _parse_bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _read_exact(stream, size):
+    """读取 size 字节；在记录开头遇到 EOF 时返回 b''，记录中途截断时抛出 UploadError"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(min(remaining, CHUNK_SIZE))
+        if not chunk:
+            if remaining == size:
+                return b''
+            raise UploadError(f"请求体在记录中途结束（缺少 {remaining} 字节）")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def iter_length_prefixed(stream):
+    """
+    解析 application/octet-stream 请求体，mirrored 取自每条记录头部的 flags
+
+    Args:
+        stream: 类文件对象（request.stream）
+
+    Yields:
+        tuple: (index, mirrored, data)
+    """
+    while True:
+        header = _read_exact(stream, FRAME_HEADER.size)
+        if not header:
+            return
+        index, flags, length = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_BYTES:
+            raise UploadError(f"第 {index} 帧长度 {length} 超过上限 {MAX_FRAME_BYTES}")
+        data = _read_exact(stream, length)
+        if len(data) != length:
+            raise UploadError(f"第 {index} 帧数据不完整")
+        yield index, bool(flags & FLAG_MIRRORED), data
+
+
+def iter_multipart(stream, boundary, mirrored=False):
+    """
+    用 werkzeug 的 sans-IO 解析器增量解析 multipart/form-data 请求体
+
+    Args:
+        stream: 类文件对象（request.stream）
+        boundary (str | bytes): Content-Type 中的 boundary
+        mirrored (bool): 在 mirrored 字段出现之前使用的默认值
+
+    Yields:
+        tuple: (index, mirrored, data)
+    """
+    if isinstance(boundary, str):
+        boundary = boundary.encode('latin-1')
+    decoder = MultipartDecoder(boundary)
+    next_index = 0
+    part = None  # 当前部分: ('frame', index, [chunks], size) / ('mirrored', [chunks]) / None（忽略）
+    eof = False
+    while True:
+        event = decoder.next_event()
+        if isinstance(event, NeedData):
+            if eof:
+                raise UploadError("multipart 请求体不完整")
+            chunk = stream.read(CHUNK_SIZE)
+            if chunk:
+                decoder.receive_data(chunk)
+            else:
+                eof = True
+                decoder.receive_data(None)
+        elif isinstance(event, File):
+            if event.name == 'frame':
+                stem = event.filename.rsplit('.', 1)[0]
+                index = int(stem) if stem.isdigit() else next_index
+                next_index = index + 1
+                part = ['frame', index, [], 0]
+            else:
+                part = None
+        elif isinstance(event, Field):
+            part = ['mirrored', []] if event.name == 'mirrored' else None
+        elif isinstance(event, Data):
+            if part is not None:
+                if part[0] == 'frame':
+                    part[2].append(event.data)
+                    part[3] += len(event.data)
+                    if part[3] > MAX_FRAME_BYTES:
+                        raise UploadError(f"第 {part[1]} 帧超过上限 {MAX_FRAME_BYTES} 字节")
+                else:
+                    part[1].append(event.data)
+            if not event.more_data and part is not None:
+                if part[0] == 'frame':
+                    yield part[1], mirrored, b''.join(part[2])
+                else:
+                    mirrored = _parse_bool(b''.join(part[1]).decode('latin-1'))
+                part = None
+        elif isinstance(event, Epilogue):
+            return
+
+
+def iter_uploaded_frames(request):
+    """
+    按 Content-Type 逐帧读取请求体，不经过 request.form / request.files（它们会先缓存整个请求体）
+
+    Yields:
+        tuple: (index, mirrored, data)，data 为 JPEG 字节
+
+    Raises:
+        UploadError: 不支持的 Content-Type 或请求体格式错误
+    """
+    mirrored = _parse_bool(request.args.get('mirrored', '0'))
+    mimetype = request.mimetype
+    if mimetype == 'multipart/form-data':
+        boundary = request.mimetype_params.get('boundary')
+        if not boundary:
+            raise UploadError("multipart 请求缺少 boundary")
+        yield from iter_multipart(request.stream, boundary, mirrored)
+    elif mimetype == 'application/octet-stream':
+        yield from iter_length_prefixed(request.stream)
+    elif mimetype == 'image/jpeg':
+        data = request.stream.read(MAX_FRAME_BYTES + 1)
+        if len(data) > MAX_FRAME_BYTES:
+            raise UploadError(f"图像超过上限 {MAX_FRAME_BYTES} 字节")
+        yield 0, mirrored, data
+    else:
+        raise UploadError(f"不支持的 Content-Type: {mimetype}")
@@ -0,0 +1,31 @@
+"""
+日志配置：统一格式，级别由 flask_config.yml 中的 log_level 控制
+
+热路径中的日志使用 logger.debug("... %s", value) 这种惰性格式化写法，
+或先判断 logger.isEnabledFor(logging.DEBUG)，级别未开启时不产生格式化开销。
+"""
+
+import logging
+
+LOG_FORMAT = '[%(name)s] [%(asctime)s.%(msecs)03d] [%(levelname)s] %(message)s'
+LOG_DATEFMT = '%H:%M:%S'
+
+
+def setup_logging(level="INFO"):
+    """
+    配置根日志记录器（只添加一次处理器）
+
+    Args:
+        level (str | int): 日志级别，如 "DEBUG"、"INFO"、"WARNING"
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+
+    root = logging.getLogger()
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT))
+        root.addHandler(handler)
+    root.setLevel(level)
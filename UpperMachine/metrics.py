@@ -0,0 +1,210 @@
+"""
+检测流程的耗时统计
+
+各阶段（STAGES：采集、前处理、推理、解码、状态匹配、发送、JPEG 编码）把耗时写入
+pipeline_metrics，由 /api/metrics 以 JSON 或 Prometheus 文本格式输出。
+另有 total（process_frame 整帧）、glass_to_hid、frame_age 三项端到端统计。
+
+实时画面的帧与 REST 接口（上传图片、录制页面批量检测）的帧经过同一个估计器，
+推理执行器在 REST 帧的阶段内设置 scope('rest')，这些阶段记录为 rest_preprocess 等，
+不混入实时画面的百分位数。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# 实时画面各阶段的名称，各模块统一使用
+STAGES = ('capture', 'preprocess', 'inference', 'decode', 'match', 'send', 'encode')
+
+
+class LatencyHistogram:
+    """
+    HDR 风格的对数-线性直方图（单位：微秒）
+
+    每个 2 的幂区间再等分为 SUB_BUCKETS 个桶，相对误差不超过 1/SUB_BUCKETS（约 3%）。
+    桶数固定，写入只是一次整数运算和一次列表自增，不随样本数增长，也不需要排序。
+    超过 max_us 的样本计入最后一个桶，max 仍记录真实值。
+
+    写入不加锁：多个线程同时写同一阶段时偶发少计一个样本，对百分位数没有影响。
+    """
+
+    SUB_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BITS
+
+    def __init__(self, max_us=60 * 1000 * 1000):
+        self.max_us = max_us
+        self.counts = [0] * (self._index(max_us) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.max_value_us = 0
+
+    @classmethod
+    def _index(cls, value):
+        # 小于 2*SUB_BUCKETS 的值每个整数一个桶，之后每翻一倍桶宽也翻一倍
+        shift = value.bit_length() - cls.SUB_BITS - 1
+        if shift < 0:
+            shift = 0
+        return (shift << cls.SUB_BITS) + (value >> shift)
+
+    @classmethod
+    def _bucket_range(cls, index):
+        """返回桶覆盖的 [lower, upper] 微秒值"""
+        shift = max(0, (index >> cls.SUB_BITS) - 1)
+        lower = (index - (shift << cls.SUB_BITS)) << shift
+        return lower, lower + (1 << shift) - 1
+
+    def add(self, seconds):
+        value = int(seconds * 1000000)
+        if value < 0:
+            value = 0
+        elif value > self.max_value_us:
+            self.max_value_us = value
+        self.count += 1
+        self.total_us += value
+        # 与 _index 相同，内联以减少函数调用
+        if value > self.max_us:
+            value = self.max_us
+        shift = value.bit_length() - self.SUB_BITS - 1
+        if shift > 0:
+            value = (shift << self.SUB_BITS) + (value >> shift)
+        self.counts[value] += 1
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)):
+        """
+        Args:
+            quantiles (tuple): 升序排列的分位点，取值 0~1
+
+        Returns:
+            list: 各分位点对应的耗时（微秒，取所在桶的上界，不超过 max）
+        """
+        counts = list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return [0] * len(quantiles)
+
+        results = []
+        targets = iter(quantiles)
+        q = next(targets)
+        seen = 0
+        for index, n in enumerate(counts):
+            if not n:
+                continue
+            seen += n
+            while q is not None and seen >= q * total:
+                results.append(min(self._bucket_range(index)[1], self.max_value_us))
+                q = next(targets, None)
+            if q is None:
+                break
+        while len(results) < len(quantiles):
+            results.append(self.max_value_us)
+        return results
+
+    def summary(self, quantiles=(0.5, 0.95, 0.99)):
+        """
+        Returns:
+            dict: {'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}
+        """
+        result = {'count': self.count}
+        if self.count == 0:
+            return result
+        result['mean_ms'] = round(self.total_us / self.count / 1000, 3)
+        for q, v in zip(quantiles, self.percentiles(quantiles)):
+            result[f'p{round(q * 100):d}_ms'] = round(v / 1000, 3)
+        result['max_ms'] = round(self.max_value_us / 1000, 3)
+        return result
+
+
+class PipelineMetrics:
+    """
+    按阶段名称记录耗时，每个阶段一个 LatencyHistogram
+
+    enabled 为 False 时 record() 直接返回，调用方只剩一次属性判断的开销。
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, stage, seconds):
+        """
+        Args:
+            stage (str): 阶段名称，如 'inference'、'glass_to_hid'；当前线程设置了 scope 时加上 "<scope>_" 前缀
+            seconds (float): 耗时（秒）
+        """
+        if not self.enabled:
+            return
+        scope = getattr(self._local, 'scope', None)
+        if scope is not None:
+            stage = f"{scope}_{stage}"
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram())
+        histogram.add(seconds)
+
+    @contextmanager
+    def scope(self, name):
+        """在 with 块内（当前线程）记录的阶段加上 "<name>_" 前缀；name 为 None 时不加前缀"""
+        previous = getattr(self._local, 'scope', None)
+        self._local.scope = name
+        try:
+            yield
+        finally:
+            self._local.scope = previous
+
+    def current_scope(self):
+        """当前线程的 scope，用于在其他线程（推理回调、线程池）中沿用"""
+        return getattr(self._local, 'scope', None)
+
+    def bind(self, fn):
+        """包装 fn，使其在其他线程中执行时沿用调用 bind 时的 scope"""
+        scope = self.current_scope()
+
+        def wrapper(*args, **kwargs):
+            with self.scope(scope):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def reset(self):
+        """清空所有阶段的统计"""
+        with self._lock:
+            self._histograms = {}
+            self.started_at = time.time()
+
+    def summary(self):
+        """返回 {stage: LatencyHistogram.summary()}"""
+        return {stage: histogram.summary(self.QUANTILES)
+                for stage, histogram in list(self._histograms.items())}
+
+    def to_prometheus(self, prefix="pose_pipeline"):
+        """
+        以 Prometheus 文本格式输出（summary 类型，单位：秒）
+
+        Returns:
+            str: 文本内容，Content-Type 为 text/plain; version=0.0.4
+        """
+        name = f"{prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Per-stage latency of the pose detection pipeline.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, histogram in sorted(self._histograms.items()):
+            label = f'stage="{stage}"'
+            for q, v in zip(self.QUANTILES, histogram.percentiles(self.QUANTILES)):
+                lines.append(f'{name}{{{label},quantile="{q}"}} {v / 1e6:.6f}')
+            lines.append(f'{name}_sum{{{label}}} {histogram.total_us / 1e6:.6f}')
+            lines.append(f'{name}_count{{{label}}} {histogram.count}')
+        lines.append(f"# HELP {prefix}_metrics_enabled Whether per-stage timing is being recorded.")
+        lines.append(f"# TYPE {prefix}_metrics_enabled gauge")
+        lines.append(f"{prefix}_metrics_enabled {int(self.enabled)}")
+        return "\n".join(lines) + "\n"
+
+
+# 全局实例：检测流程各模块（相机、模型、发送线程、视频推送）共用
+pipeline_metrics = PipelineMetrics()
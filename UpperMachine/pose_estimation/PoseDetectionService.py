@@ -3,14 +3,28 @@ import yaml
 import os
 import threading
 import math
+import logging
 import numpy as np
 
+from UpperMachine.log import setup_logging
+from UpperMachine.metrics import pipeline_metrics
+from UpperMachine.pose_estimation.executor import InferenceExecutor, PRIORITY_LIVE
+from UpperMachine.pose_estimation.frame_ring import FrameRing
+from UpperMachine.pose_estimation.pipeline import InferencePipeline, required_ring_slots
+
+logger = logging.getLogger("PROCESS")
+
 # 动态导入 Estimator
 def load_estimator(backend, config):
     if backend == "ov":
         from UpperMachine.pose_estimation.ov.Estimator import HumanPoseEstimator
+        from UpperMachine.pose_estimation.ov.utils import MODEL_CACHE_ROOT
         model_config = config['models']['ov']
-        return HumanPoseEstimator(model_config['model_path'], model_config['device'])
+        return HumanPoseEstimator(model_config['model_path'], model_config['device'],
+                                  performance_hint=model_config.get('performance_hint'),
+                                  num_requests=model_config.get('num_requests', 1),
+                                  max_people=model_config.get('max_people'),
+                                  cache_dir=model_config.get('cache_dir', MODEL_CACHE_ROOT))
     elif backend == "fastdeploy":
         from UpperMachine.pose_estimation.fastdeploy.Estimator import HumanPoseEstimator
         model_config = config['models']['fastdeploy']
@@ -23,46 +37,74 @@ def load_estimator(backend, config):
         raise ValueError(f"Unsupported backend: {backend}")
 
 from UpperMachine.pose_estimation.posedict2state_vector import posedict2state
-from UpperMachine.pose_estimation.state2bytes_vector import state2bytes, state2words
-from UpperMachine.pose_estimation.bytes2command import bytes2command, mouse2command, combine_mouse_actions
-from UpperMachine.pose_estimation.sendcommand import send_command_timeout as send_command
+from UpperMachine.pose_estimation.state2bytes_vector import state2mask, lookup_keys
+from UpperMachine.pose_estimation.bytes2command import parse_mouse_actions
+from UpperMachine.pose_estimation.sendcommand import get_send_function, get_transport_stats, close_sessions
+from UpperMachine.pose_estimation.command_dispatcher import CommandDispatcher
 from UpperMachine.pose_estimation.cameras import create_camera
+from UpperMachine.pose_estimation.nv12 import Nv12Frame
 
 class PoseDetectionService:
     """姿态检测服务"""
 
-    def __init__(self, config_path="Source/flask_config.yml"):
+    def __init__(self, config_path="Source/flask_config.yml", estimator=None, camera=None, lazy=False):
+        """
+        Args:
+            config_path (str): 配置文件路径
+            estimator: 可选，直接使用的姿态估计器（不按 pose_backend 加载），用于调试与基准测试
+            camera: 可选，直接使用的相机对象（不按 camera.type 创建）
+            lazy (bool): 为 True 时不在构造时加载模型、打开摄像头，由 start_loading() / wait_ready() 在后台完成；
+                加载完成前 estimator / camera / executor 为 None
+        """
         # 加载配置文件
         with open(config_path, 'r') as f:
             config = yaml.safe_load(f)
+        self._config = config
+
+        # 日志级别：DEBUG 时输出每帧各阶段耗时
+        setup_logging(config.get('log_level', 'INFO'))
 
-        backend = config['pose_backend']
-        self.estimator = load_estimator(backend, config)
+        self.backend = config['pose_backend']
+        self._estimator_arg = estimator
+        self._camera_arg = camera
+        self.estimator = None
+        # 所有推理（相机帧与 REST 接口）都经由执行器，不在其他线程中直接调用 estimator 的推理接口
+        self.executor = None
+        self.camera = None
 
         # 摄像头配置
         camera_config = config.get('camera', {})
-        camera_type = camera_config.get('type', 'rdkx5_imx219')
-        camera_kwargs = {
+        self.camera_kind = camera_config.get('type', 'rdkx5_imx219')
+        self.camera_kwargs = {
             'width': camera_config.get('width', 640),
             'height': camera_config.get('height', 480),
             'sensor_width': camera_config.get('sensor_width', 1920),
             'sensor_height': camera_config.get('sensor_height', 1080),
             'device_id': camera_config.get('device_id', 0)
         }
-        self.camera = create_camera(camera_type, **camera_kwargs)
         
         # 摄像头视场角类型 (72camera 或 120width_camera)
         self.camera_type_fov = camera_config.get('camera_type', '72camera')
-        self.width = camera_kwargs['width']
-        self.height = camera_kwargs['height']
+        self.width = self.camera_kwargs['width']
+        self.height = self.camera_kwargs['height']
         
         print(f"[SERVICE] 当前摄像头 FOV 类型: {self.camera_type_fov}")
 
-        try:
-            self.camera.open()
-        except Exception as e:
-            print(f"Warning: Failed to open camera during initialization: {e}")
-            self.camera.is_opened = False
+        # 采集格式：nv12 时相机帧直接送入模型，跳过 NV12→BGR→NV12 的往返转换（加载后确定）
+        self.capture_format = camera_config.get('capture_format', 'bgr')
+        self.capture_nv12 = False
+
+        # 启动时是否在后台预先加载模型与摄像头；为 False 时推迟到第一次检测
+        self.preload_model = config.get('preload_model', True)
+        self.ready = threading.Event()
+        self.load_error = None
+        self.load_progress = {'stage': 'pending', 'message': '等待加载模型与摄像头', 'progress': 0.0,
+                              'ready': False, 'error': None}
+        # 加载进度回调 on_load_progress(progress)，由 Flask 通过 Socket.IO 转发给前端
+        self.on_load_progress = None
+        self._load_lock = threading.Lock()
+        self._load_thread = None
+        self._loaded_parts = set()
 
         # 配置参数
         self.confidence_threshold = config.get('confidence_threshold', 0.3)
@@ -71,13 +113,37 @@ class PoseDetectionService:
         self.detection_enabled = config.get('detection_enabled', False)
         self.fps_limit = config.get('fps_limit', 30)
         self.target_ip = config.get('target_ip', '192.168.2.121')
+        self.target_port = config.get('target_port', 80)
+        # 发送方式：tcp 为每条命令新建连接；tcp_session 复用长连接（需下位机支持流式接收）
+        self.command_transport = config.get('command_transport', 'tcp')
+        self.send_command = get_send_function(self.command_transport)
+        # 鼠标报文的发送方式，可单独设为 udp：过期的相对位移宁可丢弃也不要迟到
+        self.mouse_transport = config.get('mouse_transport', self.command_transport)
+        self.send_mouse_command = get_send_function(self.mouse_transport)
         self.mouse_step_size = config.get('mouse_step_size', 10)
         self.use_async = config.get('use_async', False) # 是否使用异步捕获（串行 vs 异步）
+        # 异步模式下帧环形缓冲区的槽位数与过期帧阈值
+        self.frame_ring_slots = config.get('frame_ring_slots', 3)
+        self.frame_stale_ms = config.get('frame_stale_ms', 100)
+        # 流水线模式：前处理、推理、后处理分别在不同线程中进行（隐含异步捕获）
+        self.pipeline_enabled = config.get('pipeline_enabled', False)
+        # 预览画面推送方式等配置，由 Flask 推送线程读取
+        self.preview_config = config.get('preview', {})
+        # overlay 为 client 时由前端根据关键点绘制骨架，推理线程不再绘制与拷贝画面
+        self.draw_on_server = self.preview_config.get('overlay', 'server') != 'client'
+
+        # 命令由独立线程发送，推理线程只提交、不等待网络
+        self.dispatcher = CommandDispatcher(
+            self.send_command, self.send_mouse_command, self.target_ip, port=self.target_port,
+            timeout=1.0, max_mouse_delta=config.get('max_mouse_delta', 127 * 4)
+        )
+        self.dispatcher.start()
 
         # 状态变量
         self.is_running = False
-        self.frame_buffer = None  # 异步最新帧池
-        self.buffer_condition = threading.Condition() # 用于同步捕获与处理
+        self.frame_ring = None  # 异步模式的帧环形缓冲区（start 时创建）
+        self._borrowed_slot = None  # 推理线程当前借出的槽位，下一次取帧时归还
+        self.pipeline = None  # 流水线模式的前处理/推理线程（start 时创建）
         self.capture_thread = None
 
         self.current_frame = None
@@ -86,10 +152,16 @@ class PoseDetectionService:
         self.fps_counter = 0
         self.last_fps_time = time.time()
         self.last_sent_state = None  # 上次发送的姿势状态
+        self.last_sent_mask = None  # 上次发送的姿势状态掩码
+        self.last_kb_mask = 0  # 上次发送的键盘按键掩码（None 表示未知，下一帧必定提交）
 
         # 采样频率控制：不超过处理频率的3倍，确保数据新鲜
         self.capture_interval = 1.0 / (max(1, self.fps_limit) * 3)
 
+        # 各阶段耗时直方图，通过 /api/metrics 查看百分位数与 glass-to-HID 延迟
+        self.timings = pipeline_metrics
+        self.timings.enabled = config.get('metrics_enabled', True)
+
         self.stats = {
             'frames_processed': 0,
             'poses_detected': 0,
@@ -103,21 +175,158 @@ class PoseDetectionService:
         # 命令历史
         self.command_history = []
 
+        if not lazy:
+            self.load()
+
+    def _report(self, stage, message, error=None):
+        """更新加载进度（progress 为已完成的部分：模型、摄像头各占一半）并通知 on_load_progress"""
+        progress = 1.0 if self.ready.is_set() or error else len(self._loaded_parts) / 2
+        self.load_progress = {'stage': stage, 'message': message, 'progress': progress,
+                              'ready': self.ready.is_set(), 'error': error}
+        logger.info("[%s] %s", stage, message)
+        callback = self.on_load_progress
+        if callback is not None:
+            try:
+                callback(self.load_progress)
+            except Exception as e:
+                logger.warning("加载进度回调出错: %s", e)
+
+    def load(self):
+        """
+        加载估计器、打开摄像头并启动推理执行器（两者在不同线程中同时进行）
+
+        Raises:
+            Exception: 估计器加载失败；摄像头打开失败只打印警告，与原来的初始化一致
+        """
+        if self.ready.is_set():
+            return
+        self.load_error = None
+        self._loaded_parts = set()
+        start = time.perf_counter()
+        camera_box = {}
+
+        def open_camera():
+            try:
+                camera = self._camera_arg if self._camera_arg is not None else \
+                    create_camera(self.camera_kind, **self.camera_kwargs)
+            except Exception as e:
+                camera_box['error'] = e
+                return
+            try:
+                camera.open()
+            except Exception as e:
+                print(f"Warning: Failed to open camera during initialization: {e}")
+                camera.is_opened = False
+            camera_box['camera'] = camera
+            self._loaded_parts.add('camera')
+            self._report('camera', f"摄像头 {self.camera_kind} 已就绪")
+
+        camera_thread = threading.Thread(target=open_camera, name='service-camera-open', daemon=True)
+        camera_thread.start()
+        try:
+            self._report('estimator', f"正在加载 {self.backend} 模型")
+            estimator = self._estimator_arg if self._estimator_arg is not None else \
+                load_estimator(self.backend, self._config)
+            # rdkx5 的构造函数不加载模型（第一次推理时才加载），在此加载，避免第一帧在推理线程中承担加载耗时
+            if callable(getattr(estimator, 'load', None)):
+                estimator.load()
+            self._loaded_parts.add('estimator')
+            self._report('estimator', f"{self.backend} 模型已加载")
+            camera_thread.join()
+            if 'error' in camera_box:
+                raise camera_box['error']
+        except Exception as e:
+            self.load_error = e
+            self._report('error', f"加载失败: {e}", error=str(e))
+            raise
+        camera = camera_box['camera']
+
+        self.capture_nv12 = (
+            self.capture_format == 'nv12'
+            and camera.supports_nv12
+            and getattr(estimator, 'supports_nv12', False)
+        )
+        if self.capture_format == 'nv12' and not self.capture_nv12:
+            print(f"Warning: capture_format 'nv12' is not supported by camera '{self.camera_kind}' / backend '{self.backend}', using bgr")
+
+        executor = InferenceExecutor(estimator)
+        executor.start()
+        self.estimator, self.camera, self.executor = estimator, camera, executor
+        self.ready.set()
+        self._report('ready', f"模型与摄像头加载完成（{time.perf_counter() - start:.1f} s）")
+
+    def start_loading(self):
+        """
+        在后台线程中调用 load()；正在加载时不重复启动，上次加载失败时重新加载
+
+        Returns:
+            threading.Thread | None: 加载线程，已加载完成时返回 None
+        """
+        with self._load_lock:
+            if self.ready.is_set():
+                return None
+            if self._load_thread is None or not self._load_thread.is_alive():
+                self._load_thread = threading.Thread(target=self._load_in_background, name='service-loader',
+                                                     daemon=True)
+                self._load_thread.start()
+            return self._load_thread
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.error("模型或摄像头加载失败: %s", e)
+
+    def wait_ready(self, timeout=None):
+        """
+        确保已开始加载，并等待加载结束
+
+        Returns:
+            bool: 是否已加载完成（超时或加载失败时为 False，失败原因见 load_error）
+        """
+        thread = self.start_loading()
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready.is_set()
+
+    @property
+    def target_ip(self):
+        return self._target_ip
+
+    @target_ip.setter
+    def target_ip(self, value):
+        # 运行中修改下位机地址（/api/config 等）时同步给发送线程
+        self._target_ip = value
+        dispatcher = getattr(self, 'dispatcher', None)
+        if dispatcher is not None:
+            dispatcher.server_ip = value
+
     def _capture_loop(self):
         """独立的摄像头捕获线程 (Producer)"""
         print(f"[CAMERA] 异步捕获线程已启动，最高采样频率: {1.0/self.capture_interval:.1f} Hz")
+        ring = self.frame_ring
         while self.is_running:
             loop_start = time.time()
+            slot = None
             try:
                 if self.camera.is_opened:
-                    frame = self.camera.capture()
-                    if frame is not None:
-                        with self.buffer_condition:
-                            self.frame_buffer = frame # 始终覆盖，池子只保留最新一张
-                            self.buffer_condition.notify_all() # 通知处理线程
+                    # 取一个可写槽位；未读帧会被最新帧覆盖，推理线程借出的槽位不会被改写
+                    slot = ring.acquire()
+                    if slot is not None:
+                        captured_at = time.perf_counter()
+                        frame = self._capture_frame(slot.buffer)
+                        if frame is not None:
+                            # 记住本帧的存储，下次写入同一槽位时相机直接复用
+                            slot.buffer = frame.data if isinstance(frame, Nv12Frame) else frame
+                            ring.publish(slot, frame, captured_at)
+                        else:
+                            ring.abort(slot)
+                        slot = None
                 else:
                     time.sleep(0.5)
             except Exception as e:
+                if slot is not None:
+                    ring.abort(slot)
                 if "Failed to capture" not in str(e):
                     print(f"[CAMERA] 捕获错误: {e}")
                 time.sleep(0.1)
@@ -128,63 +337,131 @@ class PoseDetectionService:
                 time.sleep(self.capture_interval - elapsed)
 
     def start(self):
-        """启动后台服务"""
+        """
+        启动后台服务
+
+        Returns:
+            bool: 是否由本次调用启动（已在运行时返回 False，调用方不应再启动推送线程）
+        """
         if not self.is_running:
             self.is_running = True
-            if self.use_async:
+            self.dispatcher.start()
+            if self.use_async or self.pipeline_enabled:
                 # 仅在异步模式下启动独立的捕获线程
+                num_slots = self.frame_ring_slots
+                if self.pipeline_enabled:
+                    # 流水线中的每个阶段（及每个并发推理请求）各借出一个槽位
+                    num_slots = max(num_slots, required_ring_slots(self.executor.max_in_flight))
+                self.frame_ring = FrameRing(num_slots, stale_after=self.frame_stale_ms / 1000)
+                self._borrowed_slot = None
                 self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
                 self.capture_thread.start()
+                if self.pipeline_enabled:
+                    self.pipeline = InferencePipeline(self.executor.client(PRIORITY_LIVE), self.frame_ring,
+                                                      is_draw=self.draw_on_server)
+                    self.pipeline.start()
             else:
                 print("[SERVICE] 当前处于串行模式 (Serial Mode)")
+            return True
+        return False
+
+    def _capture_frame(self, out=None):
+        """
+        按配置的采集格式取一帧（BGR 数组或 Nv12Frame）
+
+        Args:
+            out (np.ndarray): 可复用的存储（上一次写入同一槽位的帧数据），相机支持时直接写入
+        """
+        start = time.perf_counter()
+        if self.capture_nv12:
+            frame = self.camera.capture_nv12_into(out)
+        else:
+            frame = self.camera.capture_into(out)
+        self.timings.record('capture', time.perf_counter() - start)
+        return frame
 
     def capture_and_process(self):
         """获取最新一帧并处理 (支持异步池或串行捕获)"""
         try:
             frame = None
+            captured_at = None
             
-            if self.use_async:
-                # 异步模式：从池子中取最新帧
-                with self.buffer_condition:
-                    # 如果没有新帧，则等待（满足“模型等待摄像头”的需求）
-                    while self.frame_buffer is None and self.is_running:
-                        if not self.buffer_condition.wait(timeout=1.0):
-                            return None, None, None, None
-                    
-                    if self.frame_buffer is not None:
-                        frame = self.frame_buffer.copy()
-                        self.frame_buffer = None # 取走后清空，确保下一波是新鲜的
+            pipeline = self.pipeline
+            if pipeline is not None:
+                # 流水线模式：取下一帧已完成推理的帧，在本线程中完成后处理
+                self._release_frame()
+                item = pipeline.get(timeout=1.0)
+                if item is None:
+                    return None, None, None, None
+                self._borrowed_slot = item.slot
+                return self.process_frame(item.frame, item.captured_at, pipelined=item, pipeline=pipeline)
+            elif self.use_async:
+                # 异步模式：归还上一帧的槽位（调用方此时已用完上一次返回的画面），再借出最新帧
+                # 没有新帧时等待（满足“模型等待摄像头”的需求），借出的帧不拷贝
+                self._release_frame()
+                if self.frame_ring is None:
+                    return None, None, None, None
+                slot = self.frame_ring.borrow(timeout=1.0)
+                if slot is None:
+                    return None, None, None, None
+                self._borrowed_slot = slot
+                frame, captured_at = slot.frame, slot.captured_at
             else:
                 # 串行模式：直接实时捕获
                 if self.camera.is_opened:
-                    frame = self.camera.capture()
+                    captured_at = time.perf_counter()
+                    frame = self._capture_frame()
             
             if frame is None:
                 return None, None, None, None
                 
-            return self.process_frame(frame)
+            return self.process_frame(frame, captured_at)
         except Exception as e:
             print(f"[PROCESS] 处理错误: {e}")
             return None, None, None, None
 
-    def process_frame(self, frame):
-        """处理单帧图像"""
+    def _release_frame(self):
+        """归还异步/流水线模式下借出的槽位"""
+        slot = self._borrowed_slot
+        if slot is not None:
+            self._borrowed_slot = None
+            self.frame_ring.release(slot)
+
+    def process_frame(self, frame, captured_at=None, pipelined=None, pipeline=None):
+        """
+        处理单帧图像
+
+        Args:
+            frame (np.ndarray | Nv12Frame): 相机帧
+            captured_at (float): 可选，开始采集该帧的时刻（time.perf_counter()），用于统计 glass-to-HID 延迟
+            pipelined (PipelineItem): 流水线模式下已完成前处理与推理的帧，此处只做后处理
+            pipeline (InferencePipeline): pipelined 所属的流水线（stop() 后 self.pipeline 为 None）
+
+        Returns:
+            tuple: (processed_frame, state_name, poses, words_list)；
+                draw_on_server 为 False 时 processed_frame 是未绘制的相机帧（可能是 Nv12Frame）
+        """
         try:
-            process_start = time.time()
-            print(f"[PROCESS] 开始处理帧")
+            timings = self.timings
+            process_start = time.perf_counter()
+            if captured_at is None:
+                captured_at = process_start
 
             # 姿态检测
-            infer_start = time.time()
-            poses, processed_frame = self.estimator.infer(frame, is_draw=True)
-            infer_end = time.time()
-            print(f"[PROCESS] 推理时间: {(infer_end - infer_start)*1000:.2f} ms")
+            if pipelined is None:
+                poses, processed_frame = self.executor.infer(frame, self.draw_on_server, PRIORITY_LIVE).result()
+            else:
+                # total 从该帧开始前处理算起，包含在流水线中等待的时间
+                process_start = pipelined.started_at
+                poses, processed_frame = pipeline.finish(pipelined)
+            # preprocess / inference / decode 由估计器分别记录
+            infer_end = time.perf_counter()
 
             state_name = None
             words_list = []
 
             if poses is not None and len(poses) > 0:
                 # 转换为字典格式
-                dict_start = time.time()
                 pose_dict = self.estimator.pose2dict(poses)
                 
                 # 处理镜像产生的左右互换逻辑
@@ -205,30 +482,26 @@ class PoseDetectionService:
                 serialized_keypoints = {k: [float(x) for x in v] for k, v in pose_dict.items()}
                 self.last_raw_keypoints = serialized_keypoints
 
-                dict_end = time.time()
-                print(f"[PROCESS] 字典转换时间: {(dict_end - dict_start)*1000:.2f} ms")
-
                 # 转换为状态
-                state_start = time.time()
                 state_dicts = posedict2state(pose_dict, current_camera=self.camera_type_fov)
-                state_end = time.time()
-                print(f"[PROCESS] 状态转换时间: {(state_end - state_start)*1000:.2f} ms")
                 
                 state = [s['index'] for s in state_dicts]  # 仅保留索引
                 state_name = [s['name'] for s in state_dicts]  # 仅保留名称
                 
-                # 计算对应的按键
-                words_start = time.time()
-                words_list = state2words(state) or []
-                words_end = time.time()
-                print(f"[PROCESS] 按键计算时间: {(words_end - words_start)*1000:.2f} ms")
+                # 计算对应的按键（按状态掩码查表）
+                state_mask = state2mask(state)
+                key_report = lookup_keys(state_mask)
+                words_list = list(key_report.words)
+                # match：关键点转换、姿势匹配与按键查表
+                timings.record('match', time.perf_counter() - infer_end)
                 
                 self.current_state = state
                 self.current_poses = pose_dict
 
                 # 发送命令
                 if self.send_commands_enabled:
-                    self._send_command(state)
+                    # 只提交给发送线程，send 由 CommandDispatcher 记录
+                    self._send_command(state, state_mask, key_report, captured_at)
 
                 self.stats['poses_detected'] += 1
 
@@ -238,53 +511,55 @@ class PoseDetectionService:
             # 计算FPS
             self._update_fps()
             
-            process_end = time.time()
-            print(f"[PROCESS] 总处理时间: {(process_end - process_start)*1000:.2f} ms")
+            total = time.perf_counter() - process_start
+            timings.record('total', total)
+            logger.debug("总处理时间: %.2f ms (推理 %.2f ms)", total * 1000, (infer_end - process_start) * 1000)
             
             return processed_frame, state_name, poses, words_list
 
         except Exception as e:
             print(f"帧处理错误: {e}")
+            if isinstance(frame, Nv12Frame):
+                frame = frame.to_bgr()
             return frame, None, None, None
 
-    def _send_command(self, state):
-        """发送控制命令"""
+    def _send_command(self, state, state_mask=None, key_report=None, captured_at=None):
+        """发送控制命令（提交给发送线程，captured_at 为帧的采集时刻）"""
         try:
-            # 1. 转换状态为字节和动作
-            keyboard_bytes, mouse_actions = state2bytes(state)
+            # 1. 转换状态为掩码，并查表得到按键与鼠标动作
+            if state_mask is None:
+                state_mask = state2mask(state)
+            if key_report is None:
+                key_report = lookup_keys(state_mask)
+            keyboard_bytes = key_report.keyboard_bytes
+            mouse_actions = key_report.mouse_actions
 
-            # 2. 识别是否包含瞬时动作（位移或滚轮）
-            # -7, -8: 滚轮; -9, -10: 左右移动
-            has_transient_mouse = any(a in [-7, -8, -9, -10] for a in mouse_actions)
+            # 2. 是否包含瞬时动作（位移或滚轮：-7, -8, -9, -10），编译映射表时已算好
+            has_transient_mouse = key_report.has_transient_mouse
 
             # 3. 基础过滤：如果状态未变且没有瞬时动作，由于 HID 指令具有持久化特性，无需重复发送
-            if self.last_sent_state == state and not has_transient_mouse:
+            if self.last_sent_mask == state_mask and not has_transient_mouse:
                 return
 
-            # 4. 处理键盘指令：仅在键盘按键列表变化时发送
-            current_kb = sorted(keyboard_bytes)
-            last_kb = sorted(getattr(self, 'last_kb_sent', []))
-            if current_kb != last_kb:
-                command = bytes2command(keyboard_bytes)
-                send_command(server_ip=self.target_ip, command=command, timeout=1.0)
-                self.last_kb_sent = keyboard_bytes
+            # 4. 处理键盘指令：仅在键盘按键集合变化时提交（发送线程只保留最新状态）
+            if key_report.keyboard_mask != self.last_kb_mask:
+                self.dispatcher.submit_keyboard(keyboard_bytes, captured_at=captured_at)
+                self.last_kb_mask = key_report.keyboard_mask
 
-            # 5. 处理鼠标指令：将所有鼠标动作合并为一个报文发送
+            # 5. 处理鼠标指令：将所有鼠标动作合并为一个报文提交，未发出的位移会累加
             # 如果包含移动动作，需要强制发送（ignore_cache=True）以实现连续移动效果
-            mouse_command = combine_mouse_actions(mouse_actions, step_size=self.mouse_step_size)
-            result = send_command(
-                server_ip=self.target_ip, 
-                command=mouse_command, 
-                timeout=1.0,
-                ignore_cache=has_transient_mouse
-            )
+            button_value, x_rel, y_rel, wheel = parse_mouse_actions(mouse_actions, step_size=self.mouse_step_size)
+            self.dispatcher.submit_mouse(button_value, x_rel, y_rel, wheel, force=has_transient_mouse,
+                                         captured_at=captured_at)
+            result = 'queued'
 
             # 更新状态记录
             self.last_sent_state = state
+            self.last_sent_mask = state_mask
 
             # 记录命令历史
             command_info = {
-                'command': f"keyboard: {keyboard_bytes}, mouse: {mouse_actions}",
+                'command': f"keyboard: {list(keyboard_bytes)}, mouse: {list(mouse_actions)}",
                 'result': result,
                 'timestamp': time.time(),
                 'state': state
@@ -302,12 +577,21 @@ class PoseDetectionService:
             print(f"命令发送错误: {e}")
             return None
 
+    def reset_sent_state(self):
+        """清除上次发送的状态，下一帧无论姿势是否变化都会重新提交键盘与鼠标命令"""
+        self.last_sent_state = None
+        self.last_sent_mask = None
+        self.last_kb_mask = None
+
     def send_stop_command(self):
         """发送停止命令（全0键盘命令）以停止HID输出"""
         try:
-            # 发送全0键盘命令
-            command = bytes2command([])  # 空列表会生成全0命令
-            result = send_command(server_ip=self.target_ip, command=command, timeout=1.0)
+            # 发送全0键盘命令：覆盖尚未发出的键盘状态，并等待发送线程发完
+            self.dispatcher.submit_keyboard([])  # 空列表会生成全0命令
+            # 下位机已松开所有按键：保持同一姿势时下一帧也要重新按下
+            self.reset_sent_state()
+            self.last_kb_mask = 0
+            result = self.dispatcher.flush(timeout=2.0)
             
             # 记录命令历史
             command_info = {
@@ -328,10 +612,22 @@ class PoseDetectionService:
             print(f"停止命令发送错误: {e}")
             return None
 
-    def stop(self):
-        """停止检测并发送停止命令"""
+    def stop(self, send_stop=True):
+        """
+        停止检测（捕获线程与流水线线程），并发送停止命令
+
+        Args:
+            send_stop (bool): 是否向下位机发送全 0 的停止命令
+        """
         # 停止循环但不关闭摄像头，以便可以快速恢复
         self.is_running = False
+        if self.frame_ring is not None:
+            self.frame_ring.close()
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.stop()
+        if not send_stop:
+            return
         try:
             self.send_stop_command()
         except Exception as e:
@@ -347,13 +643,49 @@ class PoseDetectionService:
             self.fps_counter = 0
             self.last_fps_time = current_time
 
-    def get_stats(self):
-        """获取统计信息"""
+    def get_stats(self, include_timings=False):
+        """
+        获取统计信息
+
+        Args:
+            include_timings (bool): 是否附带各阶段耗时的百分位数（需要遍历直方图，不宜每帧调用）
+        """
         stats = self.stats.copy()
+        if include_timings:
+            stats['timings'] = self.timings.summary()
         stats['is_running'] = self.is_running
+        stats['transport'] = get_transport_stats()
+        stats['dispatch'] = self.dispatcher.get_stats()
+        stats['startup'] = self.load_progress
+        if self.executor is not None:
+            stats['executor'] = self.executor.get_stats()
+        if self.frame_ring is not None:
+            stats['frame_ring'] = self.frame_ring.get_stats()
+        if self.pipeline is not None:
+            stats['pipeline'] = self.pipeline.get_stats()
         return stats
 
+    def get_metrics(self):
+        """
+        获取各阶段耗时的百分位数
+
+        Returns:
+            dict: {'enabled', 'uptime_s', 'current_fps', 'stages': {stage: summary}, 'glass_to_hid': summary}
+        """
+        stages = self.timings.summary()
+        return {
+            'enabled': self.timings.enabled,
+            'uptime_s': round(time.time() - self.timings.started_at, 1),
+            'current_fps': self.stats['current_fps'],
+            'stages': stages,
+            'glass_to_hid': stages.pop('glass_to_hid', {'count': 0})
+        }
+
     def close(self):
         """关闭服务"""
-        if hasattr(self, 'camera') and self.camera:
-            self.camera.close()
\ No newline at end of file
+        if self.camera is not None:
+            self.camera.close()
+        if self.executor is not None:
+            self.executor.stop()
+        self.dispatcher.stop()
+        close_sessions()
\ No newline at end of file
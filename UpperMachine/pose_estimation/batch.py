@@ -0,0 +1,157 @@
+"""
+多帧批量检测（/api/detect_keypoints_batch，姿势录制页面一次提交几十帧）
+
+- decode_images：线程池中并行解码 base64 图像（cv2.imdecode / flip 不占用 GIL）
+- pipelined_infer_batch：不支持真正批量推理的估计器按 前处理 / 推理 / 后处理 三段流水线逐帧执行，
+  第 i 帧后处理时第 i+1 帧已在推理
+- stack_poses：每帧的第一个人（与 pose2dict 一致）拼成一个 (B, 17, 3) 数组
+
+各 HumanPoseEstimator 的 infer_batch(images) 返回 stack_poses 的结果。
+"""
+
+import base64
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("BATCH")
+
+# 解码 / 前处理线程数（不超过 CPU 核数）
+DECODE_WORKERS = 4
+
+_EXHAUSTED = object()
+
+
+def decode_jpeg(data, mirrored=False):
+    """
+    解码一帧 JPEG（或其他 cv2 支持的格式）
+
+    Args:
+        data (bytes): 图像文件数据
+        mirrored (bool): 前端是否已镜像画面；未镜像时在此水平翻转，送入检测的图像统一为镜像方向
+
+    Returns:
+        np.ndarray | None: BGR 图像，解码失败时返回 None
+    """
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is not None and not mirrored:
+        img = cv2.flip(img, 1)  # 1: 水平翻转
+    return img
+
+
+def decode_image(image_data, mirrored=False):
+    """解码一帧 base64 图像（可带 data URL 前缀），参数与返回值同 decode_jpeg()"""
+    if ',' in image_data:
+        image_data = image_data.split(',')[1]
+    return decode_jpeg(base64.b64decode(image_data), mirrored)
+
+
+def decode_images(frames, max_workers=DECODE_WORKERS):
+    """
+    并行解码 detect_keypoints_batch 请求中的帧
+
+    Args:
+        frames (list): [{'imageData': str, 'mirrored': bool, ...}, ...]
+
+    Returns:
+        list: 与 frames 等长，元素为 BGR 图像，解码失败的帧为 None
+    """
+    def decode(frame_data):
+        try:
+            return decode_image(frame_data['imageData'], frame_data.get('mirrored', False))
+        except Exception:
+            return None
+
+    workers = min(max_workers, len(frames), os.cpu_count() or 1)
+    if workers <= 1:
+        return [decode(frame_data) for frame_data in frames]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-decode') as pool:
+        return list(pool.map(decode, frames))
+
+
+def stack_poses(poses_list, num_keypoints=17):
+    """
+    Args:
+        poses_list (list): 每帧 infer() 得到的 poses，(N, 17, 3) 或空
+
+    Returns:
+        tuple: (poses, found)
+            - poses: np.ndarray (B, 17, 3) float32，每帧第一个人的关键点，未检测到人的帧为 0
+            - found: np.ndarray (B,) bool，该帧是否检测到人
+    """
+    poses = np.zeros((len(poses_list), num_keypoints, 3), dtype=np.float32)
+    found = np.zeros(len(poses_list), dtype=bool)
+    for i, frame_poses in enumerate(poses_list):
+        if frame_poses is not None and len(frame_poses) > 0:
+            poses[i] = np.asarray(frame_poses)[0, :, :3]
+            found[i] = True
+    return poses, found
+
+
+def pipelined_infer_batch(estimator, images):
+    """
+    逐帧推理，前处理、推理、后处理三段重叠执行
+
+    估计器需实现 preprocess / forward / postprocess（同 InferencePipeline），有 forward_async 时用它提交推理；
+    否则依次调用 infer()。同时在处理中的帧数不超过 max_in_flight + 1，
+    与估计器前处理输出缓冲区的轮换数量（rdkx5 letterbox 为 max_in_flight + 2）相容。
+
+    images 可以是生成器（如边接收边解码的上传帧），只在需要时才取下一帧，
+    同时持有的图像不超过上述帧数。
+
+    单帧出错时该帧按未检测到人处理，不影响其余帧。
+
+    Returns:
+        tuple: (poses, found)，见 stack_poses()
+    """
+    if not all(callable(getattr(estimator, name, None)) for name in ('preprocess', 'forward', 'postprocess')):
+        results = []
+        for image in images:
+            try:
+                poses, _ = estimator.infer(image, is_draw=False)
+            except Exception as e:
+                logger.warning("第 %d 帧推理失败: %s", len(results) + 1, e)
+                poses = None
+            results.append(poses)
+        return stack_poses(results)
+
+    max_in_flight = max(1, getattr(estimator, 'max_in_flight', 1))
+    forward_async = getattr(estimator, 'forward_async', None)
+
+    def forward(inputs_future):
+        inputs = inputs_future.result()
+        if forward_async is not None:
+            return inputs, forward_async(inputs)
+        future = Future()
+        future.set_result(estimator.forward(inputs))
+        return inputs, future
+
+    results = []
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch-preprocess') as pre_pool, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch-forward') as forward_pool:
+        in_flight = deque()  # (image, Future[(inputs, Future[outputs])])，按帧顺序
+        images = iter(images)
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight + 1:
+                image = next(images, _EXHAUSTED)  # 解码失败的帧为 None，不能用 None 作结束标记
+                if image is _EXHAUSTED:
+                    exhausted = True
+                    break
+                inputs_future = pre_pool.submit(estimator.preprocess, image)
+                in_flight.append((image, forward_pool.submit(forward, inputs_future)))
+            if not in_flight:
+                break
+            image, submitted = in_flight.popleft()
+            try:
+                inputs, outputs_future = submitted.result()
+                poses, _ = estimator.postprocess(image, inputs, outputs_future.result(), False)
+            except Exception as e:
+                logger.warning("第 %d 帧推理失败: %s", len(results) + 1, e)
+                poses = None
+            results.append(poses)
+    return stack_poses(results)
@@ -1,54 +1,129 @@
-def bytes2command(data_list):
-    """
-    生成符合指定协议格式的二进制命令包 (键盘)
+import threading
 
-    参数:
-        data_list (list): 要发送的数据列表，每个元素应为0-255的整数
+# CH9329 帧头、地址与命令字
+FRAME_HEADER = (0x57, 0xAB)
+ADDR = 0x00
+CMD_KEYBOARD = 0x02
+CMD_MOUSE_REL = 0x05
 
+
+class HidPacketEncoder:
     """
-    data_list = [0x00] if len(data_list) == 0 else data_list
-    data_list = [0x00] * (8 - len(data_list)) + data_list # 补零，避免无反应
+    CH9329 报文编码器。
 
-    # 固定帧头 (2字节)
-    header = [0x57, 0xAB]
+    - 帧头、地址、命令字的校验和预先算好，每个报文只需累加数据部分
+    - 编码写入预分配的 bytearray 模板，不再逐段拼接 bytes
+    - 编码结果按输入缓存：状态不变时只需一次字典查找（缓存条目数达到上限时清空重建）
 
-    # 地址字段 (1字节)
-    addr = 0x00
+    输出与原先逐字段拼接的实现逐字节一致。
+    """
 
-    # 命令字段 (1字节) - 0x02 表示键盘命令
-    cmd = 0x02
+    def __init__(self, cache_size=4096):
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._keyboard_cache = {}
+        self._mouse_cache = {}
+
+        self._keyboard_base = sum(FRAME_HEADER) + ADDR + CMD_KEYBOARD
+        self._keyboard_buf = bytearray(6 + 8)
+        self._keyboard_buf[0:4] = bytes((*FRAME_HEADER, ADDR, CMD_KEYBOARD))
+
+        # 鼠标数据第 1 字节固定为 1，长度固定为 5
+        self._mouse_base = sum(FRAME_HEADER) + ADDR + CMD_MOUSE_REL + 0x05 + 0x01
+        self._mouse_buf = bytearray((*FRAME_HEADER, ADDR, CMD_MOUSE_REL, 0x05, 0x01, 0, 0, 0, 0, 0))
+        self._mouse_view = memoryview(self._mouse_buf)
+
+    def _store(self, cache, key, packet):
+        if len(cache) >= self.cache_size:
+            # 缓存满时整体清空，常用的状态很快会重新缓存
+            cache.clear()
+        cache[key] = packet
+        return packet
+
+    def keyboard(self, data_list):
+        """
+        键盘报文：不足 8 字节时在前面补零
+
+        Args:
+            data_list (iterable): 0-255 的整数序列，顺序即为报文中的字节顺序
+
+        Returns:
+            bytes: 完整命令包
+        """
+        key = tuple(data_list)
+        packet = self._keyboard_cache.get(key)
+        if packet is not None:
+            return packet
+
+        data = key or (0x00,)
+        if len(data) < 8:
+            data = (0x00,) * (8 - len(data)) + data
+        length = len(data)
+        with self._lock:
+            buf = self._keyboard_buf
+            if len(buf) != 6 + length:
+                # 超过 8 字节的报文很少见，单独分配
+                buf = bytearray(buf[0:4]) + bytearray(length + 2)
+            buf[4] = length
+            buf[5:5 + length] = bytes(data)
+            buf[5 + length] = (self._keyboard_base + length + sum(data)) & 0xFF
+            packet = bytes(buf)
+        return self._store(self._keyboard_cache, key, packet)
+
+    def mouse(self, button_value, x_rel=0, y_rel=0, wheel=0):
+        """
+        相对鼠标报文
+
+        Args:
+            button_value (int): 按键状态 (bit0:左键, bit1:右键, bit2:中键)
+            x_rel, y_rel, wheel (int): 有符号相对移动量，按字节截断
+
+        Returns:
+            bytes: 完整命令包
+        """
+        key = (button_value, x_rel & 0xFF, y_rel & 0xFF, wheel & 0xFF)
+        packet = self._mouse_cache.get(key)
+        if packet is not None:
+            return packet
+
+        with self._lock:
+            view = self._mouse_view
+            view[6:10] = bytes(key)
+            view[10] = (self._mouse_base + key[0] + key[1] + key[2] + key[3]) & 0xFF
+            packet = bytes(view)
+        return self._store(self._mouse_cache, key, packet)
+
+
+# 全局共享的编码器
+hid_encoder = HidPacketEncoder()
 
-    # 数据长度字段 (1字节)
-    data_length = len(data_list)
 
-    # 转换数据列表为字节 (自动处理0-255范围)
-    data_bytes = data_list
+def bytes2command(data_list):
+    """
+    生成符合指定协议格式的二进制命令包 (键盘)
 
-    # 计算校验和：地址 + 命令 + 数据长度 + 所有数据字节的和 (1字节)
-    checksum = (sum(header) + addr + cmd + data_length + sum(data_bytes)) % 256
-    # 组装完整数据包
-    packet = (bytes(header) + # 帧头
-        bytes([addr, cmd, data_length]) +  # 地址、命令、长度
-        bytes(data_bytes) +              # 数据部分
-        bytes([checksum])         # 校验和
-    )
-    print(packet)
+    参数:
+        data_list (list): 要发送的数据列表，每个元素应为0-255的整数
 
-    return packet
+    """
+    return hid_encoder.keyboard(data_list)
 
-def combine_mouse_actions(mouse_actions, x_ext=0, y_ext=0, step_size=10):
+def parse_mouse_actions(mouse_actions, x_ext=0, y_ext=0, step_size=10):
     """
-    将多个鼠标动作合并为一个 HID 数据包报文。
-    
+    将多个鼠标动作解析为相对鼠标报文的各个字段。
+
     参数:
         mouse_actions (list): 动作代码列表 (例如 [-1, -9])
         x_ext, y_ext: 额外的位移量
         step_size: 移动步长，默认为 10
+
+    返回:
+        tuple: (button_value, x_rel, y_rel, wheel)，wheel 为有符号值 (-1/0/1)
     """
     button_value = 0x00
     x_rel = x_ext
     y_rel = y_ext
-    wheel = 0x00
+    wheel = 0
 
     for action in mouse_actions:
         if action == -1:    # 鼠标左键按下
@@ -58,9 +133,9 @@ def combine_mouse_actions(mouse_actions, x_ext=0, y_ext=0, step_size=10):
         elif action == -5:  # 鼠标中键按下
             button_value |= 0x04
         elif action == -7:  # 滚轮向上
-            wheel = 0x01
+            wheel = 1
         elif action == -8:  # 滚轮向下
-            wheel = 0xFF
+            wheel = -1
         elif action == -9:  # 鼠标左移
             x_rel -= step_size
         elif action == -10: # 鼠标右移
@@ -68,27 +143,30 @@ def combine_mouse_actions(mouse_actions, x_ext=0, y_ext=0, step_size=10):
         elif action == -11: # 鼠标释放（清空按键）
             button_value = 0x00
 
-    # 构造 5 字节相对鼠标数据包
-    data_packet = [
-        0x01,               # 第 1 字节：固定为 1 (相对模式)
-        button_value,       # 第 2 字节：按键状态
-        x_rel & 0xFF,       # 第 3 字节：X 轴相对移动
-        y_rel & 0xFF,       # 第 4 字节：Y 轴相对移动
-        wheel               # 第 5 字节：滚轮相对移动
-    ]
-
-    # 构造完整命令包
-    header = [0x57, 0xAB]
-    addr = 0x00
-    cmd = 0x05
-    data_length = 0x05
-    checksum = (sum(header) + addr + cmd + data_length + sum(data_packet)) % 256
-
-    packet = (bytes(header) + 
-              bytes([addr, cmd, data_length]) + 
-              bytes(data_packet) + 
-              bytes([checksum]))
-    return packet
+    return button_value, x_rel, y_rel, wheel
+
+
+def mouse_report2command(button_value, x_rel=0, y_rel=0, wheel=0):
+    """
+    由按键状态与相对位移构造 5 字节相对鼠标报文的完整命令包。
+
+    参数:
+        button_value: 按键状态 (bit0:左键, bit1:右键, bit2:中键)
+        x_rel, y_rel, wheel: 有符号相对移动量，按字节截断
+    """
+    return hid_encoder.mouse(button_value, x_rel, y_rel, wheel)
+
+
+def combine_mouse_actions(mouse_actions, x_ext=0, y_ext=0, step_size=10):
+    """
+    将多个鼠标动作合并为一个 HID 数据包报文。
+    
+    参数:
+        mouse_actions (list): 动作代码列表 (例如 [-1, -9])
+        x_ext, y_ext: 额外的位移量
+        step_size: 移动步长，默认为 10
+    """
+    return mouse_report2command(*parse_mouse_actions(mouse_actions, x_ext, y_ext, step_size))
 
 
 def mouse2command(action, x=0, y=0):
@@ -171,32 +249,8 @@ def mouse2command(action, x=0, y=0):
         x_rel = max(-127, min(127, x))
         y_rel = max(-127, min(127, y))
 
-    # 构造5字节相对鼠标数据包
-    data_packet = [
-        0x01,               # 第1字节：固定为1
-        button_value,       # 第2字节：按键状态
-        x_rel & 0xFF,       # 第3字节：X轴相对移动 (有符号字节)
-        y_rel & 0xFF,       # 第4字节：Y轴相对移动 (有符号字节)
-        wheel               # 第5字节：滚轮相对移动
-    ]
-
-    # 构造完整命令包
-    header = [0x57, 0xAB]  # 帧头
-    addr = 0x00            # 地址
-    cmd = 0x05             # 命令 (鼠标相对命令)
-    data_length = 0x05     # 数据长度 (相对模式5字节)
-
-    # 计算校验和：地址 + 命令 + 数据长度 + 所有数据字节的和
-    checksum = (sum(header) + addr + cmd + data_length + sum(data_packet)) % 256
-
-    # 组装完整数据包
-    packet = (bytes(header) +           # 帧头
-              bytes([addr, cmd, data_length]) +  # 地址、命令、长度
-              bytes(data_packet) +      # 数据部分
-              bytes([checksum])         # 校验和
-    )
-
-    return packet
+    # 构造5字节相对鼠标数据包 (第1字节固定为1) 并编码为完整命令包
+    return hid_encoder.mouse(button_value, x_rel, y_rel, wheel)
 
 # 使用示例
 if __name__ == "__main__":
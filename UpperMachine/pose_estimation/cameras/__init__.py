@@ -3,6 +3,9 @@ import cv2
 import numpy as np
 
 class Camera(ABC):
+    # 是否支持直接输出 NV12 帧 (capture_nv12)
+    supports_nv12 = False
+
     def __init__(self, width=640, height=480):
         self.width = width
         self.height = height
@@ -17,6 +20,21 @@ class Camera(ABC):
         """Capture an image and return as BGR numpy array"""
         pass
 
+    def capture_nv12(self):
+        """Capture an image and return as Nv12Frame (BGR is converted lazily)"""
+        raise NotImplementedError(f"{type(self).__name__} does not support NV12 capture")
+
+    def capture_into(self, out=None):
+        """
+        Capture a BGR image, writing into `out` when the camera supports it.
+        `out` is a buffer returned by a previous call; the default implementation ignores it.
+        """
+        return self.capture()
+
+    def capture_nv12_into(self, out=None):
+        """Same as capture_into, for NV12 frames (`out` is the Nv12Frame data of a previous call)"""
+        return self.capture_nv12()
+
     @abstractmethod
     def close(self):
         pass
@@ -28,15 +46,15 @@ class Camera(ABC):
             height = self.height
         return cv2.resize(img, (width, height))
 
-from .rdkx5_IMX219 import Rdkx5Imx219Camera
-from .usb_camera import UsbCamera
-
+# 按需导入相机实现：rdkx5_imx219 依赖板端的 hobot_vio，其它机器上只用 usb 相机时无需安装
 def create_camera(camera_type, **kwargs):
     if camera_type == 'rdkx5_imx219':
+        from .rdkx5_IMX219 import Rdkx5Imx219Camera
         # Filter kwargs for Rdkx5Imx219Camera
         valid_kwargs = {k: v for k, v in kwargs.items() if k in ['width', 'height', 'sensor_width', 'sensor_height']}
         return Rdkx5Imx219Camera(**valid_kwargs)
     elif camera_type == 'usb':
+        from .usb_camera import UsbCamera
         # Filter kwargs for UsbCamera
         valid_kwargs = {k: v for k, v in kwargs.items() if k in ['width', 'height', 'device_id']}
         return UsbCamera(**valid_kwargs)
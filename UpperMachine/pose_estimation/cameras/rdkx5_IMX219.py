@@ -1,4 +1,5 @@
 from . import Camera
+from ..nv12 import Nv12Frame, nv12_to_bgr
 import numpy as np
 import cv2
 
@@ -9,6 +10,8 @@ except ImportError:
     from hobot_vio_rdkx5 import libsrcampy as srcampy
 
 class Rdkx5Imx219Camera(Camera):
+    supports_nv12 = True
+
     def __init__(self, width=640, height=480, sensor_width=1920, sensor_height=1080):
         super().__init__(width, height)
         self.sensor_width = sensor_width
@@ -21,16 +24,29 @@ class Rdkx5Imx219Camera(Camera):
             self.cam.open_cam(0, -1, -1, [self.sensor_width, self.sensor_width], [self.sensor_height, self.sensor_height], self.sensor_height, self.sensor_width)
             self.is_opened = True
 
-    def capture(self):
+    def capture_nv12(self):
         if not self.is_opened:
             raise RuntimeError("Camera is not opened")
         img_buffer = self.cam.get_img(2, self.sensor_width, self.sensor_height)
         if img_buffer is None:
             raise RuntimeError("Failed to capture image from camera")
         img_np = np.frombuffer(img_buffer, dtype=np.uint8)
-        img_nv12 = img_np.reshape((int(self.sensor_height * 1.5), self.sensor_width))
-        img_bgr = cv2.cvtColor(img_nv12, cv2.COLOR_YUV2BGR_NV12)
-        return self.resize_image(img_bgr)
+        return Nv12Frame(img_np, self.sensor_width, self.sensor_height, self.width, self.height)
+
+    def capture(self):
+        return self.capture_nv12().to_bgr()
+
+    def capture_into(self, out=None):
+        frame = self.capture_nv12()
+        if out is None or out.shape != (self.height, self.width, 3):
+            return frame.to_bgr()
+        # NV12 转 BGR 后直接缩放到 out，省去预览尺寸图像的分配
+        bgr = nv12_to_bgr(frame.data, frame.width, frame.height)
+        if (frame.width, frame.height) == (self.width, self.height):
+            np.copyto(out, bgr)
+        else:
+            cv2.resize(bgr, (self.width, self.height), dst=out)
+        return out
 
     def close(self):
         if self.cam is not None:
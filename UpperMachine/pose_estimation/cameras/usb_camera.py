@@ -17,9 +17,13 @@ class UsbCamera(Camera):
             self.is_opened = True
 
     def capture(self):
+        return self.capture_into()
+
+    def capture_into(self, out=None):
         if not self.is_opened:
             raise RuntimeError("Camera is not opened")
-        ret, frame = self.cap.read()
+        # VideoCapture.read decodes directly into `out` when its shape matches
+        ret, frame = self.cap.read(out) if out is not None else self.cap.read()
         if not ret:
             raise RuntimeError("Failed to capture image from USB camera")
         return frame  # Already BGR
@@ -0,0 +1,197 @@
+"""
+HID 命令异步发送：推理线程只负责提交，由独立的发送线程写入网络
+"""
+
+import threading
+import time
+
+from UpperMachine.metrics import pipeline_metrics
+from UpperMachine.pose_estimation.bytes2command import bytes2command, mouse_report2command
+
+
+def _clamp(value, limit):
+    return max(-limit, min(limit, value))
+
+
+class CommandDispatcher:
+    """
+    HID 命令发送队列。
+
+    队列只有两个槽位，因此天然有界：
+    - 键盘：按键状态是持久的，只保留最新的一份报文，被覆盖的旧报文计入 coalesced
+    - 鼠标：按键状态取最新值，相对位移与滚轮累加；单个报文超出 ±127 的部分留到下一个报文发送，
+      累计位移超过 max_mouse_delta 的部分直接丢弃并计入 dropped，避免下位机恢复后光标猛跳
+
+    发送函数与 sendcommand.SEND_FUNCTIONS 中的函数参数及返回值一致：返回 False（或抛出异常）计入 errors，
+    返回 None（与上一条命令相同而未发送）计入 skipped，其余计入 sent。
+
+    提交时可附带帧的采集时刻 captured_at（time.perf_counter()），报文实际发出后
+    记录 glass_to_hid 延迟：键盘取最新一次提交的时刻，合并后的鼠标报文取最早的时刻。
+    """
+
+    def __init__(self, send_keyboard, send_mouse, server_ip, port=80, timeout=1.0, max_mouse_delta=127 * 4):
+        self.send_keyboard = send_keyboard
+        self.send_mouse = send_mouse
+        self.server_ip = server_ip
+        self.port = port
+        self.timeout = timeout
+        self.max_mouse_delta = max_mouse_delta
+
+        self._cond = threading.Condition()
+        self._keyboard = None  # 待发送的键盘按键列表
+        self._keyboard_at = None
+        self._mouse = None     # 待发送的鼠标报文 [button, dx, dy, wheel, force, captured_at]
+        self._in_flight = False
+        self._thread = None
+        self.is_running = False
+
+        self.stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'skipped': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'errors': 0,
+            'last_send_ms': 0.0
+        }
+
+    def start(self):
+        with self._cond:
+            if self.is_running:
+                return
+            self.is_running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """停止发送线程，停止前会先发完已提交的命令"""
+        with self._cond:
+            self.is_running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit_keyboard(self, keyboard_bytes, captured_at=None):
+        """提交键盘按键列表，覆盖尚未发送的旧状态"""
+        with self._cond:
+            if self._keyboard is not None:
+                self.stats['coalesced'] += 1
+            self._keyboard = list(keyboard_bytes)
+            self._keyboard_at = captured_at
+            self.stats['enqueued'] += 1
+            self._cond.notify_all()
+
+    def submit_mouse(self, button_value, x_rel=0, y_rel=0, wheel=0, force=False, captured_at=None):
+        """
+        提交一次鼠标报文，与尚未发送的鼠标报文合并
+
+        Args:
+            button_value (int): 按键状态
+            x_rel, y_rel, wheel (int): 有符号相对移动量
+            force (bool): 是否绕过发送函数的重复命令缓存（连续移动时需要）
+            captured_at (float): 可选，对应帧的采集时刻（time.perf_counter()）
+        """
+        with self._cond:
+            mouse = self._mouse
+            if mouse is None:
+                mouse = self._mouse = [button_value, x_rel, y_rel, wheel, force, captured_at]
+            else:
+                self.stats['coalesced'] += 1
+                mouse[0] = button_value
+                mouse[1] += x_rel
+                mouse[2] += y_rel
+                mouse[3] += wheel
+                mouse[4] = mouse[4] or force
+                if mouse[5] is None:
+                    mouse[5] = captured_at
+
+            for i in (1, 2, 3):
+                if abs(mouse[i]) > self.max_mouse_delta:
+                    mouse[i] = _clamp(mouse[i], self.max_mouse_delta)
+                    self.stats['dropped'] += 1
+
+            self.stats['enqueued'] += 1
+            self._cond.notify_all()
+
+    def depth(self):
+        """当前等待发送的报文数"""
+        return (self._keyboard is not None) + (self._mouse is not None)
+
+    def flush(self, timeout=2.0):
+        """
+        等待已提交的命令全部发出
+
+        Returns:
+            bool: 超时前是否发送完毕
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._keyboard is not None or self._mouse is not None or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.is_running:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def get_stats(self):
+        stats = self.stats.copy()
+        stats['depth'] = self.depth()
+        return stats
+
+    def _take_mouse(self):
+        """取出一个不超过单报文范围的鼠标报文，剩余位移留在槽位中"""
+        mouse = self._mouse
+        x, y, wheel = _clamp(mouse[1], 127), _clamp(mouse[2], 127), _clamp(mouse[3], 127)
+        report = (mouse[0], x, y, wheel, mouse[4], mouse[5])
+        mouse[1] -= x
+        mouse[2] -= y
+        mouse[3] -= wheel
+        if mouse[1] == 0 and mouse[2] == 0 and mouse[3] == 0:
+            self._mouse = None
+        return report
+
+    def _send(self, send_func, command, ignore_cache=False, captured_at=None):
+        start = time.perf_counter()
+        try:
+            result = send_func(server_ip=self.server_ip, port=self.port, command=command, timeout=self.timeout,
+                               ignore_cache=ignore_cache)
+        except Exception as e:
+            print(f"命令发送错误: {e}")
+            result = False
+        sent = bool(result)
+        if sent:
+            self.stats['sent'] += 1
+        elif result is None:
+            self.stats['skipped'] += 1
+        else:
+            self.stats['errors'] += 1
+        end = time.perf_counter()
+        self.stats['last_send_ms'] = (end - start) * 1000
+        pipeline_metrics.record('send', end - start)
+        if sent and captured_at is not None:
+            pipeline_metrics.record('glass_to_hid', end - captured_at)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.is_running and self._keyboard is None and self._mouse is None:
+                    self._cond.wait()
+                if self._keyboard is None and self._mouse is None:
+                    break
+                keyboard, self._keyboard = self._keyboard, None
+                keyboard_at, self._keyboard_at = self._keyboard_at, None
+                mouse = self._take_mouse() if self._mouse is not None else None
+                self._in_flight = True
+
+            # 与原先的同步发送顺序一致：先键盘后鼠标
+            if keyboard is not None:
+                self._send(self.send_keyboard, bytes2command(keyboard), captured_at=keyboard_at)
+            if mouse is not None:
+                button_value, x, y, wheel, force, mouse_at = mouse
+                self._send(self.send_mouse, mouse_report2command(button_value, x, y, wheel),
+                           ignore_cache=force, captured_at=mouse_at)
+
+            with self._cond:
+                self._in_flight = False
+                self._cond.notify_all()
@@ -0,0 +1,338 @@
+"""
+推理执行器：唯一持有估计器的组件，实时画面与 REST 接口的推理都经由它执行
+
+估计器不是线程安全的：rdkx5 的前处理把 letterbox 几何参数写在模型对象上、并轮换复用输出缓冲区，
+ov 的同步推理共用 compiled_model 的默认请求。Flask-SocketIO 为 threading 模式，相机线程、流水线线程
+与各个请求线程直接调用 estimator.infer 会相互踩踏。执行器只在固定的线程中调用估计器：
+
+- CPU 线程：preprocess / postprocess，以及不支持分段调用的估计器的 infer()
+- 设备线程：forward（max_in_flight > 1 时调用 forward_async，提交后立即返回）
+- REST 线程：逐个执行 REST 任务（单帧或多帧），任务的每一帧再按阶段提交给上面两个线程
+
+CPU 线程与设备线程各自串行，一帧的前处理仍可与另一帧的推理重叠（同 InferencePipeline）。
+两者都按 (优先级, 提交顺序) 取任务：实时帧 (PRIORITY_LIVE) 总是先于 REST 任务的帧 (PRIORITY_REST)，
+REST 的多帧任务按阶段排队，实时帧最多等待正在执行的一个阶段，而不是整个任务。
+支持多帧一次前向的估计器（forward_batch，如 ov 的动态 batch 模型）按 batch_chunk 帧分块，
+每帧的前处理 / 后处理与每块的前向同样分别排队，实时帧最多等待一块的前向。
+
+同一时刻只有一个 REST 任务，因此同时持有前处理结果的帧有界：
+实时帧与 REST 任务各自最多 max_in_flight + 2 帧（rdkx5 前处理的输出缓冲区按此轮换）；
+有 forward_batch 的估计器的 REST 多帧任务则同时持有一整块（batch_chunk 帧）的图像与前处理结果。
+
+所有调用都返回 concurrent.futures.Future；client(priority) 返回与估计器接口相同的同步包装，
+可直接交给 InferencePipeline、pipelined_infer_batch 等按估计器编写的代码。
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from UpperMachine.metrics import pipeline_metrics
+from UpperMachine.pose_estimation.batch import pipelined_infer_batch, stack_poses
+
+logger = logging.getLogger("EXECUTOR")
+
+PRIORITY_LIVE = 0
+PRIORITY_REST = 1
+
+# 支持多帧一次前向的估计器（forward_batch）每次前向的帧数
+BATCH_CHUNK = 16
+
+
+def _copy_result(source, target):
+    """把已完成的 source 的结果或异常转给 target"""
+    try:
+        target.set_result(source.result())
+    except BaseException as e:
+        target.set_exception(e)
+
+
+class _Lane:
+    """
+    一个工作线程，按 (优先级, 提交顺序) 执行任务
+
+    Args:
+        metrics_scope (bool): 是否在 PRIORITY_REST 的任务内设置 pipeline_metrics.scope('rest')，
+            使估计器记录的阶段耗时与实时帧分开
+    """
+
+    def __init__(self, name, metrics_scope=False):
+        self.name = name
+        self.metrics_scope = metrics_scope
+        self._tasks = []  # 堆: (priority, seq, fn, args, kwargs, future)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.is_running = False
+        self.executed = {PRIORITY_LIVE: 0, PRIORITY_REST: 0}
+
+    def start(self):
+        with self._cond:
+            if self.is_running:
+                return
+            self.is_running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """停止线程，尚未开始的任务以 RuntimeError 结束"""
+        with self._cond:
+            self.is_running = False
+            tasks, self._tasks = self._tasks, []
+            self._cond.notify_all()
+        for task in tasks:
+            task[-1].set_exception(RuntimeError("推理执行器已停止"))
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, priority, fn, *args, **kwargs):
+        future = Future()
+        with self._cond:
+            if not self.is_running:
+                future.set_exception(RuntimeError("推理执行器已停止"))
+                return future
+            heapq.heappush(self._tasks, (priority, next(self._seq), fn, args, kwargs, future))
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._tasks or not self.is_running)
+                if not self.is_running:
+                    return
+                priority, _, fn, args, kwargs, future = heapq.heappop(self._tasks)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if self.metrics_scope and priority == PRIORITY_REST:
+                    with pipeline_metrics.scope('rest'):
+                        result = fn(*args, **kwargs)
+                else:
+                    result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            self.executed[priority] = self.executed.get(priority, 0) + 1
+
+    def __len__(self):
+        return len(self._tasks)
+
+
+class InferenceExecutor:
+    """
+    Args:
+        estimator: 姿态估计器；分段接口（preprocess / forward / postprocess）与 forward_async 均为可选
+        batch_chunk (int): 有 forward_batch 的估计器每次前向的帧数
+    """
+
+    def __init__(self, estimator, batch_chunk=BATCH_CHUNK):
+        self.estimator = estimator
+        self.batch_chunk = batch_chunk
+        self.staged = all(callable(getattr(estimator, name, None))
+                          for name in ('preprocess', 'forward', 'postprocess'))
+        self.max_in_flight = max(1, getattr(estimator, 'max_in_flight', 1)) if self.staged else 1
+        self._use_async = self.max_in_flight > 1 and callable(getattr(estimator, 'forward_async', None))
+        self._use_batch = self.staged and callable(getattr(estimator, 'forward_batch', None))
+
+        self._cpu = _Lane('inference-cpu', metrics_scope=True)
+        self._device = _Lane('inference-device', metrics_scope=True)
+        self._rest = _Lane('inference-rest')
+        self.is_running = False
+
+        self.stats = {
+            'rest_jobs': 0,
+            'rest_errors': 0
+        }
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        for lane in (self._cpu, self._device, self._rest):
+            lane.start()
+        logger.info("推理执行器已启动（%s，最多 %d 帧同时推理）",
+                    "分段执行" if self.staged else "整帧 infer", self.max_in_flight)
+
+    def stop(self, timeout=2.0):
+        self.is_running = False
+        for lane in (self._rest, self._device, self._cpu):
+            lane.stop(timeout)
+
+    # 分段接口：在对应的线程中调用估计器，返回 Future
+    def preprocess(self, image, priority=PRIORITY_LIVE):
+        return self._cpu.submit(priority, self.estimator.preprocess, image)
+
+    def forward(self, inputs, priority=PRIORITY_LIVE):
+        """结果为 estimator.forward() 的返回值；forward_async 时设备线程只负责提交"""
+        if not self._use_async:
+            return self._device.submit(priority, self.estimator.forward, inputs)
+        result = Future()
+
+        def on_submitted(submitted):
+            try:
+                inner = submitted.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            inner.add_done_callback(lambda done: _copy_result(done, result))
+
+        self._device.submit(priority, self.estimator.forward_async, inputs).add_done_callback(on_submitted)
+        return result
+
+    def postprocess(self, image, inputs, outputs, is_draw=False, priority=PRIORITY_LIVE):
+        return self._cpu.submit(priority, self.estimator.postprocess, image, inputs, outputs, is_draw)
+
+    def infer(self, image, is_draw=False, priority=PRIORITY_LIVE):
+        """
+        单帧推理，各阶段直接排队（实时帧使用；REST 请求用 submit()）
+
+        Returns:
+            Future: 结果为 (poses, draw_img)，同 estimator.infer()
+        """
+        if not self.staged:
+            return self._cpu.submit(priority, self.estimator.infer, image, is_draw=is_draw)
+        result = Future()
+
+        def on_outputs(inputs, done):
+            try:
+                outputs = done.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            self.postprocess(image, inputs, outputs, is_draw, priority).add_done_callback(
+                lambda done: _copy_result(done, result))
+
+        def on_inputs(done):
+            try:
+                inputs = done.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            self.forward(inputs, priority).add_done_callback(lambda done: on_outputs(inputs, done))
+
+        self.preprocess(image, priority).add_done_callback(on_inputs)
+        return result
+
+    # REST 任务：在 REST 线程中逐个执行
+    def submit(self, image, is_draw=False):
+        """
+        REST 单帧任务
+
+        Returns:
+            Future: 结果为 (poses, draw_img)
+        """
+        return self._rest.submit(PRIORITY_REST, self._run_job, self._infer_job, image, is_draw)
+
+    def submit_batch(self, images):
+        """
+        REST 多帧任务
+
+        Args:
+            images (iterable): BGR 图像（解码失败的帧为 None），可以是生成器：在 REST 线程中按需取帧，
+                同时持有的图像不超过一块（有 forward_batch 时为 batch_chunk 帧，否则为 max_in_flight + 1 帧）
+
+        Returns:
+            Future: 结果为 (poses, found)，见 batch.stack_poses()
+        """
+        return self._rest.submit(PRIORITY_REST, self._run_job, self._infer_batch_job, images)
+
+    def _run_job(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        except BaseException:
+            self.stats['rest_errors'] += 1
+            raise
+        finally:
+            self.stats['rest_jobs'] += 1
+            pipeline_metrics.record('rest_job', time.perf_counter() - start)
+
+    def _infer_job(self, image, is_draw):
+        return self.infer(image, is_draw, PRIORITY_REST).result()
+
+    def _infer_batch_job(self, images):
+        if self._use_batch:
+            parts = []
+            chunk = []
+            for image in images:
+                chunk.append(image)
+                if len(chunk) == self.batch_chunk:
+                    parts.append(self._infer_chunk(chunk))
+                    chunk = []
+            if chunk or not parts:
+                parts.append(self._infer_chunk(chunk))
+            return np.concatenate([poses for poses, _ in parts]), np.concatenate([found for _, found in parts])
+        return pipelined_infer_batch(self.client(PRIORITY_REST), images)
+
+    def _infer_chunk(self, chunk):
+        """
+        一块帧：逐帧前处理（CPU 线程）→ 一次 forward_batch（设备线程）→ 逐帧后处理（CPU 线程），均为 PRIORITY_REST
+
+        解码失败的帧（None）不送入模型，单帧出错时该帧按未检测到人处理（同 pipelined_infer_batch）
+        """
+        valid = [i for i, image in enumerate(chunk) if image is not None]
+        preprocessed = [(i, self.preprocess(chunk[i], PRIORITY_REST)) for i in valid]
+        inputs_list = []
+        for i, future in preprocessed:
+            try:
+                inputs_list.append((i, future.result()))
+            except Exception as e:
+                logger.warning("批量检测第 %d 帧前处理失败: %s", i + 1, e)
+        results = [None] * len(chunk)
+        if inputs_list:
+            pafs, heatmaps = self._device.submit(
+                PRIORITY_REST, self.estimator.forward_batch, [inputs for _, inputs in inputs_list]).result()
+            decoded = [(i, self.postprocess(chunk[i], inputs, (pafs[row:row + 1], heatmaps[row:row + 1]),
+                                            False, PRIORITY_REST))
+                       for row, (i, inputs) in enumerate(inputs_list)]
+            for i, future in decoded:
+                try:
+                    results[i], _ = future.result()
+                except Exception as e:
+                    logger.warning("批量检测第 %d 帧后处理失败: %s", i + 1, e)
+        return stack_poses(results)
+
+    def client(self, priority=PRIORITY_LIVE):
+        return EstimatorClient(self, priority)
+
+    def get_stats(self):
+        stats = self.stats.copy()
+        stats['live_tasks'] = self._cpu.executed[PRIORITY_LIVE] + self._device.executed[PRIORITY_LIVE]
+        stats['rest_tasks'] = self._cpu.executed[PRIORITY_REST] + self._device.executed[PRIORITY_REST]
+        stats['queued'] = len(self._cpu) + len(self._device)
+        stats['queued_jobs'] = len(self._rest)
+        return stats
+
+
+class EstimatorClient:
+    """
+    以估计器的接口（同步调用）使用执行器，各阶段以 priority 排队
+
+    只在执行器支持分段调用时提供 preprocess / forward / forward_async / postprocess，
+    pose2dict 等不涉及推理状态的属性直接取自估计器。
+    """
+
+    def __init__(self, executor, priority=PRIORITY_LIVE):
+        self.executor = executor
+        self.priority = priority
+        self.max_in_flight = executor.max_in_flight
+        if executor.staged:
+            self.preprocess = lambda image: executor.preprocess(image, priority).result()
+            self.forward = lambda inputs: executor.forward(inputs, priority).result()
+            self.forward_async = lambda inputs: executor.forward(inputs, priority)
+            self.postprocess = lambda image, inputs, outputs, is_draw=False: executor.postprocess(
+                image, inputs, outputs, is_draw, priority).result()
+
+    def infer(self, image, is_draw=False):
+        return self.executor.infer(image, is_draw, self.priority).result()
+
+    def __getattr__(self, name):
+        return getattr(self.executor.estimator, name)
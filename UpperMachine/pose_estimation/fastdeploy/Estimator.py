@@ -1,8 +1,11 @@
 import os.path
+import time
 
 import fastdeploy
 import numpy as np
 
+from UpperMachine.metrics import pipeline_metrics
+from ..batch import pipelined_infer_batch
 from .utils import body_mapper, draw_poses
 
 
@@ -14,7 +17,10 @@ class HumanPoseEstimator():
             os.path.join(model_path, "infer_cfg.yml"))
 
     def infer(self, image, is_draw=False):
+        # predict() 内部包含前处理与后处理，整体计入 inference
+        start = time.perf_counter()
         result = self.model.predict(image)
+        pipeline_metrics.record('inference', time.perf_counter() - start)
         keypoints = np.array(result.keypoints).reshape(-1, 17, 2)
         scores = np.array(result.scores).reshape(-1, 17, 1)
         result = np.concatenate((keypoints, scores), axis=2)
@@ -22,6 +28,10 @@ class HumanPoseEstimator():
         draw_img = draw_poses(image, result, point_score_threshold=0.1) if is_draw else image
         return result, draw_img
 
+    def infer_batch(self, images):
+        """多帧推理（predict 内部包含前后处理，逐帧调用 infer），返回值见 batch.stack_poses()"""
+        return pipelined_infer_batch(self, images)
+
     def pose2dict(self, poses):
         if len(poses) == 0:
             pose_dict = {}
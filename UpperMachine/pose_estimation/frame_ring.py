@@ -0,0 +1,176 @@
+"""
+异步采集模式下相机线程与推理线程之间的帧环形缓冲区
+
+相机线程向空闲槽位写入（支持的相机直接写进槽位的预分配缓冲区），推理线程借出最新一帧、
+用完归还，全程不拷贝图像。每帧带有递增的序号与采集时刻，便于统计丢帧与帧龄。
+"""
+
+import threading
+import time
+
+from UpperMachine.metrics import pipeline_metrics
+
+# 槽位状态
+FREE, WRITING, READY, BORROWED = range(4)
+
+
+class FrameSlot:
+    """
+    环形缓冲区中的一个槽位
+
+    Attributes:
+        buffer: 相机可复用的存储（BGR 数组或 NV12 数据），由相机首次写入时确定形状
+        frame: 本帧图像（np.ndarray 或 Nv12Frame），通常以 buffer 为存储
+        seq (int): 帧序号，从 1 开始递增
+        captured_at (float): 开始采集的时刻（time.perf_counter()）
+    """
+
+    __slots__ = ('index', 'state', 'buffer', 'frame', 'seq', 'captured_at')
+
+    def __init__(self, index):
+        self.index = index
+        self.state = FREE
+        self.buffer = None
+        self.frame = None
+        self.seq = 0
+        self.captured_at = 0.0
+
+
+class FrameRing:
+    """
+    N 槽位的帧环形缓冲区（单个相机线程写入，一个或多个推理线程读取）
+
+    - acquire() / publish()：相机线程取一个可写槽位，写完后发布；没有空闲槽位时覆盖最旧的未读帧（计入 dropped）
+    - borrow() / release()：推理线程借出最新的未读帧，比它更旧的未读帧直接作废（计入 dropped），
+      借出期间槽位不会被相机覆盖，用完必须归还
+    - 借出时帧龄（采集→开始处理）记入 pipeline_metrics 的 frame_age，超过 stale_after 的计入 stale
+
+    Args:
+        num_slots (int): 槽位数，至少 3（写入中、借出中各占一个时仍有一个可发布）
+        stale_after (float): 帧龄超过该值（秒）视为过期帧
+    """
+
+    def __init__(self, num_slots=3, stale_after=0.1):
+        if num_slots < 3:
+            raise ValueError("FrameRing needs at least 3 slots")
+        self.slots = [FrameSlot(i) for i in range(num_slots)]
+        self.stale_after = stale_after
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._last_borrowed_seq = 0
+        self.is_closed = False
+
+        self.stats = {
+            'published': 0,
+            'consumed': 0,
+            'dropped': 0,
+            'stale': 0,
+            'overruns': 0
+        }
+
+    def acquire(self):
+        """
+        取一个可写入的槽位（相机线程调用）
+
+        Returns:
+            FrameSlot | None: 所有槽位都在使用中时返回 None（本帧应跳过，计入 overruns）
+        """
+        with self._cond:
+            oldest_ready = None
+            for slot in self.slots:
+                if slot.state == FREE:
+                    slot.state = WRITING
+                    return slot
+                if slot.state == READY and (oldest_ready is None or slot.seq < oldest_ready.seq):
+                    oldest_ready = slot
+            if oldest_ready is not None:
+                # 推理跟不上：覆盖最旧的未读帧
+                self.stats['dropped'] += 1
+                oldest_ready.state = WRITING
+                return oldest_ready
+            self.stats['overruns'] += 1
+            return None
+
+    def publish(self, slot, frame, captured_at):
+        """
+        发布写好的一帧（相机线程调用）
+
+        Args:
+            slot (FrameSlot): acquire() 取得的槽位
+            frame: 本帧图像
+            captured_at (float): 开始采集的时刻（time.perf_counter()）
+        """
+        with self._cond:
+            self._seq += 1
+            slot.frame = frame
+            slot.seq = self._seq
+            slot.captured_at = captured_at
+            slot.state = READY
+            self.stats['published'] += 1
+            self._cond.notify_all()
+
+    def abort(self, slot):
+        """放弃写入（采集失败时调用），槽位回到空闲状态"""
+        with self._cond:
+            slot.frame = None
+            slot.state = FREE
+
+    def borrow(self, timeout=1.0):
+        """
+        借出最新的未读帧（推理线程调用），没有新帧时最多等待 timeout 秒
+
+        Returns:
+            FrameSlot | None: 超时或已关闭时返回 None
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                latest = None
+                for slot in self.slots:
+                    if slot.state == READY and (latest is None or slot.seq > latest.seq):
+                        latest = slot
+                if latest is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if self.is_closed or remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+            # 比借出帧更旧的未读帧不会再被处理
+            for slot in self.slots:
+                if slot.state == READY and slot is not latest:
+                    slot.state = FREE
+                    slot.frame = None
+                    self.stats['dropped'] += 1
+            latest.state = BORROWED
+            self._last_borrowed_seq = latest.seq
+            self.stats['consumed'] += 1
+
+        age = time.perf_counter() - latest.captured_at
+        pipeline_metrics.record('frame_age', age)
+        if age > self.stale_after:
+            self.stats['stale'] += 1
+        return latest
+
+    def release(self, slot):
+        """归还借出的槽位，之后其缓冲区可能被相机覆盖"""
+        with self._cond:
+            if slot.state == BORROWED:
+                slot.frame = None
+                slot.state = FREE
+                self._cond.notify_all()
+
+    def close(self):
+        """唤醒所有等待中的 borrow()"""
+        with self._cond:
+            self.is_closed = True
+            self._cond.notify_all()
+
+    def get_stats(self):
+        with self._cond:
+            stats = self.stats.copy()
+            stats['last_seq'] = self._seq
+            stats['last_consumed_seq'] = self._last_borrowed_seq
+            stats['ready'] = sum(slot.state == READY for slot in self.slots)
+            stats['borrowed'] = sum(slot.state == BORROWED for slot in self.slots)
+        return stats
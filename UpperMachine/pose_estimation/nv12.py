@@ -0,0 +1,265 @@
+"""
+NV12 图像工具：在 YUV 域内完成缩放与 letterbox，供 BPU 模型直接使用
+
+只依赖 numpy 与 cv2，不依赖 hobot 库，可以在任意机器上用普通的 NV12 数组调试。
+NV12 布局：H×W 的 Y 平面之后紧跟 (H/2)×(W/2) 的 UV 交错平面。
+"""
+
+import cv2
+import numpy as np
+
+
+def _gray_yuv(value=114):
+    # 与 BGR 灰色画布经 cv2 转 I420 后得到的 Y/U/V 值保持一致
+    yuv = cv2.cvtColor(np.full((2, 2, 3), value, dtype=np.uint8), cv2.COLOR_BGR2YUV_I420).reshape(-1)
+    return int(yuv[0]), int(yuv[4]), int(yuv[5])
+
+
+# letterbox 填充色 (BGR 114 灰) 对应的 Y, U, V
+PAD_YUV = _gray_yuv(114)
+
+
+def nv12_planes(nv12, width, height):
+    """
+    返回 NV12 缓冲区的 Y 平面与 UV 平面视图（不拷贝）
+
+    Args:
+        nv12 (np.ndarray): uint8 数组，元素个数为 width * height * 3 // 2
+        width, height (int): 图像尺寸，须为偶数
+
+    Returns:
+        tuple: (y, uv) - y 形状为 (height, width)，uv 形状为 (height // 2, width // 2, 2)
+    """
+    buf = nv12.reshape(-1)
+    area = width * height
+    y = buf[:area].reshape(height, width)
+    uv = buf[area:area * 3 // 2].reshape(height // 2, width // 2, 2)
+    return y, uv
+
+
+def nv12_to_bgr(nv12, width, height):
+    """NV12 转 BGR"""
+    return cv2.cvtColor(nv12.reshape(height * 3 // 2, width), cv2.COLOR_YUV2BGR_NV12)
+
+
+def bgr2nv12(bgr_img, out=None, uv_tmp=None):
+    """
+    BGR 转 NV12：cv2 先输出 I420 到 out，再通过步长视图就地把 U/V 平面交错为 UV
+
+    Args:
+        bgr_img (np.ndarray): BGR 图像，宽高须为偶数
+        out (np.ndarray): 可选，预分配的一维 uint8 输出缓冲区（H*W*3/2）
+        uv_tmp (np.ndarray): 可选，预分配的一维 uint8 临时缓冲区（H*W/2）
+
+    Returns:
+        np.ndarray: 一维 NV12 数据（即 out）
+    """
+    height, width = bgr_img.shape[0], bgr_img.shape[1]
+    area = height * width
+    if out is None:
+        out = np.empty(area * 3 // 2, dtype=np.uint8)
+    if uv_tmp is None:
+        uv_tmp = np.empty(area // 2, dtype=np.uint8)
+
+    # I420: Y 平面之后依次是 U 平面和 V 平面，Y 平面与 NV12 相同
+    cv2.cvtColor(bgr_img, cv2.COLOR_BGR2YUV_I420, dst=out.reshape(height * 3 // 2, width))
+    quarter = area // 4
+    uv_tmp[:] = out[area:]
+    out[area::2] = uv_tmp[:quarter]
+    out[area + 1::2] = uv_tmp[quarter:]
+    return out
+
+
+def letterbox_geometry(img_w, img_h, input_w, input_h, align=1):
+    """
+    计算 letterbox 的缩放比例与偏移，公式与 preprocess_yuv420sp 一致
+
+    Args:
+        img_w, img_h (int): 原图尺寸（关键点坐标所在的坐标系）
+        input_w, input_h (int): 模型输入尺寸
+        align (int): 缩放后尺寸与偏移向下对齐到该值的倍数（NV12 色度平面要求 2）
+
+    Returns:
+        tuple: (scale, resized_w, resized_h, x_shift, y_shift)
+    """
+    scale = min(1.0 * input_h / img_h, 1.0 * input_w / img_w)
+    if scale <= 0:
+        raise ValueError("Invalid scale")
+    resized_w, resized_h = int(img_w * scale), int(img_h * scale)
+    resized_w -= resized_w % align
+    resized_h -= resized_h % align
+    x_shift = (input_w - resized_w) // 2
+    y_shift = (input_h - resized_h) // 2
+    x_shift -= x_shift % align
+    y_shift -= y_shift % align
+    return scale, resized_w, resized_h, x_shift, y_shift
+
+
+class Nv12Frame:
+    """
+    相机输出的一帧 NV12 图像。
+
+    width/height 为传感器输出尺寸，display_width/display_height 为预览画面（以及关键点坐标）的尺寸。
+    BGR 画面仅在 to_bgr() 被调用时才转换，并缓存结果。
+    """
+
+    def __init__(self, data, width, height, display_width=None, display_height=None):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.display_width = display_width or width
+        self.display_height = display_height or height
+        self._bgr = None
+
+    @property
+    def shape(self):
+        """与 BGR 帧保持一致的形状 (H, W, 3)"""
+        return (self.display_height, self.display_width, 3)
+
+    def planes(self):
+        return nv12_planes(self.data, self.width, self.height)
+
+    def to_bgr(self):
+        """转换为预览尺寸的 BGR 图像（与原先 capture() 的结果一致）"""
+        if self._bgr is None:
+            bgr = nv12_to_bgr(self.data, self.width, self.height)
+            if (self.display_width, self.display_height) != (self.width, self.height):
+                bgr = cv2.resize(bgr, (self.display_width, self.display_height))
+            self._bgr = bgr
+        return self._bgr
+
+    def copy(self):
+        frame = Nv12Frame(self.data.copy(), self.width, self.height, self.display_width, self.display_height)
+        frame._bgr = self._bgr
+        return frame
+
+
+class Nv12Letterbox:
+    """
+    在 YUV 域内把 NV12 帧缩放并 letterbox 到模型输入尺寸，输出 NV12。
+
+    - letterbox 几何按 (源尺寸, 预览尺寸) 缓存，相机分辨率不变时只计算一次
+    - 输出缓冲区预先分配并填好灰色边框，每帧只用 cv2.resize 写入中间区域
+    - 轮流使用 num_buffers 个缓冲区，避免覆盖仍在使用中的上一帧
+    """
+
+    def __init__(self, input_w, input_h, num_buffers=2, interpolation=cv2.INTER_NEAREST):
+        if input_w % 2 or input_h % 2:
+            raise ValueError("NV12 input size must be even")
+        self.input_w = input_w
+        self.input_h = input_h
+        self.interpolation = interpolation
+        self.num_buffers = num_buffers
+
+        self._key = None
+        self._geometry = None
+        self._buffers = []
+        self._next = 0
+
+    def _prepare(self, key):
+        src_w, src_h, img_w, img_h = key
+        scale, resized_w, resized_h, x_shift, y_shift = letterbox_geometry(
+            img_w, img_h, self.input_w, self.input_h, align=2)
+        self._geometry = (scale, resized_w, resized_h, x_shift, y_shift)
+
+        pad_y, pad_u, pad_v = PAD_YUV
+        self._buffers = []
+        for _ in range(self.num_buffers):
+            buf = np.empty(self.input_w * self.input_h * 3 // 2, dtype=np.uint8)
+            y, uv = nv12_planes(buf, self.input_w, self.input_h)
+            y[...] = pad_y
+            uv[..., 0] = pad_u
+            uv[..., 1] = pad_v
+            self._buffers.append(buf)
+        self._next = 0
+        self._key = key
+
+    def geometry(self):
+        """
+        Returns:
+            tuple: (scale, resized_w, resized_h, x_shift, y_shift)，坐标系为预览尺寸
+        """
+        return self._geometry
+
+    def __call__(self, frame):
+        """
+        Args:
+            frame (Nv12Frame): 输入帧
+
+        Returns:
+            np.ndarray: 模型输入尺寸的 NV12 数据（一维 uint8）
+        """
+        key = (frame.width, frame.height, frame.display_width, frame.display_height)
+        if key != self._key:
+            self._prepare(key)
+        _, resized_w, resized_h, x_shift, y_shift = self._geometry
+
+        buf = self._buffers[self._next]
+        self._next = (self._next + 1) % self.num_buffers
+
+        src_y, src_uv = frame.planes()
+        dst_y, dst_uv = nv12_planes(buf, self.input_w, self.input_h)
+        cv2.resize(src_y, (resized_w, resized_h),
+                   dst=dst_y[y_shift:y_shift + resized_h, x_shift:x_shift + resized_w],
+                   interpolation=self.interpolation)
+        cv2.resize(src_uv, (resized_w // 2, resized_h // 2),
+                   dst=dst_uv[y_shift // 2:(y_shift + resized_h) // 2, x_shift // 2:(x_shift + resized_w) // 2],
+                   interpolation=self.interpolation)
+        return buf
+
+
+class LetterboxPreprocessor:
+    """
+    BGR 图像的 letterbox + NV12 转换，结果与 preprocess_yuv420sp 逐字节一致。
+
+    - letterbox 几何按输入尺寸缓存，相机分辨率不变时只计算一次
+    - 灰色画布、I420/UV 临时缓冲区预先分配，每帧只把缩放结果写入画布中间区域
+    - 输出缓冲区轮流使用 num_buffers 个，避免覆盖仍在使用中的上一帧
+    """
+
+    def __init__(self, input_w, input_h, num_buffers=2, interpolation=cv2.INTER_NEAREST):
+        self.input_w = input_w
+        self.input_h = input_h
+        self.interpolation = interpolation
+        self.num_buffers = num_buffers
+
+        area = input_w * input_h
+        self.canvas = np.full((input_h, input_w, 3), 114, dtype=np.uint8)
+        self._uv_tmp = np.empty(area // 2, dtype=np.uint8)
+        self._buffers = [np.empty(area * 3 // 2, dtype=np.uint8) for _ in range(num_buffers)]
+        self._next = 0
+
+        self._shape = None
+        self._geometry = None
+
+    def geometry(self):
+        """
+        Returns:
+            tuple: (scale, resized_w, resized_h, x_shift, y_shift)
+        """
+        return self._geometry
+
+    def __call__(self, img):
+        """
+        Args:
+            img (np.ndarray): BGR 图像
+
+        Returns:
+            np.ndarray: 模型输入尺寸的一维 NV12 数据
+        """
+        shape = img.shape[0:2]
+        if shape != self._shape:
+            img_h, img_w = shape
+            self._geometry = letterbox_geometry(img_w, img_h, self.input_w, self.input_h)
+            # 尺寸变化时重新铺满灰色，保证边框区域不残留旧内容
+            self.canvas[...] = 114
+            self._shape = shape
+        _, resized_w, resized_h, x_shift, y_shift = self._geometry
+
+        cv2.resize(img, (resized_w, resized_h),
+                   dst=self.canvas[y_shift:y_shift + resized_h, x_shift:x_shift + resized_w],
+                   interpolation=self.interpolation)
+
+        out = self._buffers[self._next]
+        self._next = (self._next + 1) % self.num_buffers
+        return bgr2nv12(self.canvas, out=out, uv_tmp=self._uv_tmp)
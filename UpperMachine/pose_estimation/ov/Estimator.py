@@ -1,16 +1,106 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from ..batch import DECODE_WORKERS, stack_poses
 from .decoder import OpenPoseDecoder
-from .utils import create_model, model_predict, draw_poses, body_mapper
+from .utils import (MODEL_CACHE_ROOT, create_model, model_preprocess, model_infer, model_infer_async, model_infer_batch,
+                    model_decode, draw_poses, body_mapper)
+
+logger = logging.getLogger("OV")
 
 class HumanPoseEstimator():
-    def __init__(self, model_path="Source/Models/human-pose-estimation-0001/FP16-INT8/human-pose-estimation-0001.xml", device="CPU"):
-        self.model_infor = create_model(model_path, device)
-        self.decoder = OpenPoseDecoder()
+    def __init__(self, model_path="Source/Models/human-pose-estimation-0001/FP16-INT8/human-pose-estimation-0001.xml", device="CPU",
+                 performance_hint=None, num_requests=1, max_people=None, cache_dir=MODEL_CACHE_ROOT):
+        self.model_infor = create_model(model_path, device, performance_hint, num_requests, cache_dir)
+        # max_people=1 时解码走单人快速路径
+        self.decoder = OpenPoseDecoder(max_people=max_people)
+        # 流水线模式下同时在设备上执行的帧数（AsyncInferQueue 的请求数）
+        infer_queue = self.model_infor["infer_queue"]
+        self.max_in_flight = len(infer_queue) if infer_queue is not None else 1
 
     def infer(self, image, is_draw=False):
-        result = model_predict(image, self.model_infor, self.decoder)
+        inputs = self.preprocess(image)
+        return self.postprocess(image, inputs, self.forward(inputs), is_draw)
+
+    # 流水线模式按以下三段分别在不同线程中调用，同一帧的结果依次传递
+    def preprocess(self, image):
+        return model_preprocess(image, self.model_infor)
+
+    def forward(self, inputs):
+        return model_infer(inputs[1], self.model_infor)
+
+    def forward_async(self, inputs):
+        """提交推理，返回结果为 forward() 返回值的 Future；max_in_flight 为 1 时同步执行"""
+        if self.model_infor["infer_queue"] is None:
+            future = Future()
+            future.set_result(self.forward(inputs))
+            return future
+        return model_infer_async(inputs[1], self.model_infor)
+
+    def postprocess(self, image, inputs, outputs, is_draw=False):
+        pafs, heatmaps = outputs
+        result = model_decode(inputs[0], pafs, heatmaps, self.model_infor, self.decoder)
         draw_img = draw_poses(image, result, point_score_threshold=0.1) if is_draw else image
         return result, draw_img
 
+    def infer_batch(self, images, batch_size=16):
+        """
+        多帧推理：每 batch_size 帧并行前处理后一次前向（batch 维为动态的模型），
+        与 InferenceExecutor 的批量任务相同，解码失败的帧（None）不送入模型，单帧出错时该帧按未检测到人处理
+
+        Args:
+            images (iterable): BGR 图像，可以是生成器，同时持有的图像不超过 batch_size 帧
+
+        Returns:
+            tuple: (poses, found)，见 batch.stack_poses()
+        """
+        poses_list = []
+        chunk = []
+        with ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix='batch-preprocess') as pool:
+            for image in images:
+                chunk.append(image)
+                if len(chunk) == batch_size:
+                    poses_list.extend(self._infer_chunk(chunk, pool, len(poses_list)))
+                    chunk = []
+            if chunk:
+                poses_list.extend(self._infer_chunk(chunk, pool, len(poses_list)))
+        return stack_poses(poses_list)
+
+    def _infer_chunk(self, chunk, pool, offset):
+        """infer_batch 的一块帧（从第 offset 帧开始），返回每帧的 poses（跳过或出错的帧为 None）"""
+        preprocessed = [(i, pool.submit(self.preprocess, image)) for i, image in enumerate(chunk) if image is not None]
+        inputs_list = []
+        for i, future in preprocessed:
+            try:
+                inputs_list.append((i, future.result()))
+            except Exception as e:
+                logger.warning("批量检测第 %d 帧前处理失败: %s", offset + i + 1, e)
+        results = [None] * len(chunk)
+        if inputs_list:
+            pafs, heatmaps = self.forward_batch([inputs for _, inputs in inputs_list])
+            for row, (i, (frame, _)) in enumerate(inputs_list):
+                try:
+                    results[i] = model_decode(frame, pafs[row:row + 1], heatmaps[row:row + 1], self.model_infor,
+                                              self.decoder)
+                except Exception as e:
+                    logger.warning("批量检测第 %d 帧后处理失败: %s", offset + i + 1, e)
+        return results
+
+    def forward_batch(self, inputs_list):
+        """
+        多帧一次前向（动态 batch 模型），InferenceExecutor 的批量任务分段调用：
+        每帧的 preprocess / postprocess 与这一次前向分别在 CPU 线程与设备线程中排队
+
+        Args:
+            inputs_list (list): 各帧 preprocess() 的返回值
+
+        Returns:
+            tuple: (pafs, heatmaps)，batch 维与 inputs_list 对应，第 i 帧的输出为 [i:i + 1]
+        """
+        return model_infer_batch(np.concatenate([input_img for _, input_img in inputs_list]), self.model_infor)
+
     def pose2dict(self, poses):
         if len(poses) == 0:
             pose_dict = {}
@@ -1,6 +1,8 @@
 import numpy as np
 
 # code from https://github.com/openvinotoolkit/open_model_zoo/blob/9296a3712069e688fe64ea02367466122c8e8a3b/demos/common/python/models/open_pose.py#L135
+# 取点与肢体 PAF 得分改为所有关节 / 肢体一次计算，分组改为关键点→pose entry 的索引表查找，结果与原实现一致；
+# max_people=1 时跳过多人分组，每个关节只取得分最高的点（见 group_single）
 class OpenPoseDecoder:
 
     BODY_PARTS_KPT_IDS = ((1, 2), (1, 5), (2, 3), (3, 4), (5, 6), (6, 7), (1, 8), (8, 9), (9, 10), (1, 11),
@@ -8,7 +10,11 @@ class OpenPoseDecoder:
     BODY_PARTS_PAF_IDS = (12, 20, 14, 16, 22, 24, 0, 2, 4, 6, 8, 10, 28, 30, 34, 32, 36, 18, 26)
 
     def __init__(self, num_joints=18, skeleton=BODY_PARTS_KPT_IDS, paf_indices=BODY_PARTS_PAF_IDS,
-                 max_points=100, score_threshold=0.1, min_paf_alignment_score=0.05, delta=0.5):
+                 max_points=100, score_threshold=0.1, min_paf_alignment_score=0.05, delta=0.5, max_people=None):
+        """
+        Args:
+            max_people (int): 最多返回的人数（按得分从高到低）；为 1 时使用单人快速路径，None 不限制
+        """
         self.num_joints = num_joints
         self.skeleton = skeleton
         self.paf_indices = paf_indices
@@ -16,15 +22,25 @@ class OpenPoseDecoder:
         self.score_threshold = score_threshold
         self.min_paf_alignment_score = min_paf_alignment_score
         self.delta = delta
+        self.max_people = max_people
 
         self.points_per_limb = 10
         self.grid = np.arange(self.points_per_limb, dtype=np.float32).reshape(1, -1, 1)
+        self.limb_a = np.array([a for a, _ in skeleton], dtype=np.intp)
+        self.limb_b = np.array([b for _, b in skeleton], dtype=np.intp)
+        self.limb_paf = np.array(paf_indices, dtype=np.intp)
+        # COCO 格式中各关节（OpenPose 顺序）的位置，颈部（1）不输出
+        self.reorder_map = np.array([0, -1, 6, 8, 10, 5, 7, 9, 12, 14, 16, 11, 13, 15, 2, 1, 4, 3], dtype=np.intp)
 
     def __call__(self, heatmaps, nms_heatmaps, pafs):
         batch_size, _, h, w = heatmaps.shape
         assert batch_size == 1, 'Batch size of 1 only supported'
 
-        keypoints = self.extract_points(heatmaps, nms_heatmaps)
+        single = self.max_people == 1
+        if single:
+            keypoints = self.extract_peaks(heatmaps, nms_heatmaps)
+        else:
+            keypoints = self.extract_points(heatmaps, nms_heatmaps)
         pafs = np.transpose(pafs, (0, 2, 3, 1))
 
         if self.delta > 0:
@@ -33,11 +49,17 @@ class OpenPoseDecoder:
                 np.clip(kpts[:, 0], 0, w - 1, out=kpts[:, 0])
                 np.clip(kpts[:, 1], 0, h - 1, out=kpts[:, 1])
 
-        pose_entries, keypoints = self.group_keypoints(keypoints, pafs, pose_entry_size=self.num_joints + 2)
+        if single:
+            pose_entries, keypoints = self.group_single(keypoints, pafs, pose_entry_size=self.num_joints + 2)
+        else:
+            pose_entries, keypoints = self.group_keypoints(keypoints, pafs, pose_entry_size=self.num_joints + 2)
         poses, scores = self.convert_to_coco_format(pose_entries, keypoints)
         if len(poses) > 0:
             poses = np.asarray(poses, dtype=np.float32)
             poses = poses.reshape((poses.shape[0], -1, 3))
+            if self.max_people is not None and len(poses) > self.max_people:
+                keep = np.argsort(-scores, kind='stable')[:self.max_people]
+                poses, scores = poses[keep], scores[keep]
         else:
             poses = np.empty((0, 17, 3), dtype=np.float32)
             scores = np.empty(0, dtype=np.float32)
@@ -49,55 +71,72 @@ class OpenPoseDecoder:
         assert batch_size == 1, 'Batch size of 1 only supported'
         assert channels_num >= self.num_joints
 
-        xs, ys, scores = self.top_k(nms_heatmaps)
-        masks = scores > self.score_threshold
-        all_keypoints = []
-        keypoint_id = 0
-        for k in range(self.num_joints):
-            # Filter low-score points.
-            mask = masks[0, k]
-            x = xs[0, k][mask].ravel()
-            y = ys[0, k][mask].ravel()
-            score = scores[0, k][mask].ravel()
-            n = len(x)
-            if n == 0:
-                all_keypoints.append(np.empty((0, 4), dtype=np.float32))
-                continue
-            # Apply quarter offset to improve localization accuracy.
-            x, y = self.refine(heatmaps[0, k], x, y)
-            np.clip(x, 0, w - 1, out=x)
-            np.clip(y, 0, h - 1, out=y)
-            # Pack resulting points.
-            keypoints = np.empty((n, 4), dtype=np.float32)
-            keypoints[:, 0] = x
-            keypoints[:, 1] = y
-            keypoints[:, 2] = score
-            keypoints[:, 3] = np.arange(keypoint_id, keypoint_id + n)
-            keypoint_id += n
-            all_keypoints.append(keypoints)
-        return all_keypoints
-
-    def top_k(self, heatmaps):
-        N, K, _, W = heatmaps.shape
-        heatmaps = heatmaps.reshape(N, K, -1)
-        # Get positions with top scores.
-        ind = heatmaps.argpartition(-self.max_points, axis=2)[:, :, -self.max_points:]
-        scores = np.take_along_axis(heatmaps, ind, axis=2)
-        # Keep top scores sorted.
-        subind = np.argsort(-scores, axis=2)
-        ind = np.take_along_axis(ind, subind, axis=2)
-        scores = np.take_along_axis(scores, subind, axis=2)
-        y, x = np.divmod(ind, W)
-        return x, y, scores
+        # 所有关节一次取出得分超过阈值的点，按关节、得分从高到低排列，每个关节最多 max_points 个
+        flat = nms_heatmaps[0, :self.num_joints].reshape(self.num_joints, -1)
+        joints, ind = np.nonzero(flat > self.score_threshold)
+        scores = flat[joints, ind]
+        order = np.lexsort((-scores, joints))
+        joints, ind, scores = joints[order], ind[order], scores[order]
+        counts = np.bincount(joints, minlength=self.num_joints)
+        if counts.max(initial=0) > self.max_points:
+            rank = np.arange(len(joints)) - np.repeat(np.cumsum(counts) - counts, counts)
+            keep = rank < self.max_points
+            joints, ind, scores = joints[keep], ind[keep], scores[keep]
+        return self.pack_points(heatmaps, joints, ind, scores)
+
+    def extract_peaks(self, heatmaps, nms_heatmaps):
+        """单人模式：每个关节只取 NMS 后得分最高的一个点"""
+        batch_size, channels_num, h, w = heatmaps.shape
+        assert batch_size == 1, 'Batch size of 1 only supported'
+        assert channels_num >= self.num_joints
+
+        flat = nms_heatmaps[0, :self.num_joints].reshape(self.num_joints, -1)
+        ind = flat.argmax(axis=1)
+        scores = flat[np.arange(self.num_joints), ind]
+        joints = np.flatnonzero(scores > self.score_threshold)
+        return self.pack_points(heatmaps, joints, ind[joints], scores[joints])
+
+    def pack_points(self, heatmaps, joints, ind, scores):
+        """
+        把按关节排好序的点修正位置后按关节拆分
+
+        Args:
+            joints (np.ndarray): 每个点所属的关节（非降序）
+            ind (np.ndarray): 每个点在热力图中展开后的下标
+            scores (np.ndarray): 每个点的得分
+
+        Returns:
+            list: 每个关节一个 (n, 4) 数组 (x, y, score, keypoint id)，keypoint id 按顺序连续编号
+        """
+        _, _, h, w = heatmaps.shape
+        y, x = np.divmod(ind, w)
+        # Apply quarter offset to improve localization accuracy.
+        x, y = self.refine(heatmaps[0], x, y, joints)
+        np.clip(x, 0, w - 1, out=x)
+        np.clip(y, 0, h - 1, out=y)
+        # Pack resulting points.
+        keypoints = np.empty((len(joints), 4), dtype=np.float32)
+        keypoints[:, 0] = x
+        keypoints[:, 1] = y
+        keypoints[:, 2] = scores
+        keypoints[:, 3] = np.arange(len(joints))
+        counts = np.bincount(joints, minlength=self.num_joints)
+        return np.split(keypoints, np.cumsum(counts)[:-1])
 
     @staticmethod
-    def refine(heatmap, x, y):
+    def refine(heatmap, x, y, channels=None):
+        """
+        Args:
+            heatmap (np.ndarray): (H, W) 热力图；给出 channels 时为 (K, H, W)
+            channels (np.ndarray): 每个点所在的通道
+        """
         h, w = heatmap.shape[-2:]
         valid = np.logical_and(np.logical_and(x > 0, x < w - 1), np.logical_and(y > 0, y < h - 1))
         xx = x[valid]
         yy = y[valid]
-        dx = np.sign(heatmap[yy, xx + 1] - heatmap[yy, xx - 1], dtype=np.float32) * 0.25
-        dy = np.sign(heatmap[yy + 1, xx] - heatmap[yy - 1, xx], dtype=np.float32) * 0.25
+        prefix = () if channels is None else (channels[valid],)
+        dx = np.sign(heatmap[prefix + (yy, xx + 1)] - heatmap[prefix + (yy, xx - 1)], dtype=np.float32) * 0.25
+        dy = np.sign(heatmap[prefix + (yy + 1, xx)] - heatmap[prefix + (yy - 1, xx)], dtype=np.float32) * 0.25
         x = x.astype(np.float32)
         y = y.astype(np.float32)
         x[valid] += dx
@@ -110,52 +149,62 @@ class OpenPoseDecoder:
         pose_b = pose_b[:-2]
         return np.all(np.logical_or.reduce((pose_a == pose_b, pose_a < 0, pose_b < 0)))
 
-    def update_poses(self, kpt_a_id, kpt_b_id, all_keypoints, connections, pose_entries, pose_entry_size):
-        for connection in connections:
-            pose_a_idx = -1
-            pose_b_idx = -1
-            for j, pose in enumerate(pose_entries):
-                if pose[kpt_a_id] == connection[0]:
-                    pose_a_idx = j
-                if pose[kpt_b_id] == connection[1]:
-                    pose_b_idx = j
+    def update_poses(self, kpt_a_id, kpt_b_id, all_keypoints, connections, entries):
+        """
+        按连接更新 pose entry，与原实现逐项扫描 pose_entries 的结果一致
+
+        owner[关键点 id] 记录包含该关键点的 entry 行号，查找由 O(entry 数) 变为 O(1)；
+        合并时被并入的 entry 只标记删除，最后按创建顺序保留未删除的行。
+
+        Args:
+            connections (tuple): (a_ids, b_ids, affinity_scores)，同一肢体中 a、b 各不重复
+            entries (_PoseEntries): pose entry 表
+        """
+        owner = entries.owner
+        for a, b, score in zip(*connections):
+            pose_a_idx = owner[a]
+            pose_b_idx = owner[b]
             if pose_a_idx < 0 and pose_b_idx < 0:
                 # Create new pose entry.
-                pose_entry = np.full(pose_entry_size, -1, dtype=np.float32)
-                pose_entry[kpt_a_id] = connection[0]
-                pose_entry[kpt_b_id] = connection[1]
+                pose_entry = entries.append()
+                pose_entry[kpt_a_id] = a
+                pose_entry[kpt_b_id] = b
                 pose_entry[-1] = 2
-                pose_entry[-2] = np.sum(all_keypoints[connection[0:2], 2]) + connection[2]
-                pose_entries.append(pose_entry)
+                pose_entry[-2] = np.sum(all_keypoints[[a, b], 2]) + score
+                owner[a] = owner[b] = entries.size - 1
             elif pose_a_idx >= 0 and pose_b_idx >= 0 and pose_a_idx != pose_b_idx:
                 # Merge two poses are disjoint merge them, otherwise ignore connection.
-                pose_a = pose_entries[pose_a_idx]
-                pose_b = pose_entries[pose_b_idx]
+                pose_a = entries.rows[pose_a_idx]
+                pose_b = entries.rows[pose_b_idx]
                 if self.is_disjoint(pose_a, pose_b):
                     pose_a += pose_b
                     pose_a[:-2] += 1
-                    pose_a[-2] += connection[2]
-                    del pose_entries[pose_b_idx]
+                    pose_a[-2] += score
+                    entries.alive[pose_b_idx] = False
+                    owner[owner == pose_b_idx] = pose_a_idx
             elif pose_a_idx >= 0 and pose_b_idx >= 0:
                 # Adjust score of a pose.
-                pose_entries[pose_a_idx][-2] += connection[2]
+                entries.rows[pose_a_idx][-2] += score
             elif pose_a_idx >= 0:
                 # Add a new limb into pose.
-                pose = pose_entries[pose_a_idx]
-                if pose[kpt_b_id] < 0:
-                    pose[-2] += all_keypoints[connection[1], 2]
-                pose[kpt_b_id] = connection[1]
-                pose[-2] += connection[2]
-                pose[-1] += 1
-            elif pose_b_idx >= 0:
+                self._add_limb(entries, pose_a_idx, kpt_b_id, b, score, all_keypoints)
+            else:
                 # Add a new limb into pose.
-                pose = pose_entries[pose_b_idx]
-                if pose[kpt_a_id] < 0:
-                    pose[-2] += all_keypoints[connection[0], 2]
-                pose[kpt_a_id] = connection[0]
-                pose[-2] += connection[2]
-                pose[-1] += 1
-        return pose_entries
+                self._add_limb(entries, pose_b_idx, kpt_a_id, a, score, all_keypoints)
+
+    @staticmethod
+    def _add_limb(entries, pose_idx, kpt_id, keypoint, score, all_keypoints):
+        pose = entries.rows[pose_idx]
+        replaced = int(pose[kpt_id])
+        if replaced < 0:
+            pose[-2] += all_keypoints[keypoint, 2]
+        else:
+            # 该关节原来的点被替换，不再属于这个 entry
+            entries.owner[replaced] = -1
+        pose[kpt_id] = keypoint
+        pose[-2] += score
+        pose[-1] += 1
+        entries.owner[keypoint] = pose_idx
 
     @staticmethod
     def connections_nms(a_idx, b_idx, affinity_scores):
@@ -164,98 +213,190 @@ class OpenPoseDecoder:
         affinity_scores = affinity_scores[order]
         a_idx = a_idx[order]
         b_idx = b_idx[order]
+        if len(order) == 1:
+            return a_idx, b_idx, affinity_scores
         idx = []
         has_kpt_a = set()
         has_kpt_b = set()
-        for t, (i, j) in enumerate(zip(a_idx, b_idx)):
+        # 转为 Python int 再查集合，比逐个取 numpy 标量快得多
+        for t, (i, j) in enumerate(zip(a_idx.tolist(), b_idx.tolist())):
             if i not in has_kpt_a and j not in has_kpt_b:
                 idx.append(t)
                 has_kpt_a.add(i)
                 has_kpt_b.add(j)
-        idx = np.asarray(idx, dtype=np.int32)
+        idx = np.asarray(idx, dtype=np.intp)
         return a_idx[idx], b_idx[idx], affinity_scores[idx]
 
+    def limb_scores(self, kpts_a, kpts_b, paf_channels, pafs):
+        """
+        计算候选肢体（a[i] → b[i]）与 PAF 的匹配得分，所有肢体的候选一次算完
+
+        Returns:
+            tuple: (affinity_scores, success_ratio)
+        """
+        vec_raw = (kpts_b[:, :2] - kpts_a[:, :2]).reshape(-1, 1, 2)
+
+        # Sample points along every candidate limb vector.
+        steps = (1 / (self.points_per_limb - 1) * vec_raw)
+        points = steps * self.grid + kpts_a[:, :2].reshape(-1, 1, 2)
+        points = points.round().astype(dtype=np.intp)
+
+        # Compute affinity score between candidate limb vectors and part affinity field.
+        # pafs 为 (1, H, W, C)，按展开后的下标一次取出所有采样点的 (dx, dy)
+        _, h, w, c = pafs.shape
+        flat_pafs = np.ascontiguousarray(pafs).reshape(-1)
+        index = (points[..., 1] * w + points[..., 0]) * c + paf_channels[:, None]
+        vec_norm = np.linalg.norm(vec_raw, ord=2, axis=-1, keepdims=True)
+        vec = (vec_raw / (vec_norm + 1e-6)).reshape(-1, 2)
+        # 等同于 (field * vec).sum(-1)
+        affinity_scores = flat_pafs[index] * vec[:, :1] + flat_pafs[index + 1] * vec[:, 1:]
+        valid_affinity_scores = affinity_scores > self.min_paf_alignment_score
+        valid_num = valid_affinity_scores.sum(1)
+        affinity_scores = (affinity_scores * valid_affinity_scores).sum(1) / (valid_num + 1e-6)
+        success_ratio = valid_num / self.points_per_limb
+        return affinity_scores, success_ratio
+
     def group_keypoints(self, all_keypoints_by_type, pafs, pose_entry_size=20):
         all_keypoints = np.concatenate(all_keypoints_by_type, axis=0)
-        pose_entries = []
-        # For every limb.
-        for part_id, paf_channel in enumerate(self.paf_indices):
-            kpt_a_id, kpt_b_id = self.skeleton[part_id]
-            kpts_a = all_keypoints_by_type[kpt_a_id]
-            kpts_b = all_keypoints_by_type[kpt_b_id]
-            n = len(kpts_a)
-            m = len(kpts_b)
-            if n == 0 or m == 0:
-                continue
+        counts = np.array([len(kpts) for kpts in all_keypoints_by_type], dtype=np.intp)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
 
-            # Get vectors between all pairs of keypoints, i.e. candidate limb vectors.
-            a = kpts_a[:, :2]
-            a = np.broadcast_to(a[None], (m, n, 2))
-            b = kpts_b[:, :2]
-            vec_raw = (b[:, None, :] - a).reshape(-1, 1, 2)
-
-            # Sample points along every candidate limb vector.
-            steps = (1 / (self.points_per_limb - 1) * vec_raw)
-            points = steps * self.grid + a.reshape(-1, 1, 2)
-            points = points.round().astype(dtype=np.int32)
-            x = points[..., 0].ravel()
-            y = points[..., 1].ravel()
-
-            # Compute affinity score between candidate limb vectors and part affinity field.
-            part_pafs = pafs[0, :, :, paf_channel:paf_channel + 2]
-            field = part_pafs[y, x].reshape(-1, self.points_per_limb, 2)
-            vec_norm = np.linalg.norm(vec_raw, ord=2, axis=-1, keepdims=True)
-            vec = vec_raw / (vec_norm + 1e-6)
-            affinity_scores = (field * vec).sum(-1).reshape(-1, self.points_per_limb)
-            valid_affinity_scores = affinity_scores > self.min_paf_alignment_score
-            valid_num = valid_affinity_scores.sum(1)
-            affinity_scores = (affinity_scores * valid_affinity_scores).sum(1) / (valid_num + 1e-6)
-            success_ratio = valid_num / self.points_per_limb
+        # 所有肢体的全部候选 (b, a) 组合一次计算得分，顺序与逐个肢体时相同（肢体内 b 为外层、a 为内层）
+        n = counts[self.limb_a]
+        m = counts[self.limb_b]
+        pairs = n * m
+        limb_of_pair = np.repeat(np.arange(len(self.limb_a)), pairs)
+        local = np.arange(pairs.sum()) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+        b_local, a_local = np.divmod(local, n[limb_of_pair]) if len(local) else (local, local)
+        a_rows = offsets[self.limb_a][limb_of_pair] + a_local
+        b_rows = offsets[self.limb_b][limb_of_pair] + b_local
+        affinity_scores, success_ratio = self.limb_scores(
+            all_keypoints[a_rows], all_keypoints[b_rows], self.limb_paf[limb_of_pair], pafs)
+        valid = np.logical_and(affinity_scores > 0, success_ratio > 0.8)
+        bounds = np.concatenate(([0], np.cumsum(pairs)))
 
+        entries = _PoseEntries(len(all_keypoints), pose_entry_size)
+        # For every limb.
+        for part_id in range(len(self.limb_a)):
+            start, end = bounds[part_id], bounds[part_id + 1]
             # Get a list of limbs according to the obtained affinity score.
-            valid_limbs = np.where(np.logical_and(affinity_scores > 0, success_ratio > 0.8))[0]
+            valid_limbs = np.flatnonzero(valid[start:end])
             if len(valid_limbs) == 0:
                 continue
-            b_idx, a_idx = np.divmod(valid_limbs, n)
-            affinity_scores = affinity_scores[valid_limbs]
 
             # Suppress incompatible connections.
-            a_idx, b_idx, affinity_scores = self.connections_nms(a_idx, b_idx, affinity_scores)
-            connections = list(zip(kpts_a[a_idx, 3].astype(np.int32),
-                                   kpts_b[b_idx, 3].astype(np.int32),
-                                   affinity_scores))
-            if len(connections) == 0:
+            a_idx, b_idx, scores = self.connections_nms(a_local[start:end][valid_limbs],
+                                                        b_local[start:end][valid_limbs],
+                                                        affinity_scores[start:end][valid_limbs])
+            if len(scores) == 0:
                 continue
+            connections = (all_keypoints[offsets[self.limb_a[part_id]] + a_idx, 3].astype(np.int32),
+                           all_keypoints[offsets[self.limb_b[part_id]] + b_idx, 3].astype(np.int32),
+                           scores)
 
             # Update poses with new connections.
-            pose_entries = self.update_poses(kpt_a_id, kpt_b_id, all_keypoints,
-                                             connections, pose_entries, pose_entry_size)
+            self.update_poses(self.limb_a[part_id], self.limb_b[part_id], all_keypoints, connections, entries)
 
         # Remove poses with not enough points.
-        pose_entries = np.asarray(pose_entries, dtype=np.float32).reshape(-1, pose_entry_size)
+        pose_entries = entries.entries()
         pose_entries = pose_entries[pose_entries[:, -1] >= 3]
         return pose_entries, all_keypoints
 
-    @staticmethod
-    def convert_to_coco_format(pose_entries, all_keypoints):
+    def group_single(self, all_keypoints_by_type, pafs, pose_entry_size=20):
+        """
+        单人模式的分组：每个关节至多一个点，所有肢体一次算出 PAF 得分，
+        由有效肢体连起来的关节中取点数最多（其次得分最高）的一组作为这个人
+
+        Returns:
+            tuple: (pose_entries, all_keypoints)，pose_entries 至多一行
+        """
+        all_keypoints = np.concatenate(all_keypoints_by_type, axis=0)
+        empty = np.empty((0, pose_entry_size), dtype=np.float32)
+        row_of = np.full(self.num_joints, -1, dtype=np.intp)
+        present = np.array([len(kpts) > 0 for kpts in all_keypoints_by_type])
+        row_of[present] = np.arange(present.sum())
+
+        limbs = np.flatnonzero(present[self.limb_a] & present[self.limb_b])
+        if len(limbs) == 0:
+            return empty, all_keypoints
+        a_rows = row_of[self.limb_a[limbs]]
+        b_rows = row_of[self.limb_b[limbs]]
+        affinity_scores, success_ratio = self.limb_scores(
+            all_keypoints[a_rows], all_keypoints[b_rows], self.limb_paf[limbs], pafs)
+        valid = np.logical_and(affinity_scores > 0, success_ratio > 0.8)
+
+        # 有效肢体把关节连成若干组（最多 19 条边的并查集）
+        parent = list(range(self.num_joints))
+
+        def find(joint):
+            while parent[joint] != joint:
+                parent[joint] = parent[parent[joint]]
+                joint = parent[joint]
+            return joint
+
+        for limb in limbs[valid]:
+            parent[find(self.limb_a[limb])] = find(self.limb_b[limb])
+
+        groups = {}
+        for limb, score in zip(limbs[valid], affinity_scores[valid]):
+            root = find(self.limb_a[limb])
+            joints, total = groups.get(root, (set(), 0.0))
+            joints.update((self.limb_a[limb], self.limb_b[limb]))
+            groups[root] = (joints, total + score)
+        if not groups:
+            return empty, all_keypoints
+
+        def group_score(joints, limb_total):
+            return limb_total + sum(all_keypoints[row_of[j], 2] for j in joints)
+
+        joints, limb_total = max(groups.values(), key=lambda g: (len(g[0]), group_score(*g)))
+        if len(joints) < 3:
+            return empty, all_keypoints
+        joints = np.array(sorted(joints), dtype=np.intp)
+        pose_entry = np.full((1, pose_entry_size), -1, dtype=np.float32)
+        pose_entry[0, joints] = all_keypoints[row_of[joints], 3]
+        pose_entry[0, -2] = group_score(joints, limb_total)
+        pose_entry[0, -1] = len(joints)
+        return pose_entry, all_keypoints
+
+    def convert_to_coco_format(self, pose_entries, all_keypoints):
         num_joints = 17
-        coco_keypoints = []
-        scores = []
-        for pose in pose_entries:
-            if len(pose) == 0:
-                continue
-            keypoints = np.zeros(num_joints * 3)
-            reorder_map = [0, -1, 6, 8, 10, 5, 7, 9, 12, 14, 16, 11, 13, 15, 2, 1, 4, 3]
-            person_score = pose[-2]
-            for keypoint_id, target_id in zip(pose[:-2], reorder_map):
-                if target_id < 0:
-                    continue
-                cx, cy, score = 0, 0, 0  # keypoint not found
-                if keypoint_id != -1:
-                    cx, cy, score = all_keypoints[int(keypoint_id), 0:3]
-                keypoints[target_id * 3 + 0] = cx
-                keypoints[target_id * 3 + 1] = cy
-                keypoints[target_id * 3 + 2] = score
-            coco_keypoints.append(keypoints)
-            scores.append(person_score * max(0, (pose[-1] - 1)))  # -1 for 'neck'
-        return np.asarray(coco_keypoints), np.asarray(scores)
\ No newline at end of file
+        if len(pose_entries) == 0:
+            return np.asarray([]), np.asarray([])
+        keypoint_ids = pose_entries[:, :-2].astype(np.intp)
+        found = keypoint_ids >= 0
+        # keypoint not found 时为 (0, 0, 0)
+        values = np.where(found[..., None], all_keypoints[np.where(found, keypoint_ids, 0), 0:3], 0)
+        targets = self.reorder_map >= 0
+        coco_keypoints = np.zeros((len(pose_entries), num_joints, 3))
+        coco_keypoints[:, self.reorder_map[targets]] = values[:, targets]
+        scores = pose_entries[:, -2] * np.maximum(0, pose_entries[:, -1] - 1)  # -1 for 'neck'
+        return coco_keypoints.reshape(len(pose_entries), -1), scores
+
+
+class _PoseEntries:
+    """
+    group_keypoints 使用的 pose entry 表
+
+    rows 按创建顺序存放 entry（容量不足时加倍），合并时被并入的 entry 只把 alive 置为 False；
+    owner[关键点 id] 为包含该关键点的 entry 行号，-1 表示不属于任何 entry。
+    """
+
+    def __init__(self, num_keypoints, pose_entry_size):
+        capacity = max(8, num_keypoints)
+        self.rows = np.full((capacity, pose_entry_size), -1, dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.owner = np.full(num_keypoints, -1, dtype=np.intp)
+        self.size = 0
+
+    def append(self):
+        if self.size == len(self.rows):
+            self.rows = np.concatenate((self.rows, np.full_like(self.rows, -1)))
+            self.alive = np.concatenate((self.alive, np.zeros_like(self.alive)))
+        row = self.rows[self.size]
+        self.alive[self.size] = True
+        self.size += 1
+        return row
+
+    def entries(self):
+        return self.rows[:self.size][self.alive[:self.size]]
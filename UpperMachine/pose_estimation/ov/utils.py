@@ -1,7 +1,21 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
 import numpy as np
 from numpy.lib.stride_tricks import as_strided
 import cv2
-from openvino import Core
+
+from UpperMachine.metrics import pipeline_metrics
+
+logger = logging.getLogger("OV")
+
+# 编译后模型的缓存目录（OpenVINO CACHE_DIR），按模型内容、设备与编译参数分子目录
+MODEL_CACHE_ROOT = "Source/Models/ov_cache"
 
 colors = ((255, 0, 0), (255, 0, 255), (170, 0, 255), (255, 0, 85), (255, 0, 170), (85, 255, 0),
           (255, 170, 0), (0, 255, 0), (255, 255, 0), (0, 255, 85), (170, 255, 0), (0, 85, 255),
@@ -69,19 +83,63 @@ def pool2d(A, kernel_size, stride, padding, pool_mode="max"):
 def heatmap_nms(heatmaps, pooled_heatmaps):
     return heatmaps * (heatmaps == pooled_heatmaps)
 
+
+# 每个线程一组 batched_heatmap_nms 的缓冲区（推理线程与上传图片的请求线程可能同时解码）
+_nms_buffers = threading.local()
+
+
+def batched_heatmap_nms(heatmaps, kernel_size=3):
+    """
+    所有通道一次完成的 max-pool NMS，结果与 heatmap_nms(heatmaps, pool2d(...)) 逐位一致
+
+    各通道上下排列成一张图，通道之间留 kernel_size // 2 行 0 作为 pool2d 的零填充，
+    用一次 cv2.dilate（左右同样按 0 填充）得到所有通道的 max-pool。
+    缓冲区按热力图形状缓存，形状不变时不再分配。
+
+    Args:
+        heatmaps (np.ndarray): (N, C, H, W) 热力图
+
+    Returns:
+        np.ndarray: 与 heatmaps 同形状的 NMS 结果；为复用的缓冲区，同一线程下次调用时会被覆盖
+    """
+    key = (heatmaps.shape, heatmaps.dtype, kernel_size)
+    buffers = getattr(_nms_buffers, 'buffers', None)
+    if buffers is None or buffers[0] != key:
+        n, c, h, w = heatmaps.shape
+        pad = kernel_size // 2
+        stacked = np.zeros((pad + n * c * (h + pad), w), dtype=heatmaps.dtype)
+        pooled = np.empty_like(stacked)
+        buffers = (
+            key,
+            np.ones((kernel_size, kernel_size), dtype=np.uint8),
+            stacked,
+            pooled,
+            # 各通道在上下排列的图中的位置（跳过分隔的 0 行）
+            stacked[pad:].reshape(n, c, h + pad, w)[:, :, :h],
+            pooled[pad:].reshape(n, c, h + pad, w)[:, :, :h],
+            np.empty(heatmaps.shape, dtype=bool),
+            np.empty(heatmaps.shape, dtype=heatmaps.dtype),
+        )
+        _nms_buffers.buffers = buffers
+    _, kernel, stacked, pooled, channels, pooled_channels, mask, nms_heatmaps = buffers
+
+    np.copyto(channels, heatmaps)
+    cv2.dilate(stacked, kernel, dst=pooled, borderType=cv2.BORDER_CONSTANT, borderValue=0)
+    np.equal(heatmaps, pooled_channels, out=mask)
+    return np.multiply(heatmaps, mask, out=nms_heatmaps)
+
 # Get poses from results.
-def process_results(img, pafs, heatmaps, compiled_model, decoder):
+def process_results(img, pafs, heatmaps, output_scale, decoder):
+    """
+    Args:
+        output_scale (tuple): (x, y) 输出特征图坐标到 img 坐标的缩放，见 get_output_scale()
+    """
     # This processing comes from
     # https://github.com/openvinotoolkit/open_model_zoo/blob/master/demos/common/python/models/open_pose.py
-    pooled_heatmaps = np.array(
-        [[pool2d(h, kernel_size=3, stride=1, padding=1, pool_mode="max") for h in heatmaps[0]]]
-    )
-    nms_heatmaps = heatmap_nms(heatmaps, pooled_heatmaps)
+    nms_heatmaps = batched_heatmap_nms(heatmaps, kernel_size=3)
 
     # Decode poses.
     poses, scores = decoder(heatmaps, nms_heatmaps, pafs)
-    output_shape = list(compiled_model.output(index=0).partial_shape)
-    output_scale = img.shape[1] / output_shape[3].get_length(), img.shape[0] / output_shape[2].get_length()
     # Multiply coordinates by a scaling factor.
     poses[:, :, :2] *= output_scale
     return poses, scores
@@ -106,34 +164,98 @@ def draw_poses(img, poses, point_score_threshold=0.5, skeleton=default_skeleton)
     cv2.addWeighted(img, 0.4, img_limbs, 0.6, 0, dst=img)
     return img
 
-def create_model(model_path = "./human-pose-estimation-0001/FP16-INT8/human-pose-estimation-0001.xml", device="CPU"):
+def model_cache_dir(model_path, device, config, cache_root=MODEL_CACHE_ROOT):
+    """
+    编译缓存的子目录：模型文件（.xml 与同名 .bin）内容、设备与编译参数任一变化时换用新目录，
+    不会加载到与当前模型不符的缓存
+
+    Returns:
+        str: cache_root/<模型名>-<摘要>
+    """
+    digest = hashlib.sha256()
+    for path in (model_path, os.path.splitext(model_path)[0] + ".bin"):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    digest.update(json.dumps({"device": device, "config": config}, sort_keys=True).encode())
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(cache_root, f"{name}-{digest.hexdigest()[:16]}")
+
+
+def create_model(model_path = "./human-pose-estimation-0001/FP16-INT8/human-pose-estimation-0001.xml", device="CPU",
+                 performance_hint=None, num_requests=1, cache_dir=MODEL_CACHE_ROOT):
+    """
+    Args:
+        performance_hint (str): "LATENCY" / "THROUGHPUT"，None 时使用设备默认值
+        num_requests (int): 异步推理队列的请求数；大于 1 时创建 AsyncInferQueue，0 表示由设备决定
+        cache_dir (str): 编译缓存的根目录（OpenVINO CACHE_DIR），命中时跳过读取与编译模型；None 时不缓存
+    """
+    # 仅在创建模型时导入，前后处理（NMS、解码、绘制）不依赖 openvino
+    from openvino import AsyncInferQueue, Core
+
     # model_path = "./human-pose-estimation-0001/FP16-INT8/human-pose-estimation-0001.xml"
     # Initialize OpenVINO Runtime
     ie_core = Core()
-    model = ie_core.read_model(model_path)
     # Let the AUTO device decide where to load the model (you can use CPU, GPU or MYRIAD as well).
-    # compiled_model = ie_core.compile_model(model=model, device_name="CPU", config={"PERFORMANCE_HINT": "LATENCY"})
-    compiled_model = ie_core.compile_model(model=model, device_name=device)
+    config = {"PERFORMANCE_HINT": performance_hint} if performance_hint else {}
+    if cache_dir:
+        cache_dir = model_cache_dir(model_path, device, config, cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        ie_core.set_property({"CACHE_DIR": cache_dir})
+    # 传入路径而不是 read_model 的结果：缓存命中时 OpenVINO 直接导入编译结果，不再解析 IR
+    start = time.perf_counter()
+    compiled_model = ie_core.compile_model(model=model_path, device_name=device, config=config)
+    logger.info("模型编译耗时 %.2f s（缓存目录: %s）", time.perf_counter() - start, cache_dir or "无")
 
     # Get the input and output names of nodes.
     input_layer = compiled_model.input(0)
 
     # Get the input size.
     height, width = list(input_layer.shape)[2:]
+    # 输出特征图大小，解码时换算坐标（不必每帧读取 partial_shape）
+    output_height, output_width = list(compiled_model.output(index=0).shape)[2:]
 
     pafs_output_key = compiled_model.output("Mconv7_stage2_L1")
     heatmaps_output_key = compiled_model.output("Mconv7_stage2_L2")
 
-    return {"height":height, "width":width, "compiled_model":compiled_model, "pafs_output_key":pafs_output_key, "heatmaps_output_key":heatmaps_output_key}
+    infer_queue = None
+    if num_requests != 1:
+        # 多个推理请求同时在设备上执行，结果在回调中拷贝出来（请求的输出张量会被下一次推理复用）
+        infer_queue = AsyncInferQueue(compiled_model, num_requests)
 
+        def on_done(request, userdata):
+            future, start, scope = userdata
+            with pipeline_metrics.scope(scope):
+                pipeline_metrics.record('inference', time.perf_counter() - start)
+            try:
+                future.set_result((request.get_tensor(pafs_output_key).data.copy(),
+                                   request.get_tensor(heatmaps_output_key).data.copy()))
+            except Exception as e:
+                future.set_exception(e)
 
-def model_predict(frame, model_infor, decoder):
+        infer_queue.set_callback(on_done)
+
+    return {"height":height, "width":width, "compiled_model":compiled_model, "pafs_output_key":pafs_output_key,
+            "heatmaps_output_key":heatmaps_output_key, "infer_queue":infer_queue,
+            "output_height":output_height, "output_width":output_width,
+            # (画面大小, 缩放)，画面大小不变时直接复用，见 get_output_scale()
+            "output_scale":None,
+            # 批量推理的模型在第一次调用 model_infer_batch 时编译
+            "core":ie_core, "model_path":model_path, "device":device, "config":config, "batch_model":None}
+
+
+def model_preprocess(frame, model_infor):
+    """
+    缩放并转换为模型输入
+
+    Returns:
+        tuple: (frame, input_img)，frame 为缩放后（不超过 1280）的画面，关键点坐标以其为准
+    """
     height = model_infor["height"]
     width = model_infor["width"]
-    pafs_output_key = model_infor["pafs_output_key"]
-    heatmaps_output_key = model_infor["heatmaps_output_key"]
-    compiled_model = model_infor["compiled_model"]
 
+    start = time.perf_counter()
     # If the frame is larger than full HD, reduce size to improve the performance.
     scale = 1280 / max(frame.shape)
     if scale < 1:
@@ -144,12 +266,85 @@ def model_predict(frame, model_infor, decoder):
     input_img = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
     # Create a batch of images (size = 1).
     input_img = input_img.transpose((2,0,1))[np.newaxis, ...]
+    pipeline_metrics.record('preprocess', time.perf_counter() - start)
+    return frame, input_img
+
+
+def model_infer(input_img, model_infor):
+    """
+    模型前向
+
+    Returns:
+        tuple: (pafs, heatmaps)，为结果的拷贝，下一次推理不会改写
+    """
+    start = time.perf_counter()
+    results = model_infor["compiled_model"]([input_img])
+    pipeline_metrics.record('inference', time.perf_counter() - start)
+    return results[model_infor["pafs_output_key"]], results[model_infor["heatmaps_output_key"]]
+
+
+def model_infer_async(input_img, model_infor):
+    """
+    提交一次异步推理（所有请求都在执行时阻塞到有空闲请求为止）
+
+    Returns:
+        concurrent.futures.Future: 结果为 (pafs, heatmaps)
+    """
+    future = Future()
+    # 回调在 OpenVINO 的线程中执行，带上提交方的统计 scope
+    model_infor["infer_queue"].start_async({0: input_img},
+                                           (future, time.perf_counter(), pipeline_metrics.current_scope()))
+    return future
+
+
+def model_infer_batch(input_batch, model_infor):
+    """
+    多帧一次前向：batch 维为动态的模型另行编译（第一次调用时），单帧推理仍使用 batch 为 1 的模型
+
+    Args:
+        input_batch (np.ndarray): (B, 3, H, W)，model_preprocess 的输入沿 batch 维拼接
+
+    Returns:
+        tuple: (pafs, heatmaps)，batch 维为 B
+    """
+    if model_infor["batch_model"] is None:
+        # core 已设置 CACHE_DIR，reshape 后的模型同样按其内容缓存
+        model = model_infor["core"].read_model(model_infor["model_path"])
+        model.reshape([-1, 3, model_infor["height"], model_infor["width"]])
+        model_infor["batch_model"] = model_infor["core"].compile_model(
+            model=model, device_name=model_infor["device"], config=model_infor["config"])
+    batch_model = model_infor["batch_model"]
+
+    start = time.perf_counter()
+    results = batch_model([input_batch])
+    pipeline_metrics.record('inference', time.perf_counter() - start)
+    return results[batch_model.output("Mconv7_stage2_L1")], results[batch_model.output("Mconv7_stage2_L2")]
+
+
+def get_output_scale(frame, model_infor):
+    """
+    输出特征图坐标到 frame 坐标的缩放 (x, y)；相机画面大小固定，按画面大小缓存
+
+    Returns:
+        tuple: (x_scale, y_scale)
+    """
+    cached = model_infor["output_scale"]
+    size = frame.shape[:2]
+    if cached is None or cached[0] != size:
+        cached = (size, (size[1] / model_infor["output_width"], size[0] / model_infor["output_height"]))
+        model_infor["output_scale"] = cached
+    return cached[1]
 
-    # Get results.
-    results = compiled_model([input_img])
 
-    pafs = results[pafs_output_key]
-    heatmaps = results[heatmaps_output_key]
+def model_decode(frame, pafs, heatmaps, model_infor, decoder):
+    start = time.perf_counter()
     # Get poses from network results.
-    poses, scores = process_results(frame, pafs, heatmaps, compiled_model, decoder)
+    poses, scores = process_results(frame, pafs, heatmaps, get_output_scale(frame, model_infor), decoder)
+    pipeline_metrics.record('decode', time.perf_counter() - start)
     return poses
+
+
+def model_predict(frame, model_infor, decoder):
+    frame, input_img = model_preprocess(frame, model_infor)
+    pafs, heatmaps = model_infer(input_img, model_infor)
+    return model_decode(frame, pafs, heatmaps, model_infor, decoder)
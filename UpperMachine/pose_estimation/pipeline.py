@@ -0,0 +1,327 @@
+"""
+流水线模式：前处理、推理、后处理分别在不同线程中进行
+
+    相机线程 → FrameRing → 前处理线程 → [队列] → 推理线程 → [队列] → 调用方（后处理、姿势匹配、发送命令）
+
+第 N 帧在调用方线程中解码、匹配时，第 N+1 帧已在做前处理与推理，BPU/推理设备不再等待 CPU 后处理。
+估计器支持 forward_async 时，推理线程最多同时提交 max_in_flight 帧（OpenVINO AsyncInferQueue / BPU 线程池）。
+
+- 阶段之间的队列容量为 1，帧按序号顺序通过各阶段；并发推理的结果也按提交顺序交出，不会乱序
+- 前处理线程在队列有空位时才从 FrameRing 借出最新帧（更旧的未读帧直接作废），不做注定被丢弃的前处理；
+  并按推理与前处理的平均耗时推迟到推理线程即将空闲时才开始，帧不会在队列中等待整个推理时长
+- 推理结果队列为 latest-wins：调用方跟不上时丢弃较旧的结果，保证交给调用方的总是最新一帧
+- 帧在整个流水线中都不拷贝，借出的槽位随帧传递，被丢弃或调用方用完后归还
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger("PIPELINE")
+
+# 流水线中最多同时借出的槽位：前处理、前处理队列、推理、结果队列、调用方各一（推理为 max_in_flight 个）
+PIPELINE_SLOTS = 5
+
+
+def required_ring_slots(max_in_flight=1):
+    """流水线模式下 FrameRing 至少需要的槽位数：流水线借出的槽位，加上相机写入与最新帧各一个"""
+    return PIPELINE_SLOTS + max(1, max_in_flight) - 1 + 2
+
+
+def _ema(average, value, alpha=0.2):
+    return value if average == 0.0 else average + alpha * (value - average)
+
+
+class PipelineItem:
+    """
+    在流水线各阶段之间传递的一帧
+
+    Attributes:
+        slot (FrameSlot): 借出的 FrameRing 槽位，frame / seq / captured_at 取自其中
+        started_at (float): 开始前处理的时刻（time.perf_counter()）
+        inputs: estimator.preprocess() 的结果
+        outputs: estimator.forward() 的结果
+        result (tuple): 不支持分段调用的估计器在推理线程中直接得到的 (poses, draw_img)
+    """
+
+    __slots__ = ('slot', 'started_at', 'inputs', 'outputs', 'result')
+
+    def __init__(self, slot):
+        self.slot = slot
+        self.started_at = time.perf_counter()
+        self.inputs = None
+        self.outputs = None
+        self.result = None
+
+    @property
+    def frame(self):
+        return self.slot.frame
+
+    @property
+    def seq(self):
+        return self.slot.seq
+
+    @property
+    def captured_at(self):
+        return self.slot.captured_at
+
+
+class StageQueue:
+    """
+    阶段之间的有界 FIFO 队列
+
+    Args:
+        maxsize (int): 容量
+        on_drop (callable): on_drop(item)，队列满时 put() 丢弃最旧的一项并交给它处理（归还槽位）
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self._items = []
+        self._cond = threading.Condition()
+        self.is_closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            dropped = None
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.pop(0)
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None, unless=None):
+        """
+        取出最旧的一项，超时、已关闭或 unless() 为真时返回 None
+
+        Args:
+            unless (callable): 额外的唤醒条件，条件可能变化时由 notify() 唤醒等待者
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self.is_closed or (unless is not None and unless()),
+                                       timeout):
+                return None
+            if not self._items:
+                return None
+            item = self._items.pop(0)
+            self._cond.notify_all()
+            return item
+
+    def notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_space(self, timeout=None):
+        """等待队列有空位，超时或已关闭时返回 False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._items) < self.maxsize or self.is_closed,
+                                       timeout) and not self.is_closed
+
+    def close(self):
+        """唤醒所有等待者，并返回队列中剩余的项"""
+        with self._cond:
+            self.is_closed = True
+            items, self._items = self._items, []
+            self._cond.notify_all()
+        return items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class InferencePipeline:
+    """
+    前处理线程 + 推理线程，调用方通过 get() 取得已完成推理的帧，再调用 finish() 完成后处理
+
+    估计器实现 preprocess(image) / forward(inputs) / postprocess(image, inputs, outputs, is_draw)
+    时三段分别在前处理线程、推理线程、调用方线程中执行；
+    否则推理线程直接调用 infer()，调用方只做姿势匹配与发送（仍与下一帧的推理重叠）。
+
+    Args:
+        estimator: 姿态估计器
+        frame_ring (FrameRing): 相机线程写入的帧环形缓冲区，槽位数至少为 PIPELINE_SLOTS + 2
+        is_draw (bool): 是否在服务端绘制骨架
+    """
+
+    def __init__(self, estimator, frame_ring, is_draw=True):
+        self.estimator = estimator
+        self.frame_ring = frame_ring
+        self.is_draw = is_draw
+        self.staged = all(callable(getattr(estimator, name, None))
+                          for name in ('preprocess', 'forward', 'postprocess'))
+        self.max_in_flight = getattr(estimator, 'max_in_flight', 1) if self.staged else 1
+
+        self._inputs = StageQueue(1, on_drop=self.release)
+        self._results = StageQueue(1, on_drop=self.release)
+        self._threads = []
+        self.is_running = False
+        # 前处理与推理耗时的指数滑动平均（秒），以及推理线程预计可以接收下一帧的时刻，用于安排前处理的开始时刻
+        self._preprocess_time = 0.0
+        self._inference_time = 0.0
+        self._next_free_at = 0.0
+
+        self.stats = {
+            'preprocessed': 0,
+            'inferred': 0,
+            'delivered': 0,
+            'errors': 0
+        }
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._threads = [
+            threading.Thread(target=self._preprocess_loop, name='pipeline-preprocess', daemon=True),
+            threading.Thread(target=self._inference_loop, name='pipeline-inference', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("流水线模式已启动（%s，最多 %d 帧同时推理）",
+                    "分段执行" if self.staged else "推理线程调用 infer", self.max_in_flight)
+
+    def stop(self, timeout=2.0):
+        """停止两个线程，并归还流水线中尚未交给调用方的槽位"""
+        self.is_running = False
+        for queue in (self._inputs, self._results):
+            for item in queue.close():
+                self.release(item)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def get(self, timeout=1.0):
+        """
+        取出下一帧已完成推理的帧（按序号递增）
+
+        Returns:
+            PipelineItem | None: 超时或已停止时返回 None；用完后必须调用 release()
+        """
+        item = self._results.get(timeout)
+        if item is not None:
+            self.stats['delivered'] += 1
+        return item
+
+    def finish(self, item):
+        """
+        在调用方线程中完成后处理
+
+        Returns:
+            tuple: (poses, draw_img)，同 estimator.infer()
+        """
+        if item.result is not None:
+            return item.result
+        return self.estimator.postprocess(item.frame, item.inputs, item.outputs, self.is_draw)
+
+    def release(self, item):
+        """归还该帧借出的槽位"""
+        item.inputs = item.outputs = item.result = None
+        self.frame_ring.release(item.slot)
+
+    def get_stats(self):
+        stats = self.stats.copy()
+        stats['dropped'] = self._results.dropped
+        stats['queued'] = len(self._inputs) + len(self._results)
+        return stats
+
+    def _preprocess_loop(self):
+        while self.is_running:
+            # 有空位时才借出最新帧，避免前处理好的帧在队列里变旧
+            if not self._inputs.wait_space(timeout=0.2):
+                continue
+            # 推理请求都在忙：等到最早的一帧预计还剩一个前处理耗时再借帧，帧越新延迟越低
+            delay = self._next_free_at - self._preprocess_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(min(delay, 0.1))
+            slot = self.frame_ring.borrow(timeout=0.2)
+            if slot is None:
+                continue
+            item = PipelineItem(slot)
+            if self.staged:
+                try:
+                    item.inputs = self.estimator.preprocess(slot.frame)
+                except Exception as e:
+                    logger.error("前处理失败: %s", e)
+                    self.stats['errors'] += 1
+                    self.release(item)
+                    continue
+                self._preprocess_time = _ema(self._preprocess_time, time.perf_counter() - item.started_at)
+            self.stats['preprocessed'] += 1
+            self._inputs.put(item)
+            if not self.is_running:
+                for item in self._inputs.close():
+                    self.release(item)
+
+    def _submit(self, item):
+        """提交推理，返回 Future（不支持异步提交的估计器在此同步执行）"""
+        if self.staged and self.max_in_flight > 1:
+            return self.estimator.forward_async(item.inputs)
+        future = Future()
+        try:
+            if self.staged:
+                future.set_result(self.estimator.forward(item.inputs))
+            else:
+                future.set_result(self.estimator.infer(item.frame, is_draw=self.is_draw))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _inference_loop(self):
+        in_flight = deque()  # (item, future, submitted_at)，按提交顺序
+        while self.is_running or in_flight:
+            oldest = in_flight[0][1] if in_flight else None
+            if self.is_running and len(in_flight) < self.max_in_flight:
+                # 还有空闲的推理请求：取下一帧提交；最早的一帧完成时也会被唤醒
+                item = self._inputs.get(timeout=0.2, unless=oldest.done if oldest is not None else None)
+                if item is not None:
+                    submitted_at = time.perf_counter()
+                    # 先更新预计空闲时刻再提交（同步推理时提交即阻塞到完成）
+                    self._update_next_free(in_flight, submitted_at)
+                    future = self._submit(item)
+                    future.add_done_callback(lambda _: self._inputs.notify())
+                    in_flight.append((item, future, submitted_at))
+                    continue
+                if oldest is None or not oldest.done():
+                    continue
+
+            # 按提交顺序交出结果：只等最早提交的一帧
+            item, future, submitted_at = in_flight.popleft()
+            try:
+                outputs = future.result()
+            except Exception as e:
+                logger.error("推理失败: %s", e)
+                self.stats['errors'] += 1
+                self.release(item)
+                continue
+            self._inference_time = _ema(self._inference_time, time.perf_counter() - submitted_at)
+            if self.staged:
+                item.outputs = outputs
+            else:
+                item.result = outputs
+            self.stats['inferred'] += 1
+            # 调用方跟不上时丢弃较旧的结果（on_drop 归还槽位）
+            self._results.put(item)
+            if not self.is_running:
+                for item in self._results.close():
+                    self.release(item)
+
+    def _update_next_free(self, in_flight, submitting_at=None):
+        """
+        估计推理线程何时能接收下一帧：请求都在忙时为最早提交的一帧预计完成的时刻，否则为 0（立即）
+
+        Args:
+            submitting_at (float): 即将提交一帧时传入其提交时刻，按提交后的状态估计
+        """
+        submitted = [entry[2] for entry in in_flight]
+        if submitting_at is not None:
+            submitted.append(submitting_at)
+        if len(submitted) < self.max_in_flight:
+            self._next_free_at = 0.0
+        else:
+            self._next_free_at = submitted[0] + self._inference_time
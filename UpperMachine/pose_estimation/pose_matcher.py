@@ -0,0 +1,119 @@
+import math
+import numpy as np
+
+# FOV 缩放常量：tan(120/2) / tan(72/2)
+FOV_SCALE_120_72 = math.tan(math.radians(120 / 2)) / math.tan(math.radians(72 / 2))
+
+
+def fov_scale_x(current_camera, recorded_camera):
+    """返回录制相机与当前相机之间的横向缩放比例"""
+    if current_camera != recorded_camera:
+        if current_camera == "120width_camera" and recorded_camera == "72camera":
+            return FOV_SCALE_120_72
+        elif current_camera == "72camera" and recorded_camera == "120width_camera":
+            return 1.0 / FOV_SCALE_120_72
+    return 1.0
+
+
+class PoseMatcher:
+    """
+    预编译的姿势模板匹配器。
+
+    在加载配置时，将所有模板的向量、关键点下标和阈值打包为填充后的 NumPy 矩阵，
+    每帧只需一次 gather + 批量点积 + 范数即可对全部模板完成余弦相似度打分。
+    """
+
+    def __init__(self, config_list):
+        templates = [p for p in config_list
+                     if not p.get("inner_flag", False) and p.get("enable", True)]
+
+        # 模板用到的全部关键点名称，决定每帧 gather 的关键点矩阵的行序
+        names = []
+        for p in templates:
+            for key in [p["basekeypoints"]] + list(p["list_corekeypoints"]):
+                if key not in names:
+                    names.append(key)
+        self.keypoint_names = names
+        name2row = {name: i for i, name in enumerate(names)}
+
+        num_templates = len(templates)
+        max_len = max([len(p["list_corekeypoints"]) for p in templates], default=0)
+
+        self.indices = [p["index"] for p in templates]
+        self.names = [p["name"] for p in templates]
+        self.recorded_cameras = [p.get("camera_type", "72camera") for p in templates]
+        self.thresholds = np.array([p.get("similarity_threshold", 0.95) for p in templates], dtype=np.float64)
+
+        # 填充部分的下标指向第 0 行，并通过 mask 置零，不影响点积和范数
+        self.base_rows = np.zeros(num_templates, dtype=np.intp)
+        self.core_rows = np.zeros((num_templates, max_len), dtype=np.intp)
+        self.mask = np.zeros((num_templates, max_len), dtype=bool)
+        template_vectors = np.zeros((num_templates, max_len, 2), dtype=np.float64)
+
+        for i, p in enumerate(templates):
+            self.base_rows[i] = name2row[p["basekeypoints"]]
+            for j, key in enumerate(p["list_corekeypoints"]):
+                self.core_rows[i, j] = name2row[key]
+                self.mask[i, j] = True
+                template_vectors[i, j] = p["value_dict"][key]
+
+        self.flat_len = max_len * 2
+        self.template_vectors = template_vectors.reshape(num_templates, self.flat_len)
+        self.template_norms = np.linalg.norm(self.template_vectors, axis=1)
+
+        # 内置（硬编码）动作的启用情况
+        self.inner_enabled = {p.get("name") for p in config_list
+                              if p.get("inner_flag", False) and p.get("enable", True)}
+
+        # 按当前相机类型缓存横向缩放向量
+        self._scale_cache = {}
+
+    def __len__(self):
+        return len(self.indices)
+
+    def _scales(self, current_camera):
+        scales = self._scale_cache.get(current_camera)
+        if scales is None:
+            scales = np.array([fov_scale_x(current_camera, recorded) for recorded in self.recorded_cameras])
+            self._scale_cache[current_camera] = scales
+        return scales
+
+    def similarities(self, keypoints, current_camera="72camera"):
+        """
+        计算所有模板与当前关键点之间的余弦相似度。
+
+        Args:
+            keypoints (dict): 关键点名称 -> 坐标 (x, y)
+            current_camera (str): 当前相机类型
+
+        Returns:
+            np.ndarray: shape (num_templates,)
+        """
+        if len(self.indices) == 0:
+            return np.empty(0, dtype=np.float64)
+
+        points = np.asarray([keypoints[name] for name in self.keypoint_names])[:, :2]
+        if points.dtype.kind != 'f':
+            points = points.astype(np.float64)
+
+        # 与逐模板实现保持一致：相减与缩放在输入精度下完成，点积在 float64 下完成
+        offsets = points[self.core_rows] - points[self.base_rows][:, np.newaxis, :]
+        scales = self._scales(current_camera)
+        offsets[:, :, 0] *= scales[:, np.newaxis].astype(offsets.dtype)
+        offsets = offsets.astype(np.float64)
+        offsets[~self.mask] = 0
+
+        flat_offsets = offsets.reshape(len(self.indices), self.flat_len)
+        dots = np.einsum("ij,ij->i", self.template_vectors, flat_offsets)
+        norms = self.template_norms * np.linalg.norm(flat_offsets, axis=1)
+
+        similarities = np.zeros_like(dots)
+        np.divide(dots, norms, out=similarities, where=norms != 0)
+        return similarities
+
+    def match(self, keypoints, current_camera="72camera"):
+        """
+        返回满足阈值的模板，格式与 posedict2state 一致：[{'index', 'name'}, ...]
+        """
+        matched = self.similarities(keypoints, current_camera) >= self.thresholds
+        return [{'index': self.indices[i], 'name': self.names[i]} for i in np.flatnonzero(matched)]
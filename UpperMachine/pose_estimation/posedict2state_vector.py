@@ -1,51 +1,10 @@
 import numpy as np
-import json
-import math
-import os
-import yaml
 
-from UpperMachine.utils import get_latest_config_path
-
-# 获取热重载配置
-def _load_hot_reload_setting():
-    try:
-        with open("Source/flask_config.yml", 'r') as f:
-            config = yaml.safe_load(f)
-            return config.get('hot_reload', False)
-    except:
-        return False
-
-HOT_RELOAD_ENABLED = _load_hot_reload_setting()
-
-# 缓存配置
-_config_cache = {
-    "list": [],
-    "mtime": 0,
-    "path": ""
-}
+from UpperMachine.config_store import get_config_snapshot
+from UpperMachine.pose_estimation.pose_matcher import PoseMatcher, FOV_SCALE_120_72
 
 def _get_configs():
-    path = get_latest_config_path()
-    
-    # 如果没启用热重载且已经加载过配置，直接返回缓存
-    if not HOT_RELOAD_ENABLED and _config_cache["list"] and path == _config_cache["path"]:
-        return _config_cache["list"]
-
-    try:
-        mtime = os.path.getmtime(path)
-        if path != _config_cache["path"] or mtime > _config_cache["mtime"]:
-            with open(path, 'r', encoding='utf-8') as f:
-                _config_cache["list"] = json.load(f)
-            _config_cache["mtime"] = mtime
-            _config_cache["path"] = path
-    except Exception as e:
-        print(f"Error loading config: {e}")
-        if not _config_cache["list"]:
-            return []
-    return _config_cache["list"]
-
-# FOV 缩放常量：tan(120/2) / tan(72/2)
-FOV_SCALE_120_72 = math.tan(math.radians(120 / 2)) / math.tan(math.radians(72 / 2))
+    return get_config_snapshot().configs
 
 # 计算余弦相似度
 def calculate_cosine_similarity(v1, v2):
@@ -66,57 +25,20 @@ def calculate_cosine_similarity(v1, v2):
     return cosine_similarity
 
 
-def posedict2state(keypoints, current_camera="72camera"):
-    states = []
-    config_list = _get_configs()
+def _get_matcher():
+    # 匹配器挂在配置快照上，配置版本变化时才重新编译
+    return get_config_snapshot().derived("pose_matcher", PoseMatcher)
 
-    for pose_template in config_list:
-        if pose_template.get("inner_flag", False):
-            continue
-        if not pose_template.get("enable", True):
-            continue
-        pose_name = pose_template["name"]
-        pose_base = pose_template["basekeypoints"]
-        pose_index = pose_template["index"]
-        pose_list = pose_template["list_corekeypoints"]
-        pose_value_dict = pose_template["value_dict"]
-        
-        # 动作录制时的相机类型，默认为 72camera
-        recorded_camera = pose_template.get("camera_type", "72camera")
 
-        base_coordinates = keypoints[pose_base]
-        v_template = []
-        v_keypoints = []
-        
-        # 确定当前的缩放比例
-        scale_x = 1.0
-        if current_camera != recorded_camera:
-            if current_camera == "120width_camera" and recorded_camera == "72camera":
-                scale_x = FOV_SCALE_120_72
-            elif current_camera == "72camera" and recorded_camera == "120width_camera":
-                scale_x = 1.0 / FOV_SCALE_120_72
-
-        for key in pose_list:
-            v_template.extend(pose_value_dict[key])
-            core_coordinates = keypoints[key] - base_coordinates
-            
-            # 仅在相机类型不一致时进行横向偏移缩放
-            if scale_x != 1.0:
-                core_coordinates[0] *= scale_x
-                
-            v_keypoints.extend(core_coordinates.tolist())
-
-        # 计算向量夹角
-        similarity = calculate_cosine_similarity(v_template, v_keypoints)
-
-        threshold = pose_template.get("similarity_threshold", 0.95)
-        if similarity >= threshold:
-            states.append({'index': pose_index, 'name': pose_name})
+def posedict2state(keypoints, current_camera="72camera"):
+    matcher = _get_matcher()
 
+    # 所有模板一次性批量打分
+    states = matcher.match(keypoints, current_camera)
 
     # 硬代码检测弯腰动作（仅当LeftLean且RightLean的inner_flag为True且启用时激活）
-    has_left_lean = any(p.get("name") == "LeftLean" and p.get("inner_flag", False) and p.get("enable", True) for p in config_list)
-    has_right_lean = any(p.get("name") == "RightLean" and p.get("inner_flag", False) and p.get("enable", True) for p in config_list)
+    has_left_lean = "LeftLean" in matcher.inner_enabled
+    has_right_lean = "RightLean" in matcher.inner_enabled
     
     if has_left_lean and has_right_lean:
         mid_shoulder = (keypoints['left_shoulder'] + keypoints['right_shoulder']) / 2
@@ -133,8 +55,8 @@ def posedict2state(keypoints, current_camera="72camera"):
                 states.append({'index': 13, 'name': 'LeftLean'})
 
     # 检测转身动作（LeftTurn和RightTurn）
-    has_left_turn = any(p.get("name") == "LeftTurn" and p.get("inner_flag", False) and p.get("enable", True) for p in config_list)
-    has_right_turn = any(p.get("name") == "RightTurn" and p.get("inner_flag", False) and p.get("enable", True) for p in config_list)
+    has_left_turn = "LeftTurn" in matcher.inner_enabled
+    has_right_turn = "RightTurn" in matcher.inner_enabled
     
     if has_left_turn or has_right_turn:
         try:
@@ -21,14 +21,6 @@ import os
 import cv2
 import numpy as np
 
-# scipy
-try:
-    from scipy.special import softmax
-except:
-    print("scipy is  not installed, installing.")
-    os.system("pip install scipy")
-    from scipy.special import softmax
-
 # hobot_dnn
 try:
     try:
@@ -39,19 +31,21 @@ except:
     print("pip install hobot-dnn-rdkx5")
     from hobot_dnn_rdkx5 import pyeasy_dnn as dnn
 
-from time import time
+from time import time, perf_counter
+from concurrent.futures import Future, ThreadPoolExecutor
 import logging
 
-# 日志模块配置
-# logging configs
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(name)s] [%(asctime)s.%(msecs)03d] [%(levelname)s] %(message)s',
-    datefmt='%H:%M:%S')
+from ..nv12 import Nv12Frame, Nv12Letterbox, LetterboxPreprocessor, bgr2nv12
+from .postprocess import YoloPosePostprocessor
+from ..batch import pipelined_infer_batch
+from UpperMachine.metrics import pipeline_metrics
+
+# 日志格式与级别由 UpperMachine.log.setup_logging 统一配置 (flask_config.yml: log_level)
+# 每帧的耗时日志为 DEBUG 级别，并使用惰性格式化，级别未开启时没有格式化开销
 logger = logging.getLogger("RDK_YOLO")
 
 class Ultralytics_YOLO_Pose_Bayese_YUV420SP():
-    def __init__(self, model_path, classes_num, nms_thres, score_thres, reg, strides, nkpt):
+    def __init__(self, model_path, classes_num, nms_thres, score_thres, reg, strides, nkpt, num_buffers=2):
         # 加载BPU的bin模型, 打印相关参数
         # Load the quantized *.bin model and print its parameters
         try:
@@ -88,26 +82,22 @@ class Ultralytics_YOLO_Pose_Bayese_YUV420SP():
         logger.info(f"{self.strides = }")
         logger.info(f"{self.nkpt = }")
 
-        # DFL求期望的系数, 只需要生成一次
-        # DFL calculates the expected coefficients, which only needs to be generated once.
-        self.weights_static = np.array([i for i in range(reg)]).astype(np.float32)[np.newaxis, np.newaxis, :]
-        logger.info(f"{self.weights_static.shape = }")
-
-        # anchors, 只需要生成一次
-        self.grids = []
-        for stride in self.strides:
-            assert self.input_H % stride == 0, f"{stride=}, {self.input_H=}: input_H % stride != 0"
-            assert self.input_W % stride == 0, f"{stride=}, {self.input_W=}: input_W % stride != 0"
-            grid_H, grid_W = self.input_H // stride, self.input_W // stride
-            self.grids.append(np.stack([np.tile(np.linspace(0.5, grid_H-0.5, grid_H), reps=grid_H), 
-                            np.repeat(np.arange(0.5, grid_W+0.5, 1), grid_W)], axis=0).transpose(1,0))
-            logger.info(f"{self.grids[-1].shape = }")
+        # 三个检测头拼接后的网格与步长只需要生成一次
+        self.postprocessor = YoloPosePostprocessor(self.input_H, self.input_W, strides, classes_num, reg, nkpt,
+                                                   score_thres, nms_thres)
+        logger.info("anchors = %s", self.postprocessor.head_sizes)
+
+        # NV12 输入的 letterbox（在 YUV 域内完成，首次使用时创建）
+        # 输出缓冲区轮流复用，数量需大于同时在推理中的帧数
+        self.num_buffers = num_buffers
+        self.nv12_letterbox = None
+        # BGR 输入的 letterbox：几何按输入尺寸缓存，画布与输出缓冲区复用
+        self.letterbox = LetterboxPreprocessor(self.input_W, self.input_H, num_buffers=num_buffers)
 
     def preprocess_yuv420sp(self, img):
         RESIZE_TYPE = 0
         LETTERBOX_TYPE = 1
         PREPROCESS_TYPE = LETTERBOX_TYPE
-        logger.info(f"PREPROCESS_TYPE = {PREPROCESS_TYPE}")
 
         begin_time = time()
         self.img_h, self.img_w = img.shape[0:2]
@@ -120,32 +110,38 @@ class Ultralytics_YOLO_Pose_Bayese_YUV420SP():
             self.x_scale = 1.0 * self.input_W / self.img_w
             self.y_shift = 0
             self.x_shift = 0
-            logger.info("\033[1;31m" + f"pre process(resize) time = {1000*(time() - begin_time):.2f} ms" + "\033[0m")
+            logger.debug("\033[1;31m" "pre process(resize) time = %.2f ms" "\033[0m", 1000*(time() - begin_time))
         elif PREPROCESS_TYPE == LETTERBOX_TYPE:
             # 利用 letter box 的方式进行前处理, 准备nv12的输入数据
             begin_time = time()
-            self.x_scale = min(1.0 * self.input_H / self.img_h, 1.0 * self.input_W / self.img_w)
-            self.y_scale = self.x_scale
-            
-            if self.x_scale <= 0 or self.y_scale <= 0:
-                raise ValueError("Invalid scale")
-            
-            resized_h, resized_w = int(self.img_h * self.y_scale), int(self.img_w * self.x_scale)
-            resized_img = cv2.resize(img, (resized_w, resized_h), interpolation=cv2.INTER_NEAREST)
-            
-            # letter box
-            self.y_shift = (self.input_H - resized_h) // 2
-            self.x_shift = (self.input_W - resized_w) // 2
-            
-            canvas = np.full((self.input_H, self.input_W, 3), 114, dtype=np.uint8)
-            canvas[self.y_shift:self.y_shift + resized_h, self.x_shift:self.x_shift + resized_w, :] = resized_img
-            
-            input_tensor = self.bgr2nv12(canvas)
-            logger.info("\033[1;31m" + f"pre process(letter box) time = {1000*(time() - begin_time):.2f} ms" + "\033[0m")
-            logger.debug("\033[1;31m" + f"pre process time = {1000*(time() - begin_time):.2f} ms" + "\033[0m")
-            logger.info(f"y_scale = {self.y_scale:.2f}, x_scale = {self.x_scale:.2f}")
-            logger.info(f"y_shift = {self.y_shift:.2f}, x_shift = {self.x_shift:.2f}")
+            input_tensor = self.letterbox(img)
+            scale, _, _, self.x_shift, self.y_shift = self.letterbox.geometry()
+            self.x_scale = self.y_scale = scale
+            logger.debug("\033[1;31m" "pre process(letter box) time = %.2f ms" "\033[0m", 1000*(time() - begin_time))
+            logger.debug("y_scale = %.2f, x_scale = %.2f", self.y_scale, self.x_scale)
+            logger.debug("y_shift = %.2f, x_shift = %.2f", self.y_shift, self.x_shift)
+
+        return input_tensor
+
+    def preprocess_nv12(self, frame):
+        """
+        直接以相机的 NV12 帧准备模型输入，不经过 BGR。
+
+        Args:
+            frame (Nv12Frame): 相机帧，关键点坐标按其预览尺寸还原
 
+        Returns:
+            np.ndarray: 模型输入尺寸的 NV12 数据
+        """
+        begin_time = time()
+        if self.nv12_letterbox is None:
+            self.nv12_letterbox = Nv12Letterbox(self.input_W, self.input_H, num_buffers=self.num_buffers)
+        input_tensor = self.nv12_letterbox(frame)
+
+        self.img_h, self.img_w = frame.display_height, frame.display_width
+        scale, _, _, self.x_shift, self.y_shift = self.nv12_letterbox.geometry()
+        self.x_scale = self.y_scale = scale
+        logger.debug("\033[1;31m" "pre process(nv12 letter box) time = %.2f ms" "\033[0m", 1000*(time() - begin_time))
         return input_tensor
 
     def bgr2nv12(self, bgr_img):
@@ -164,152 +160,49 @@ class Ultralytics_YOLO_Pose_Bayese_YUV420SP():
         np.ndarray: The converted NV12 format image array.
         """
         begin_time = time()
-        height, width = bgr_img.shape[0], bgr_img.shape[1]
-        area = height * width
-        yuv420p = cv2.cvtColor(bgr_img, cv2.COLOR_BGR2YUV_I420).reshape((area * 3 // 2,))
-        y = yuv420p[:area]
-        uv_planar = yuv420p[area:].reshape((2, area // 4))
-        uv_packed = uv_planar.transpose((1, 0)).reshape((area // 2,))
-        nv12 = np.zeros_like(yuv420p)
-        nv12[:height * width] = y
-        nv12[height * width:] = uv_packed
-
-        logger.debug("\033[1;31m" + f"bgr8 to nv12 time = {1000*(time() - begin_time):.2f} ms" + "\033[0m")
+        nv12 = bgr2nv12(bgr_img)
+
+        logger.debug("\033[1;31m" "bgr8 to nv12 time = %.2f ms" "\033[0m", 1000*(time() - begin_time))
         return nv12
 
     def forward(self, input_tensor):
         begin_time = time()
         quantize_outputs = self.quantize_model[0].forward(input_tensor)
-        logger.info("\033[1;31m" + f"forward time = {1000*(time() - begin_time):.2f} ms" + "\033[0m")
+        logger.debug("\033[1;31m" "forward time = %.2f ms" "\033[0m", 1000*(time() - begin_time))
         return quantize_outputs
 
     def c2numpy(self, outputs):
         begin_time = time()
         outputs = [dnnTensor.buffer for dnnTensor in outputs]
-        logger.debug("\033[1;31m" + f"c to numpy time = {1000*(time() - begin_time):.2f} ms" + "\033[0m")
+        logger.debug("\033[1;31m" "c to numpy time = %.2f ms" "\033[0m", 1000*(time() - begin_time))
         return outputs
 
-    def postProcess(self, outputs):
+    def geometry(self):
+        """最近一次前处理的缩放与平移 (x_scale, y_scale, x_shift, y_shift)"""
+        return self.x_scale, self.y_scale, self.x_shift, self.y_shift
+
+    def postProcess(self, outputs, geometry=None):
+        """
+        Args:
+            geometry (tuple): 该帧前处理时的 geometry()；流水线模式下前处理可能已在处理下一帧，需显式传入
+
+        Returns:
+            tuple: (poses, boxes, scores)，见 YoloPosePostprocessor
+        """
         begin_time = time()
-        # 解析输出
-        s_cls = outputs[0].reshape(-1, self.CLASSES_NUM)
-        s_bbox = outputs[1].reshape(-1, 64)
-        s_kpt = outputs[2].reshape(-1, 51)
-        m_cls = outputs[3].reshape(-1, self.CLASSES_NUM)
-        m_bbox = outputs[4].reshape(-1, 64)
-        m_kpt = outputs[5].reshape(-1, 51)
-        l_cls = outputs[6].reshape(-1, self.CLASSES_NUM)
-        l_bbox = outputs[7].reshape(-1, 64)
-        l_kpt = outputs[8].reshape(-1, 51)
-
-        # 筛选有效检测
-        s_valid = s_cls.max(axis=1) >= self.CONF_THRES_RAW
-        m_valid = m_cls.max(axis=1) >= self.CONF_THRES_RAW
-        l_valid = l_cls.max(axis=1) >= self.CONF_THRES_RAW
-
-        s_cls = s_cls[s_valid]
-        s_bbox = s_bbox[s_valid]
-        s_kpt = s_kpt[s_valid]
-        m_cls = m_cls[m_valid]
-        m_bbox = m_bbox[m_valid]
-        m_kpt = m_kpt[m_valid]
-        l_cls = l_cls[l_valid]
-        l_bbox = l_bbox[l_valid]
-        l_kpt = l_kpt[l_valid]
-
-        # 如果没有检测到，返回空
-        if len(s_cls) == 0 and len(m_cls) == 0 and len(l_cls) == 0:
-            return []
-
-        # sigmoid
-        s_cls = 1 / (1 + np.exp(-s_cls))
-        m_cls = 1 / (1 + np.exp(-m_cls))
-        l_cls = 1 / (1 + np.exp(-l_cls))
-
-        # DFL
-        s_bbox = s_bbox.astype(np.float32) if len(s_bbox) > 0 else np.empty((0, 64))
-        m_bbox = m_bbox.astype(np.float32) if len(m_bbox) > 0 else np.empty((0, 64))
-        l_bbox = l_bbox.astype(np.float32) if len(l_bbox) > 0 else np.empty((0, 64))
-
-        s_ltrb = np.sum(softmax(s_bbox.reshape(-1, 4, self.REG), axis=2) * self.weights_static, axis=2) if len(s_bbox) > 0 else np.empty((0, 4))
-        m_ltrb = np.sum(softmax(m_bbox.reshape(-1, 4, self.REG), axis=2) * self.weights_static, axis=2) if len(m_bbox) > 0 else np.empty((0, 4))
-        l_ltrb = np.sum(softmax(l_bbox.reshape(-1, 4, self.REG), axis=2) * self.weights_static, axis=2) if len(l_bbox) > 0 else np.empty((0, 4))
-
-        s_grid = self.grids[0][s_valid]
-        m_grid = self.grids[1][m_valid]
-        l_grid = self.grids[2][l_valid]
-
-        s_x1y1 = s_grid - s_ltrb[:, :2] if len(s_ltrb) > 0 else np.empty((0, 2))
-        s_x2y2 = s_grid + s_ltrb[:, 2:] if len(s_ltrb) > 0 else np.empty((0, 2))
-        s_bbox = np.hstack([s_x1y1, s_x2y2]) * 8 if len(s_x1y1) > 0 else np.empty((0, 4))
-
-        m_x1y1 = m_grid - m_ltrb[:, :2] if len(m_ltrb) > 0 else np.empty((0, 2))
-        m_x2y2 = m_grid + m_ltrb[:, 2:] if len(m_ltrb) > 0 else np.empty((0, 2))
-        m_bbox = np.hstack([m_x1y1, m_x2y2]) * 16 if len(m_x1y1) > 0 else np.empty((0, 4))
-
-        l_x1y1 = l_grid - l_ltrb[:, :2] if len(l_ltrb) > 0 else np.empty((0, 2))
-        l_x2y2 = l_grid + l_ltrb[:, 2:] if len(l_ltrb) > 0 else np.empty((0, 2))
-        l_bbox = np.hstack([l_x1y1, l_x2y2]) * 32 if len(l_x1y1) > 0 else np.empty((0, 4))
-
-        # keypoints
-        s_kpt = s_kpt.astype(np.float32) if len(s_kpt) > 0 else np.empty((0, 51))
-        m_kpt = m_kpt.astype(np.float32) if len(m_kpt) > 0 else np.empty((0, 51))
-        l_kpt = l_kpt.astype(np.float32) if len(l_kpt) > 0 else np.empty((0, 51))
-
-        s_kpt = s_kpt.reshape(-1, self.nkpt, 3) if len(s_kpt) > 0 else np.empty((0, self.nkpt, 3))
-        s_kpt_xy = (s_kpt[:, :, :2] * 2 + s_grid[:, np.newaxis, :] - 0.5) * 8 if len(s_kpt) > 0 else np.empty((0, self.nkpt, 2))
-        s_kpt_conf = 1 / (1 + np.exp(-s_kpt[:, :, 2:])) if len(s_kpt) > 0 else np.empty((0, self.nkpt, 1))
-
-        m_kpt = m_kpt.reshape(-1, self.nkpt, 3) if len(m_kpt) > 0 else np.empty((0, self.nkpt, 3))
-        m_kpt_xy = (m_kpt[:, :, :2] * 2 + m_grid[:, np.newaxis, :] - 0.5) * 16 if len(m_kpt) > 0 else np.empty((0, self.nkpt, 2))
-        m_kpt_conf = 1 / (1 + np.exp(-m_kpt[:, :, 2:])) if len(m_kpt) > 0 else np.empty((0, self.nkpt, 1))
-
-        l_kpt = l_kpt.reshape(-1, self.nkpt, 3) if len(l_kpt) > 0 else np.empty((0, self.nkpt, 3))
-        l_kpt_xy = (l_kpt[:, :, :2] * 2 + l_grid[:, np.newaxis, :] - 0.5) * 32 if len(l_kpt) > 0 else np.empty((0, self.nkpt, 2))
-        l_kpt_conf = 1 / (1 + np.exp(-l_kpt[:, :, 2:])) if len(l_kpt) > 0 else np.empty((0, self.nkpt, 1))
-
-        # concat
-        bboxes = np.concatenate([s_bbox, m_bbox, l_bbox], axis=0)
-        scores = np.concatenate([s_cls.max(axis=1), m_cls.max(axis=1), l_cls.max(axis=1)], axis=0)
-        classes = np.concatenate([s_cls.argmax(axis=1), m_cls.argmax(axis=1), l_cls.argmax(axis=1)], axis=0)
-        kpts_xy = np.concatenate([s_kpt_xy, m_kpt_xy, l_kpt_xy], axis=0)
-        kpts_conf = np.concatenate([s_kpt_conf, m_kpt_conf, l_kpt_conf], axis=0)
-
-        # nms
-        indices = cv2.dnn.NMSBoxes(bboxes, scores, self.SCORE_THRESHOLD, self.NMS_THRESHOLD)
-
-        # scale back
-        bboxes = bboxes[indices]
-        bboxes[:, [0, 2]] = (bboxes[:, [0, 2]] - self.x_shift) / self.x_scale
-        bboxes[:, [1, 3]] = (bboxes[:, [1, 3]] - self.y_shift) / self.y_scale
-        bboxes = bboxes.astype(np.int32)
-
-        kpts_xy = kpts_xy[indices]
-        kpts_xy[:, :, 0] = (kpts_xy[:, :, 0] - self.x_shift) / self.x_scale
-        kpts_xy[:, :, 1] = (kpts_xy[:, :, 1] - self.y_shift) / self.y_scale
-
-        kpts_conf = kpts_conf[indices]
-
-        # 由于输入图像被翻转，翻转 x 坐标以纠正
-        # bboxes[:, [0, 2]] = self.img_w - bboxes[:, [0, 2]]
-        # kpts_xy[:, :, 0] = self.img_w - kpts_xy[:, :, 0]
-
-        results = []
-        for i in range(len(bboxes)):
-            x1, y1, x2, y2 = bboxes[i]
-            cls = classes[indices[i]]
-            score = scores[indices[i]]
-            kpts = np.hstack([kpts_xy[i], kpts_conf[i]])
-            results.append((cls, score, x1, y1, x2, y2, kpts))
-
-        logger.info("\033[1;31m" + f"Post Process time = {1000*(time() - begin_time):.2f} ms" + "\033[0m")
+        results = self.postprocessor(outputs, geometry if geometry is not None else self.geometry())
+        logger.debug("\033[1;31m" "Post Process time = %.2f ms" "\033[0m", 1000*(time() - begin_time))
         return results
 
 class HumanPoseEstimator():
     """
     YOLO11 Pose Estimator 类，用于封装YOLO11-Pose模型的加载、推理和绘制功能。
     """
-    def __init__(self, model_path='Source/Models/yolo11n_pose_bayese_640x640_nv12.bin', score_thres=0.25, nms_thres=0.7, kpt_conf_thres=0.5):
+    # infer() 可直接接收相机的 Nv12Frame
+    supports_nv12 = True
+
+    def __init__(self, model_path='Source/Models/yolo11n_pose_bayese_640x640_nv12.bin', score_thres=0.25, nms_thres=0.7, kpt_conf_thres=0.5,
+                 num_requests=1):
         """
         初始化Estimator。
 
@@ -318,24 +211,32 @@ class HumanPoseEstimator():
             score_thres (float): 检测置信度阈值。
             nms_thres (float): NMS阈值。
             kpt_conf_thres (float): 关键点置信度阈值。
+            num_requests (int): 流水线模式下同时提交给 BPU 的帧数（forward 线程池大小）。
         """
         self.model_path = model_path
         self.score_thres = score_thres
         self.nms_thres = nms_thres
         self.kpt_conf_thres = kpt_conf_thres
         self.model = None  # 模型将在 load() 中加载
+        self.max_in_flight = max(1, num_requests)
+        # 与 references/mipi_camera_rdkx5_demo.py 的 ParallelExector 类似，用线程池并发调用 forward
+        # （forward 在等待 BPU 时释放 GIL）；只在流水线模式的 forward_async 中使用
+        self._executor = None
+        if self.max_in_flight > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='bpu-forward')
 
     def infer(self, image, is_draw=False):
         """
         进行推理。
 
         Args:
-            image (np.ndarray): 输入图像。
+            image (np.ndarray | Nv12Frame): 输入图像，BGR 或相机的 NV12 帧。
 
         Returns:
             tuple: (poses, draw_img)
                 - poses: np.ndarray, shape (-1, 17, 3), keypoints and scores
                 - draw_img: np.ndarray, image with drawn poses if is_draw=True
+                  （输入为 NV12 且 is_draw=False 时原样返回 Nv12Frame，需要时再调用 to_bgr()）
         """
         if self.model is None:
             self.load()
@@ -343,30 +244,75 @@ class HumanPoseEstimator():
         # 翻转图像以纠正左右手检测问题
         # image = cv2.flip(image, 1)
 
-        # 准备输入数据
-        input_tensor = self.model.preprocess_yuv420sp(image)
+        inputs = self.preprocess(image)
+        return self.postprocess(image, inputs, self.forward(inputs), is_draw)
 
-        # 推理
-        outputs = self.model.c2numpy(self.model.forward(input_tensor))
+    # 流水线模式按以下三段分别在不同线程中调用，同一帧的结果依次传递
+    def preprocess(self, image):
+        """
+        准备模型输入
 
-        # 后处理
-        results = self.model.postProcess(outputs)
+        Returns:
+            tuple: (input_tensor, geometry)
+        """
+        # PoseDetectionService 加载时已调用 load()；直接使用估计器时在第一次推理时加载
+        if self.model is None:
+            self.load()
+        t0 = perf_counter()
+        if isinstance(image, Nv12Frame):
+            input_tensor = self.model.preprocess_nv12(image)
+        else:
+            input_tensor = self.model.preprocess_yuv420sp(image)
+        # 前处理只在一个线程中进行，几何参数随本帧一起传给后处理
+        geometry = self.model.geometry()
+        pipeline_metrics.record('preprocess', perf_counter() - t0)
+        return input_tensor, geometry
+
+    def forward(self, inputs):
+        """BPU 推理，返回各输出的 numpy 数组"""
+        t0 = perf_counter()
+        outputs = self.model.c2numpy(self.model.forward(inputs[0]))
+        pipeline_metrics.record('inference', perf_counter() - t0)
+        return outputs
 
-        # 组织poses
-        poses = []
-        for cls, score, x1, y1, x2, y2, kpts in results:
-            pose = []
-            for j in range(17):
-                x, y, conf = kpts[j]
-                pose.append([float(x), float(y), float(conf)])
-            poses.append(pose)
-        poses = np.array(poses)  # shape (-1, 17, 3)
+    def forward_async(self, inputs):
+        """提交推理，返回结果为 forward() 返回值的 Future；max_in_flight 为 1 时同步执行"""
+        if self._executor is None:
+            future = Future()
+            future.set_result(self.forward(inputs))
+            return future
+        # 推理线程中沿用提交方的统计 scope（REST 帧记录为 rest_inference）
+        return self._executor.submit(pipeline_metrics.bind(self.forward), inputs)
+
+    def postprocess(self, image, inputs, outputs, is_draw=False):
+        """
+        解码并（可选）绘制
+
+        Returns:
+            tuple: (poses, draw_img)，同 infer()
+        """
+        t0 = perf_counter()
+        poses, boxes, scores = self.model.postProcess(outputs, geometry=inputs[1])
+        pipeline_metrics.record('decode', perf_counter() - t0)
 
         # 绘制
-        draw_img = self.draw_results(image, results) if is_draw else image
+        if is_draw:
+            draw_img = self.draw_results(image.to_bgr() if isinstance(image, Nv12Frame) else image,
+                                         poses, boxes, scores)
+        else:
+            draw_img = image
 
         return poses, draw_img
 
+    def infer_batch(self, images):
+        """
+        多帧推理。BPU 模型的 batch 固定为 1，前处理、推理、后处理按流水线逐帧重叠执行。
+
+        Returns:
+            tuple: (poses, found)，见 batch.stack_poses()
+        """
+        return pipelined_infer_batch(self, images)
+
     def load(self):
         """
         加载模型。如果模型不存在，则下载。
@@ -394,24 +340,29 @@ class HumanPoseEstimator():
             score_thres=self.score_thres,
             reg=16,
             strides=[8, 16, 32],
-            nkpt=17
+            nkpt=17,
+            # 前处理队列中一帧、正在前处理一帧，其余为同时在推理中的帧；
+            # InferenceExecutor 中实时帧与一个 REST 任务各自占用这么多
+            num_buffers=2 * (self.max_in_flight + 2)
         )
         load_time = time() - load_start
         logger.info(f"Model loaded in {load_time:.2f} seconds.")
 
-    def draw_results(self, image, results):
+    def draw_results(self, image, poses, boxes, scores):
         """
         在图像上绘制检测结果。
 
         Args:
             image (np.ndarray): 输入图像。
-            results (list): 推理结果列表。
+            poses (np.ndarray): (N, 17, 3) 关键点。
+            boxes (np.ndarray): (N, 4) 边界框。
+            scores (np.ndarray): (N,) 检测置信度。
 
         Returns:
             np.ndarray: 绘制后的图像。
         """
         img = image.copy()
-        for cls, score, x1, y1, x2, y2, kpts in results:
+        for kpts, (x1, y1, x2, y2), score in zip(poses, boxes.tolist(), scores):
             # 绘制边界框
             cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
             cv2.putText(img, f"Person: {score:.2f}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
@@ -447,4 +398,6 @@ class HumanPoseEstimator():
         释放资源（如果需要）。
         """
         # 如果有释放方法，可以在这里调用
-        pass
\ No newline at end of file
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+YOLO-Pose（Ultralytics，Bayese 导出的 s/m/l 三个检测头）的后处理
+
+只依赖 numpy 与 cv2，不依赖 hobot 库，可以用合成的输出张量在任意机器上调试。
+三个检测头的 anchor 按 s、m、l 顺序拼接成一个整体：网格与步长在构造时算好，
+每帧只对拼接后的类别分数做一次阈值筛选，DFL、sigmoid 与关键点解码只在通过筛选的 anchor 上进行。
+"""
+
+import cv2
+import numpy as np
+
+
+class YoloPosePostprocessor:
+    """
+    Args:
+        input_H, input_W (int): 模型输入尺寸
+        strides (list): 各检测头的步长，与输出顺序一致
+        classes_num (int): 类别数
+        reg (int): DFL 的分箱数
+        nkpt (int): 关键点数
+        score_thres (float): 检测置信度阈值
+        nms_thres (float): NMS 阈值
+    """
+
+    def __init__(self, input_H, input_W, strides=(8, 16, 32), classes_num=1, reg=16, nkpt=17,
+                 score_thres=0.25, nms_thres=0.7):
+        self.classes_num = classes_num
+        self.reg = reg
+        self.nkpt = nkpt
+        self.score_thres = score_thres
+        self.nms_thres = nms_thres
+        # sigmoid 之前的阈值，筛选时不必对所有 anchor 做 sigmoid
+        self.conf_thres_raw = -np.log(1 / score_thres - 1)
+        # DFL 求期望的系数
+        self.dfl_weights = np.arange(reg, dtype=np.float32)
+
+        grids = []
+        anchor_strides = []
+        self.head_sizes = []
+        for stride in strides:
+            assert input_H % stride == 0, f"{stride=}, {input_H=}: input_H % stride != 0"
+            assert input_W % stride == 0, f"{stride=}, {input_W=}: input_W % stride != 0"
+            grid_H, grid_W = input_H // stride, input_W // stride
+            # 与原实现的 anchor 排列一致（输入为正方形）
+            grids.append(np.stack([np.tile(np.linspace(0.5, grid_H - 0.5, grid_H), reps=grid_H),
+                                   np.repeat(np.arange(0.5, grid_W + 0.5, 1), grid_W)], axis=0).transpose(1, 0))
+            anchor_strides.append(np.full(grid_H * grid_W, stride, dtype=np.float32))
+            self.head_sizes.append(grid_H * grid_W)
+        self.grid = np.concatenate(grids).astype(np.float32)
+        self.stride = np.concatenate(anchor_strides)
+        self.head_offsets = np.cumsum([0] + self.head_sizes)
+
+    def _gather(self, heads, index, width):
+        """从各检测头的输出中取出 index（拼接后的 anchor 下标，升序）对应的行"""
+        bounds = np.searchsorted(index, self.head_offsets)
+        parts = [head.reshape(-1, width)[index[bounds[i]:bounds[i + 1]] - self.head_offsets[i]]
+                 for i, head in enumerate(heads)]
+        return np.concatenate(parts).astype(np.float32, copy=False)
+
+    def __call__(self, outputs, geometry):
+        """
+        Args:
+            outputs (list): 9 个输出，依次为 s/m/l 检测头的 (cls, bbox, kpt)
+            geometry (tuple): 前处理的 (x_scale, y_scale, x_shift, y_shift)
+
+        Returns:
+            tuple: (poses, boxes, scores)
+                - poses: np.ndarray (N, nkpt, 3) float32，原图坐标下的 (x, y, conf)
+                - boxes: np.ndarray (N, 4) int32，原图坐标下的 (x1, y1, x2, y2)
+                - scores: np.ndarray (N,) float32
+        """
+        x_scale, y_scale, x_shift, y_shift = geometry
+        cls_heads, bbox_heads, kpt_heads = outputs[0::3], outputs[1::3], outputs[2::3]
+
+        # 一次筛选所有 anchor
+        cls = np.concatenate([head.reshape(-1, self.classes_num) for head in cls_heads])
+        raw_scores = cls.max(axis=1) if self.classes_num > 1 else cls[:, 0]
+        index = np.flatnonzero(raw_scores >= self.conf_thres_raw)
+        if len(index) == 0:
+            return (np.empty((0, self.nkpt, 3), dtype=np.float32), np.empty((0, 4), dtype=np.int32),
+                    np.empty(0, dtype=np.float32))
+        scores = 1 / (1 + np.exp(-raw_scores[index].astype(np.float32)))
+        grid = self.grid[index]
+        stride = self.stride[index, None]
+
+        # DFL（softmax 求期望），只在通过筛选的 anchor 上计算
+        bbox = self._gather(bbox_heads, index, 4 * self.reg).reshape(-1, 4, self.reg)
+        bbox = np.exp(bbox - bbox.max(axis=2, keepdims=True))
+        ltrb = (bbox @ self.dfl_weights) / bbox.sum(axis=2)
+        bboxes = np.hstack([grid - ltrb[:, :2], grid + ltrb[:, 2:]]) * stride
+
+        # keypoints
+        kpt = self._gather(kpt_heads, index, self.nkpt * 3).reshape(-1, self.nkpt, 3)
+        poses = np.empty_like(kpt)
+        poses[:, :, :2] = (kpt[:, :, :2] * 2 + grid[:, None, :] - 0.5) * stride[:, :, None]
+        poses[:, :, 2] = 1 / (1 + np.exp(-kpt[:, :, 2]))
+
+        # nms（与原实现相同，直接传入 x1y1x2y2）
+        indices = np.asarray(cv2.dnn.NMSBoxes(bboxes, scores, self.score_thres, self.nms_thres),
+                             dtype=np.intp).reshape(-1)
+
+        # scale back
+        bboxes = bboxes[indices]
+        bboxes[:, [0, 2]] = (bboxes[:, [0, 2]] - x_shift) / x_scale
+        bboxes[:, [1, 3]] = (bboxes[:, [1, 3]] - y_shift) / y_scale
+        poses = poses[indices]
+        poses[:, :, 0] = (poses[:, :, 0] - x_shift) / x_scale
+        poses[:, :, 1] = (poses[:, :, 1] - y_shift) / y_scale
+        return poses, bboxes.astype(np.int32), scores[indices]
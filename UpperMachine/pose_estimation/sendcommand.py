@@ -1,9 +1,22 @@
+import json
+import os
 import socket
+import struct
+import threading
+import time
 
 import select
 
 last_command = ""
 
+# CH9329 帧头
+FRAME_HEAD = b'\x57\xab'
+
+# UDP 数据报头：会话号(1字节) + 序号(2字节，大端)
+UDP_HEADER = struct.Struct('>BH')
+# UDP 统计查询/应答的负载前缀
+UDP_STAT_REQUEST = b'STAT'
+
 
 # 使用ESP32Cam作为服务器，端口为80，服务器只会接收一次，然后就断开，不会保持连接，所以每次都需要创建一个socket
 def send_command(server_ip='192.168.2.121', port=80, command="", ifencode=False, ignore_cache=False):
@@ -26,6 +39,10 @@ def send_command(server_ip='192.168.2.121', port=80, command="", ifencode=False,
         sock.close()
 
 def send_command_timeout(server_ip='192.168.2.121', port=80, command="", timeout=1, ifencode=False, ignore_cache=False):
+    """
+    Returns:
+        bool | None: 是否发送成功（连接失败或超时为 False）；与上一条命令相同而未发送时为 None
+    """
     global last_command
     if not ignore_cache and last_command == command:
         return
@@ -44,6 +61,7 @@ def send_command_timeout(server_ip='192.168.2.121', port=80, command="", timeout
         if sock in writable:
             command = command.encode() if ifencode else command # 是否进行二进制转码
             sock.sendall(command)
+            return True
         else:
             # 连接超时
             raise socket.timeout("Connection timed out")
@@ -51,7 +69,357 @@ def send_command_timeout(server_ip='192.168.2.121', port=80, command="", timeout
     except socket.error as e:
         # 连接失败（包括超时）
         print(f"Connection error: {e}")
+        return False
 
     finally:
         # 关闭套接字
-        sock.close()
\ No newline at end of file
+        sock.close()
+
+
+def pop_frames(buf):
+    """
+    从字节流中取出完整的 CH9329 帧（0x57 0xAB 地址 命令 长度 数据... 校验和）
+
+    Args:
+        buf (bytes): 已接收但尚未处理的数据
+
+    Returns:
+        tuple: (frames, rest) - 完整帧列表，以及需要与后续数据拼接的剩余字节
+    """
+    frames = []
+    while True:
+        start = buf.find(FRAME_HEAD)
+        if start < 0:
+            # 末尾可能是被截断的半个帧头
+            return frames, buf[-1:] if buf[-1:] == FRAME_HEAD[:1] else b''
+        if len(buf) - start < 5:
+            return frames, buf[start:]
+        total = 6 + buf[start + 4]
+        if len(buf) - start < total:
+            return frames, buf[start:]
+        frames.append(buf[start:start + total])
+        buf = buf[start + total:]
+
+
+class TcpSessionTransport:
+    """
+    与 HID 桥之间的 TCP 长连接。
+
+    - 连接建立后一直复用，多个数据包首尾相接地写入同一条流
+    - 对端关闭或发送失败时自动重连；连接失败后按指数退避，退避期间直接丢弃数据包，不阻塞调用方
+    """
+
+    def __init__(self, server_ip, port=80, timeout=1.0, backoff_initial=0.2, backoff_max=5.0):
+        self.server_ip = server_ip
+        self.port = port
+        self.timeout = timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.sock = None
+        self.lock = threading.Lock()
+        self._backoff = backoff_initial
+        self._next_retry = 0.0
+
+        self.stats = {
+            'sent': 0,
+            'connects': 0,
+            'errors': 0,
+            'skipped': 0
+        }
+
+    def _connect(self):
+        sock = socket.create_connection((self.server_ip, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self._backoff = self.backoff_initial
+        self.stats['connects'] += 1
+
+    def _peer_closed(self):
+        # 对端关闭后套接字变为可读且 recv 返回空；下位机不会主动回发数据
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        if not readable:
+            return False
+        try:
+            return self.sock.recv(64) == b''
+        except OSError:
+            return True
+
+    def _close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def send(self, data):
+        """
+        发送一个或多个已拼接的数据包
+
+        Returns:
+            bool: 是否写入成功
+        """
+        with self.lock:
+            for attempt in range(2):
+                if self.sock is None:
+                    if time.monotonic() < self._next_retry:
+                        self.stats['skipped'] += 1
+                        return False
+                    try:
+                        self._connect()
+                    except OSError as e:
+                        self.stats['errors'] += 1
+                        self._next_retry = time.monotonic() + self._backoff
+                        self._backoff = min(self._backoff * 2, self.backoff_max)
+                        print(f"Connection error: {e}")
+                        return False
+                elif self._peer_closed():
+                    self._close()
+                    continue
+
+                try:
+                    self.sock.sendall(data)
+                    self.stats['sent'] += 1
+                    return True
+                except OSError as e:
+                    # 连接已失效：关闭后重连重发一次
+                    self.stats['errors'] += 1
+                    self._close()
+                    if attempt == 1:
+                        print(f"Connection error: {e}")
+            return False
+
+    def send_many(self, commands):
+        """将多个数据包首尾相接，一次写入"""
+        return self.send(b''.join(commands))
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+
+# 按 (target_ip, port) 复用的长连接池
+_session_pool = {}
+_session_pool_lock = threading.Lock()
+
+
+def get_session(server_ip='192.168.2.121', port=80, timeout=1.0):
+    """获取 (server_ip, port) 对应的长连接，不存在时创建"""
+    key = (server_ip, port)
+    session = _session_pool.get(key)
+    if session is None:
+        with _session_pool_lock:
+            session = _session_pool.get(key)
+            if session is None:
+                session = TcpSessionTransport(server_ip, port, timeout=timeout)
+                _session_pool[key] = session
+    return session
+
+
+def close_sessions():
+    """关闭连接池中的所有长连接与 UDP 发送端"""
+    with _session_pool_lock:
+        for session in _session_pool.values():
+            session.close()
+        _session_pool.clear()
+        for transport in _udp_pool.values():
+            transport.close()
+        _udp_pool.clear()
+
+
+def send_command_session(server_ip='192.168.2.121', port=80, command="", timeout=1, ifencode=False, ignore_cache=False):
+    """与 send_command_timeout 参数及返回值一致，但复用长连接发送"""
+    global last_command
+    if not ignore_cache and last_command == command:
+        return
+    else:
+        last_command = command
+
+    command = command.encode() if ifencode else command # 是否进行二进制转码
+    return get_session(server_ip, port, timeout).send(command)
+
+
+class SequenceFilter:
+    """
+    UDP 接收端的序号过滤（与 LowerMachine 中的实现保持一致）
+
+    只接受比上一个已接受序号更新的数据包，迟到（乱序）或重复的数据包直接丢弃。
+    会话号变化（发送端重启）时重新开始计数。
+    """
+
+    def __init__(self):
+        self.epoch = None
+        self.last_seq = None
+        self.stats = {
+            'received': 0,
+            'accepted': 0,
+            'dropped': 0,
+            'reordered': 0,
+            'lost': 0
+        }
+
+    def accept(self, epoch, seq):
+        self.stats['received'] += 1
+        if epoch != self.epoch or self.last_seq is None:
+            self.epoch = epoch
+            self.last_seq = seq
+            self.stats['accepted'] += 1
+            return True
+
+        diff = (seq - self.last_seq) & 0xFFFF
+        if diff == 0:
+            # 重复包
+            self.stats['dropped'] += 1
+            return False
+        if diff >= 0x8000:
+            # 比已接受的包更旧：乱序到达
+            self.stats['dropped'] += 1
+            self.stats['reordered'] += 1
+            return False
+
+        # 中间缺失的序号计为丢包（之后即使迟到也会被丢弃）
+        self.stats['lost'] += diff - 1
+        self.last_seq = seq
+        self.stats['accepted'] += 1
+        return True
+
+
+class UdpDatagramTransport:
+    """
+    以 UDP 数据报发送 HID 命令，每个 CH9329 帧单独成包并带有序号。
+
+    适合鼠标相对移动这类“过期不如丢弃”的数据：不重传、不排队，也不会因握手阻塞调用方。
+    """
+
+    def __init__(self, server_ip, port=80, stats_interval=1.0):
+        self.server_ip = server_ip
+        self.port = port
+        self.stats_interval = stats_interval
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.lock = threading.Lock()
+
+        # 会话号随机生成，接收端据此识别发送端重启
+        self.epoch = os.urandom(1)[0]
+        self.seq = 0
+        self._last_stats_request = 0.0
+
+        self.stats = {
+            'sent': 0,
+            'errors': 0
+        }
+        self.remote_stats = None
+
+    def send(self, data):
+        """
+        发送一个或多个 CH9329 帧，每帧一个数据报
+
+        Returns:
+            bool: 是否全部写入成功
+        """
+        frames, _ = pop_frames(data)
+        ok = True
+        with self.lock:
+            for frame in frames:
+                header = UDP_HEADER.pack(self.epoch, self.seq)
+                self.seq = (self.seq + 1) & 0xFFFF
+                try:
+                    self.sock.sendto(header + frame, (self.server_ip, self.port))
+                    self.stats['sent'] += 1
+                except OSError:
+                    self.stats['errors'] += 1
+                    ok = False
+        return ok
+
+    def request_remote_stats(self):
+        """向接收端请求其计数器，应答在 poll_remote_stats() 中读取"""
+        with self.lock:
+            try:
+                self.sock.sendto(UDP_HEADER.pack(self.epoch, 0) + UDP_STAT_REQUEST, (self.server_ip, self.port))
+            except OSError:
+                pass
+            self._last_stats_request = time.monotonic()
+
+    def poll_remote_stats(self):
+        """非阻塞地读取接收端的计数器应答"""
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(512)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+            if data.startswith(UDP_STAT_REQUEST):
+                try:
+                    self.remote_stats = json.loads(data[len(UDP_STAT_REQUEST):])
+                except ValueError:
+                    pass
+        return self.remote_stats
+
+    def get_stats(self):
+        """返回本地与接收端的计数器，并按间隔刷新接收端数据"""
+        self.poll_remote_stats()
+        if time.monotonic() - self._last_stats_request >= self.stats_interval:
+            self.request_remote_stats()
+        return {
+            'server': f"{self.server_ip}:{self.port}",
+            'sent': self.stats['sent'],
+            'errors': self.stats['errors'],
+            'remote': self.remote_stats
+        }
+
+    def close(self):
+        with self.lock:
+            self.sock.close()
+
+
+_udp_pool = {}
+
+
+def get_udp_transport(server_ip='192.168.2.121', port=80):
+    """获取 (server_ip, port) 对应的 UDP 发送端，不存在时创建"""
+    key = (server_ip, port)
+    transport = _udp_pool.get(key)
+    if transport is None:
+        with _session_pool_lock:
+            transport = _udp_pool.get(key)
+            if transport is None:
+                transport = UdpDatagramTransport(server_ip, port)
+                _udp_pool[key] = transport
+    return transport
+
+
+def send_command_udp(server_ip='192.168.2.121', port=80, command="", timeout=1, ifencode=False, ignore_cache=False):
+    """与 send_command_timeout 参数及返回值一致，但以带序号的 UDP 数据报发送（timeout 不使用）"""
+    global last_command
+    if not ignore_cache and last_command == command:
+        return
+    else:
+        last_command = command
+
+    command = command.encode() if ifencode else command # 是否进行二进制转码
+    return get_udp_transport(server_ip, port).send(command)
+
+
+def get_transport_stats():
+    """汇总连接池中各发送端的计数器，用于 /api/stats"""
+    return {
+        'tcp_session': [dict(session.stats, server=f"{ip}:{port}") for (ip, port), session in list(_session_pool.items())],
+        'udp': [transport.get_stats() for transport in list(_udp_pool.values())]
+    }
+
+
+# 可选的发送方式，对应 flask_config.yml 中的 command_transport
+SEND_FUNCTIONS = {
+    'tcp': send_command_timeout,
+    'tcp_session': send_command_session,
+    'udp': send_command_udp,
+}
+
+
+def get_send_function(transport='tcp'):
+    if transport not in SEND_FUNCTIONS:
+        raise ValueError(f"Unsupported command transport: {transport}")
+    return SEND_FUNCTIONS[transport]
@@ -1,5 +1,4 @@
-import json
-from UpperMachine.utils import get_latest_config_path
+from UpperMachine.config_store import get_config_snapshot
 
 words2bytes_dict = {
     # 字母键 (a-z) - USB HID 键盘扫描码
@@ -49,59 +48,104 @@ words2bytes_dict = {
     "mouse_release": -11,        # 鼠标释放（所有按键）
 }
 
-import os
-import yaml
-
-# 获取热重载配置
-def _load_hot_reload_setting():
-    try:
-        with open("Source/flask_config.yml", 'r') as f:
-            config = yaml.safe_load(f)
-            return config.get('hot_reload', False)
-    except:
-        return False
-
-HOT_RELOAD_ENABLED = _load_hot_reload_setting()
-
-# 缓存配置映射
-_mapper_cache = {
-    "list": [],
-    "mtime": 0,
-    "path": ""
-}
+# 视为瞬时动作的鼠标代码：滚轮与左右移动，状态不变时也需要持续发送
+TRANSIENT_MOUSE_ACTIONS = frozenset((-7, -8, -9, -10))
+
+
+def state2mask(state):
+    """
+    将姿势索引列表转换为位掩码，第 index 位为 1 表示该姿势被激活
+
+    Args:
+        state (iterable): 姿势索引列表
+
+    Returns:
+        int: 位掩码
+    """
+    mask = 0
+    for index in state:
+        mask |= 1 << index
+    return mask
+
+
+def mask2state(mask):
+    """将位掩码还原为升序的姿势索引列表"""
+    state = []
+    index = 0
+    while mask:
+        if mask & 1:
+            state.append(index)
+        mask >>= 1
+        index += 1
+    return state
+
+
+class KeyReport:
+    """某一姿势状态对应的按键结果（只读，由 KeyMapper 缓存复用）"""
+
+    __slots__ = ('words', 'keyboard_bytes', 'mouse_actions', 'keyboard_mask', 'has_transient_mouse')
+
+    def __init__(self, words):
+        keyboard_bytes, mouse_actions = words2bytes(words)
+        self.words = tuple(words)
+        self.keyboard_bytes = tuple(keyboard_bytes)
+        self.mouse_actions = tuple(mouse_actions)
+        # 键盘按键集合的位掩码：判断键盘状态是否变化只需比较一个整数
+        self.keyboard_mask = state2mask(keyboard_bytes)
+        self.has_transient_mouse = any(a in TRANSIENT_MOUSE_ACTIONS for a in mouse_actions)
+
+
+class KeyMapper:
+    """
+    由姿势配置编译得到的按键映射表。
+
+    每个配置项编译为 (姿势掩码, 按键) 对，状态命中判断为 mask & entry == entry；
+    同一状态掩码的结果只计算一次，之后为一次字典查找。
+    """
+
+    def __init__(self, configs, cache_size=4096):
+        self.entries = [
+            (state2mask([pose["index"]]), tuple(pose.get("keys", [])))
+            for pose in configs
+        ]
+        self.entries = [(mask, keys) for mask, keys in self.entries if keys]
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def lookup(self, mask):
+        """
+        Args:
+            mask (int): 姿势状态掩码
+
+        Returns:
+            KeyReport: 对应的按键结果
+        """
+        report = self._cache.get(mask)
+        if report is None:
+            words = []
+            for entry_mask, keys in self.entries:
+                if mask & entry_mask == entry_mask:
+                    words.extend(keys)
+            # 去重并保持配置中的顺序
+            report = KeyReport(list(dict.fromkeys(words)))
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[mask] = report
+        return report
+
+
+def get_key_mapper():
+    # 按键映射挂在配置快照上，与姿势匹配器共享同一份解析结果
+    return get_config_snapshot().derived("key_mapper", KeyMapper)
+
+
+def lookup_keys(mask):
+    """根据姿势状态掩码获取按键结果"""
+    return get_key_mapper().lookup(mask)
 
-def _get_mapper_list():
-    path = get_latest_config_path()
-
-    # 如果没启用热重载且已经加载过配置，直接返回缓存
-    if not HOT_RELOAD_ENABLED and _mapper_cache["list"] and path == _mapper_cache["path"]:
-        return _mapper_cache["list"]
-
-    try:
-        mtime = os.path.getmtime(path)
-        if path != _mapper_cache["path"] or mtime > _mapper_cache["mtime"]:
-            with open(path, "r", encoding="utf-8") as f:
-                configs_data = json.load(f)
-                _mapper_cache["list"] = [{"action": [pose["index"]], "keys": pose["keys"]} for pose in configs_data]
-            _mapper_cache["mtime"] = mtime
-            _mapper_cache["path"] = path
-    except Exception as e:
-        print(f"Error loading mapper config: {e}")
-        if not _mapper_cache["list"]:
-            return []
-    return _mapper_cache["list"]
 
 def state2words(state):
-    words_list = []
-    mapper_list = _get_mapper_list()
-    for i in range(len(mapper_list)):
-        action_list = mapper_list[i]["action"]
-        keys_list = mapper_list[i]["keys"]
-        # 若action_list中每个元素都在state中，则将keys_list添加到words_list中
-        if all(item in state for item in action_list):
-            words_list += keys_list
-    words_list = list(set(words_list))
-    return words_list
+    return list(lookup_keys(state2mask(state)).words)
 
     # # 注释掉的旧代码 - 保留作为参考
     # # state to list of words
@@ -170,7 +214,5 @@ def state2bytes(state):
     - 命令字段：0x04
     - 数据长度：至少7字节
     """
-    words_list = state2words(state)
-    keyboard_bytes, mouse_actions = words2bytes(words_list)
-
-    return keyboard_bytes, mouse_actions
\ No newline at end of file
+    report = lookup_keys(state2mask(state))
+    return list(report.keyboard_bytes), list(report.mouse_actions)
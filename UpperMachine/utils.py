@@ -27,19 +27,18 @@ def convert_numpy_to_list(obj):
         return obj
 
 
-def get_latest_config_path(base_dir="Source"):
+def list_config_versions(base_dir="Source"):
     """
-    搜索并返回最新的配置文件路径。
+    列出目录下所有配置文件版本，按 data_num 降序返回 [(data_num, path), ...]
     - configs.yml 作为 data_num=0
-    - configs_{data_num}.py 文件，取 data_num 最大的
-    如果没有找到，返回默认的 configs.yml
+    - configs_{data_num}.json 文件
     """
     if not os.path.exists(base_dir):
-        return os.path.join(base_dir, "configs.yml")
-    
+        return []
+
     files = os.listdir(base_dir)
     configs = []
-    
+
     for f in files:
         if f == "configs.yml":
             configs.append((0, os.path.join(base_dir, f)))
@@ -48,10 +47,20 @@ def get_latest_config_path(base_dir="Source"):
             if match:
                 data_num = int(match.group(1))
                 configs.append((data_num, os.path.join(base_dir, f)))
-    
+
+    # 按 data_num 降序排序
+    configs.sort(key=lambda x: x[0], reverse=True)
+    return configs
+
+
+def get_latest_config_path(base_dir="Source"):
+    """
+    搜索并返回最新的配置文件路径。
+    - configs.yml 作为 data_num=0
+    - configs_{data_num}.py 文件，取 data_num 最大的
+    如果没有找到，返回默认的 configs.yml
+    """
+    configs = list_config_versions(base_dir)
     if not configs:
         return os.path.join(base_dir, "configs.yml")
-    
-    # 按 data_num 降序排序，取最大的
-    configs.sort(key=lambda x: x[0], reverse=True)
-    return configs[0][1]
\ No newline at end of file
+    return configs[0][1]
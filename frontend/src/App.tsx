@@ -8,6 +8,7 @@ axios.defaults.baseURL = import.meta.env.VITE_BACKEND_URL || '';
 
 // Components & Pages
 import Sidebar from './components/Sidebar';
+import type { StreamConfig, PoseOverlay } from './components/SkeletonOverlay';
 import Home from './pages/Home';
 import Dashboard from './pages/Dashboard';
 import PoseRecorder from './pages/PoseRecorder';
@@ -48,8 +49,12 @@ function App() {
   const [currentInstruction, setCurrentInstruction] = useState<string[]>([]);
   const [currentActions, setCurrentActions] = useState<string[]>([]);
   const [personDetected, setPersonDetected] = useState<boolean>(false);
+  const [streamConfig, setStreamConfig] = useState<StreamConfig | null>(null);
+  const [overlay, setOverlay] = useState<PoseOverlay | null>(null);
   
   const socketRef = useRef<Socket | null>(null);
+  // binary 模式下画面以 Blob URL 显示，换帧时释放上一帧
+  const blobUrlRef = useRef<string | null>(null);
 
   useEffect(() => {
     // 初始化 Socket.IO - 使用相对路径让Vite代理处理
@@ -60,12 +65,42 @@ function App() {
       toast.success('已连接至后端服务');
     });
 
+    // 预览推送方式：base64 / binary 由 frame_update 携带画面，mjpeg 直接使用 MJPEG 流地址
+    socketRef.current.on('stream_config', (data: StreamConfig) => {
+      setStreamConfig(data);
+      if (data.transport === 'mjpeg') {
+        setImageSrc(`${BACKEND_URL}${data.mjpeg_url}?t=${Date.now()}`);
+      }
+    });
+
+    // 模型与摄像头在后台加载，连接时及加载过程中推送进度
+    socketRef.current.on('startup_progress', (data: { message: string; ready: boolean; error: string | null }) => {
+      if (data.error) {
+        toast.error(data.message, { id: 'startup' });
+      } else if (data.ready) {
+        toast.success(data.message, { id: 'startup' });
+      } else {
+        toast.loading(data.message, { id: 'startup' });
+      }
+    });
+
     socketRef.current.on('frame_update', (data: any) => {
-      if (data.image) {
+      if (data.image instanceof ArrayBuffer) {
+        const url = URL.createObjectURL(new Blob([data.image], { type: 'image/jpeg' }));
+        if (blobUrlRef.current) {
+          URL.revokeObjectURL(blobUrlRef.current);
+        }
+        blobUrlRef.current = url;
+        setImageSrc(url);
+      } else if (data.image) {
         setImageSrc(`data:image/jpeg;base64,${data.image}`);
       }
       if (data.fps !== undefined) {
-        setStats(prev => ({ ...prev, fps: data.fps, inference_time: data.stats?.inference_time || 0 }));
+        setStats(prev => ({ ...prev, fps: data.fps, inference_time: data.stats?.inference_time ?? prev.inference_time }));
+      }
+      // overlay 为 client 时由前端绘制骨架
+      if (data.keypoints) {
+        setOverlay({ keypoints: data.keypoints, frameSize: data.frame_size });
       }
       setCurrentInstruction(data.instruction || []);
       setCurrentActions(data.state || []);
@@ -95,6 +130,10 @@ function App() {
     return () => {
       socketRef.current?.disconnect();
       clearInterval(interval);
+      if (blobUrlRef.current) {
+        URL.revokeObjectURL(blobUrlRef.current);
+        blobUrlRef.current = null;
+      }
     };
   }, []);
 
@@ -147,6 +186,8 @@ function App() {
             stats={stats}
             config={config}
             imageSrc={imageSrc}
+            overlay={overlay}
+            streamConfig={streamConfig}
             currentInstruction={currentInstruction}
             currentActions={currentActions}
             commands={commands}
@@ -163,6 +204,8 @@ function App() {
         {activeTab === 'poseconfig' && (
           <PoseConfig 
             imageSrc={imageSrc} 
+            overlay={overlay}
+            streamConfig={streamConfig}
             personDetected={personDetected}
             isCameraRunning={stats.is_running}
           />
@@ -0,0 +1,76 @@
+import React from 'react';
+
+// 服务端 stream_config 事件：预览推送方式与骨架绘制位置
+export interface StreamConfig {
+  transport: 'base64' | 'binary' | 'mjpeg';
+  mjpeg_url: string;
+  overlay: 'server' | 'client';
+  skeleton: [number, number][];
+  keypoint_threshold: number;
+}
+
+// frame_update 携带的关键点：每人一个扁平数组 [x0, y0, s0, ...]，x/y 已镜像并归一化到 0~1
+export interface PoseOverlay {
+  keypoints: number[][];
+  frameSize: [number, number];
+}
+
+interface SkeletonOverlayProps {
+  overlay: PoseOverlay | null;
+  streamConfig: StreamConfig | null;
+}
+
+// 与服务端 draw_poses 的关键点配色一致（转换为 RGB）
+const COLORS = [
+  '#0000ff', '#ff00ff', '#ff00aa', '#5500ff', '#aa00ff', '#00ff55',
+  '#00aaff', '#00ff00', '#00ffff', '#55ff00', '#00ffaa', '#ff5500',
+  '#aaff00', '#ff0000', '#ffff00', '#ff0055', '#ffaa00',
+];
+
+/**
+ * 叠加在预览 <img className="object-contain"> 上的骨架层。
+ * SVG 的 viewBox 与画面宽高一致并使用 xMidYMid meet，与 object-contain 的缩放和留边完全相同。
+ */
+const SkeletonOverlay: React.FC<SkeletonOverlayProps> = ({ overlay, streamConfig }) => {
+  if (!overlay || !streamConfig || streamConfig.overlay !== 'client' || overlay.keypoints.length === 0) {
+    return null;
+  }
+
+  const [width, height] = overlay.frameSize;
+  const threshold = streamConfig.keypoint_threshold;
+  const strokeWidth = Math.max(width, height) / 160;
+
+  return (
+    <svg
+      className="absolute inset-0 w-full h-full pointer-events-none"
+      viewBox={`0 0 ${width} ${height}`}
+      preserveAspectRatio="xMidYMid meet"
+    >
+      {overlay.keypoints.map((points, person) => {
+        const x = (i: number) => points[i * 3] * width;
+        const y = (i: number) => points[i * 3 + 1] * height;
+        const visible = (i: number) => points[i * 3 + 2] > threshold;
+        return (
+          <g key={person}>
+            {streamConfig.skeleton.map(([i, j], k) =>
+              visible(i) && visible(j) ? (
+                <line
+                  key={`l${k}`}
+                  x1={x(i)} y1={y(i)} x2={x(j)} y2={y(j)}
+                  stroke={COLORS[j]} strokeOpacity={0.6} strokeWidth={strokeWidth} strokeLinecap="round"
+                />
+              ) : null
+            )}
+            {COLORS.map((color, i) =>
+              visible(i) ? (
+                <circle key={`p${i}`} cx={x(i)} cy={y(i)} r={strokeWidth * 0.75} fill={color} />
+              ) : null
+            )}
+          </g>
+        );
+      })}
+    </svg>
+  );
+};
+
+export default SkeletonOverlay;
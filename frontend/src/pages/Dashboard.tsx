@@ -1,10 +1,14 @@
 import React from 'react';
 import { Settings, Save, Camera, History, Zap } from 'lucide-react';
+import SkeletonOverlay from '../components/SkeletonOverlay';
+import type { StreamConfig, PoseOverlay } from '../components/SkeletonOverlay';
 
 interface DashboardProps {
   stats: any;
   config: any;
   imageSrc: string;
+  overlay: PoseOverlay | null;
+  streamConfig: StreamConfig | null;
   currentInstruction: string[];
   currentActions: string[];
   commands: any[];
@@ -17,6 +21,8 @@ const Dashboard: React.FC<DashboardProps> = ({
   stats, 
   config, 
   imageSrc, 
+  overlay,
+  streamConfig,
   currentInstruction,
   currentActions,
   commands, 
@@ -154,7 +160,10 @@ const Dashboard: React.FC<DashboardProps> = ({
         <div className="col-span-12 lg:col-span-8">
           <section className="bg-slate-900 rounded-2xl border border-slate-800 overflow-hidden shadow-2xl relative aspect-video flex items-center justify-center bg-black">
             {imageSrc ? (
-              <img src={imageSrc} className="w-full h-full object-contain" alt="Stream Preview" />
+              <>
+                <img src={imageSrc} className="w-full h-full object-contain" alt="Stream Preview" />
+                <SkeletonOverlay overlay={overlay} streamConfig={streamConfig} />
+              </>
             ) : (
               <div className="flex flex-col items-center text-slate-600">
                 <Camera className="w-16 h-16 mb-4 animate-pulse" />
@@ -2,6 +2,8 @@ import React, { useState, useEffect, useRef } from 'react';
 import { Settings, Eye, Edit3, Save, X, Key, Activity, Clock, Plus, Trash2 } from 'lucide-react';
 import axios from 'axios';
 import toast from 'react-hot-toast';
+import SkeletonOverlay from '../components/SkeletonOverlay';
+import type { StreamConfig, PoseOverlay } from '../components/SkeletonOverlay';
 
 interface PoseConfig {
   name: string;
@@ -20,11 +22,13 @@ interface PoseConfig {
 
 interface PoseConfigProps {
   imageSrc?: string;
+  overlay?: PoseOverlay | null;
+  streamConfig?: StreamConfig | null;
   personDetected?: boolean;
   isCameraRunning?: boolean;
 }
 
-const PoseConfig: React.FC<PoseConfigProps> = ({ imageSrc, personDetected, isCameraRunning }) => {
+const PoseConfig: React.FC<PoseConfigProps> = ({ imageSrc, overlay = null, streamConfig = null, personDetected, isCameraRunning }) => {
   const [poseConfigs, setPoseConfigs] = useState<PoseConfig[]>([]);
   const [selectedPose, setSelectedPose] = useState<PoseConfig | null>(null);
   const [editingKeys, setEditingKeys] = useState<string[]>([]);
@@ -967,7 +971,10 @@ const PoseConfig: React.FC<PoseConfigProps> = ({ imageSrc, personDetected, isCam
             <div className="p-8">
               <div className="relative aspect-video bg-black rounded-2xl border border-slate-800 flex items-center justify-center overflow-hidden mb-6">
                 {imageSrc ? (
-                  <img src={imageSrc} className="w-full h-full object-contain" alt="Live Feed" />
+                  <>
+                    <img src={imageSrc} className="w-full h-full object-contain" alt="Live Feed" />
+                    <SkeletonOverlay overlay={overlay} streamConfig={streamConfig} />
+                  </>
                 ) : (
                   <div className="text-slate-600">等待视频流...</div>
                 )}